@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2018, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+Benchmarks for the 'xmlschema' package.
+
+The benchmarks use synthetic XML documents of increasing sizes, generated by
+replicating the content of the sample instances of 'xmlschema/tests/cases',
+and deeply nested documents of a recursive schema, for measuring the decoding
+of documents deeper than the recursion limit of the interpreter.
+The benchmarks with a ':threads=N' suffix run the same operation on the same schema
+instance from N concurrent threads, measuring the throughput of a shared schema.
+Each result is printed as a JSON object on a separate line, so the outputs of
+different commits can be saved and compared with the option --compare.
+
+Examples:
+
+    python benchmarks/run_benchmarks.py --sizes 1K,100K,10M --output base.jsonl
+    python benchmarks/run_benchmarks.py --compare base.jsonl new.jsonl
+"""
+from __future__ import print_function, unicode_literals
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import xmlschema
+except ImportError:
+    # Adds the package base dir path as first search path for imports
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import xmlschema
+
+from xmlschema.compat import perf_counter
+from xmlschema.etree import ElementTree
+from xmlschema.converters import (
+    XMLSchemaConverter, ParkerConverter, BadgerFishConverter, AbderaConverter, JsonMLConverter
+)
+
+CASES_DIR = os.path.join(os.path.dirname(xmlschema.__file__), 'tests/cases')
+
+CONVERTERS = [XMLSchemaConverter, ParkerConverter, BadgerFishConverter, AbderaConverter, JsonMLConverter]
+
+BENCHMARK_CASES = [
+    {
+        'name': 'vehicles',
+        'schema': 'examples/vehicles/vehicles.xsd',
+        'sample': 'examples/vehicles/vehicles.xml',
+        'container': './vh:cars',
+        'path': './vh:vehicles',
+        'namespaces': {'vh': 'http://example.com/vehicles'},
+        'xpaths': ['vh:vehicles/vh:cars/vh:car', './/vh:car', 'vh:vehicles/*/*/@make'],
+    },
+    {
+        'name': 'collection',
+        'schema': 'examples/collection/collection.xsd',
+        'sample': 'examples/collection/collection.xml',
+        'container': '.',
+        'path': './col:collection',
+        'namespaces': {'col': 'http://example.com/ns/collection'},
+        'xpaths': ['col:collection/object', 'col:collection/object/author/name', './/@id'],
+    },
+    {
+        # A document with errors in each replicated chunk, for measuring the error reporting.
+        'name': 'vehicles-errors',
+        'schema': 'examples/vehicles/vehicles.xsd',
+        'sample': 'examples/vehicles/vehicles-2_errors.xml',
+        'container': '.',
+        'path': './vh:vehicles',
+        'namespaces': {'vh': 'http://example.com/vehicles'},
+        'xpaths': [],
+    },
+    {
+        # Nested elements of a recursive type, the sizes are replaced by the depths of the documents.
+        'name': 'deep',
+        'schema': None,
+        'namespaces': {},
+        'xpaths': [],
+    },
+]
+
+DEEP_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="node" type="nodeType"/>
+  <xs:complexType name="nodeType">
+    <xs:group ref="nodeGroup"/>
+    <xs:attribute name="level" type="xs:int"/>
+  </xs:complexType>
+  <xs:group name="nodeGroup">
+    <xs:sequence>
+      <xs:element name="node" type="nodeType" minOccurs="0"/>
+    </xs:sequence>
+  </xs:group>
+</xs:schema>
+"""
+
+THREADS = 4
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(value):
+    """Parses a size string like '100K' or '1G', returning the number of bytes."""
+    match = re.match(r'^(\d+)([KMG]?)B?$', value.strip().upper())
+    if match is None:
+        raise argparse.ArgumentTypeError("invalid size %r" % value)
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+
+def format_size(size):
+    for unit in ('G', 'M', 'K'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return '%d%s' % (size // SIZE_UNITS[unit], unit)
+    return str(size)
+
+
+def generate_document(case, size, dirname):
+    """
+    Generates a synthetic XML document of about *size* bytes, replicating the children
+    of the container element of the case's sample instance. The document is written
+    incrementally, so also very large documents can be generated.
+
+    :param case: the benchmark case.
+    :param size: the minimum size in bytes of the generated document.
+    :param dirname: the directory where to save the generated document.
+    :return: the path of the generated document.
+    """
+    sample = os.path.join(CASES_DIR, case['sample'])
+    for prefix, uri in case['namespaces'].items():
+        ElementTree.register_namespace(prefix, uri)
+
+    root = ElementTree.parse(sample).getroot()
+    container = root.find(case['container'], case['namespaces'])
+    chunk = b''.join(ElementTree.tostring(child, encoding='utf-8') for child in container)
+    marker = '@@REPEAT@@'
+    container.text = marker
+    for child in list(container):
+        container.remove(child)
+    head, tail = ElementTree.tostring(root, encoding='utf-8').split(marker.encode('utf-8'))
+
+    filename = os.path.join(dirname, '%s-%s.xml' % (case['name'], format_size(size)))
+    with open(filename, 'wb') as fp:
+        fp.write(b'<?xml version="1.0" encoding="utf-8"?>\n')
+        fp.write(head)
+        fp.write(chunk)
+        written = len(head) + len(chunk) + len(tail)
+        while written < size:
+            fp.write(chunk)
+            written += len(chunk)
+        fp.write(tail)
+    return filename
+
+
+def generate_deep_document(depth, dirname):
+    """
+    Generates an XML document of nested elements for the schema `DEEP_SCHEMA`.
+
+    :param depth: the number of nested elements.
+    :param dirname: the directory where to save the generated document.
+    :return: the path of the generated document.
+    """
+    filename = os.path.join(dirname, 'deep-%d.xml' % depth)
+    with open(filename, 'wb') as fp:
+        fp.write(b'<?xml version="1.0" encoding="utf-8"?>\n')
+        for level in range(depth):
+            fp.write(('<node level="%d">' % level).encode('utf-8'))
+        fp.write(b'</node>' * depth)
+    return filename
+
+
+def measure(func, repeat, memory=False):
+    """
+    Measures the execution of a function. Returns a dictionary with the best and the
+    mean time of the runs and, if *memory* is `True`, the peak of the memory allocated
+    during an additional traced run and the memory still held by its result.
+    """
+    timings = []
+    result = None
+    gc.collect()
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func()
+        timings.append(perf_counter() - start)
+        del result
+        gc.collect()
+
+    record = {'time': min(timings), 'mean': sum(timings) / len(timings), 'repeat': repeat}
+    if memory and tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            result = func()
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            gc.collect()
+            record['retained_memory'] = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+            del result
+            gc.collect()
+    else:
+        record['peak_memory'] = record['retained_memory'] = None
+    return record
+
+
+def iter_benchmarks(case, sizes, dirname):
+    """
+    Generates couples with a benchmark name and the function to measure. The
+    document size is `None` for benchmarks that don't depend on XML data.
+    """
+    if case['schema'] is None:
+        for item in iter_deep_benchmarks(sizes, dirname):
+            yield item
+        return
+
+    schema_file = os.path.join(CASES_DIR, case['schema'])
+    schema = xmlschema.XMLSchema(schema_file)
+    namespaces = case['namespaces']
+    yield None, 'build', lambda: xmlschema.XMLSchema(schema_file)
+    yield None, 'build:keep_source=False', lambda: xmlschema.XMLSchema(schema_file, keep_source=False)
+
+    for path in case['xpaths']:
+        yield None, 'xpath_find:%s' % path, lambda: schema.findall(path, namespaces)
+
+    for size in sizes:
+        filename = generate_document(case, size, dirname)
+        yield size, 'parse', lambda: ElementTree.parse(filename)
+
+        xml_document = ElementTree.parse(filename)
+        yield size, 'is_valid', lambda: schema.is_valid(xml_document)
+        yield size, 'iter_errors', lambda: list(schema.iter_errors(xml_document))
+
+        for converter in CONVERTERS:
+            # Consumes all the decoder's output, that includes the errors of invalid documents.
+            yield size, 'to_dict:%s' % converter.__name__, \
+                lambda: list(schema.iter_decode(xml_document, converter=converter))
+
+        yield size, 'to_dict:decode_cache', lambda: decode_with_cache(schema, xml_document)
+
+        yield size, 'is_valid:threads=%d' % THREADS, \
+            lambda: run_in_threads(lambda: schema.is_valid(xml_document), THREADS)
+        yield size, 'to_dict:threads=%d' % THREADS, \
+            lambda: run_in_threads(lambda: list(schema.iter_decode(xml_document)), THREADS)
+        yield size, 'to_dict:decode_cache:threads=%d' % THREADS, \
+            lambda: run_in_threads(lambda: list(schema.iter_decode(xml_document)), THREADS, schema)
+
+        data = schema.to_dict(xml_document, validation='skip')
+        yield size, 'encode', lambda: schema.encode(
+            data, path=case['path'], namespaces=namespaces, validation='lax'
+        )
+        data = xml_document = None
+        os.unlink(filename)
+
+
+def decode_with_cache(schema, xml_document, maxsize=1024):
+    """Decodes a document with the decode caches of the schema's simple types enabled."""
+    schema.set_decode_cache(maxsize)
+    try:
+        return list(schema.iter_decode(xml_document))
+    finally:
+        schema.set_decode_cache(None)
+
+
+def run_in_threads(func, count, cached_schema=None):
+    """
+    Runs a function from *count* concurrent threads, returning the list of the results.
+    If a schema is provided its decode caches are enabled, so they are shared between
+    the threads. An exception raised in a thread is raised again at the end.
+    """
+    results = [None] * count
+    errors = []
+
+    def target(index):
+        try:
+            results[index] = func()
+        except Exception as err:
+            errors.append(err)
+
+    if cached_schema is not None:
+        cached_schema.set_decode_cache(1024)
+    try:
+        threads = [threading.Thread(target=target, args=(k,)) for k in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if cached_schema is not None:
+            cached_schema.set_decode_cache(None)
+
+    if errors:
+        raise errors[0]
+    return results
+
+
+def iter_deep_benchmarks(depths, dirname):
+    """
+    Like :func:`iter_benchmarks` but for the deeply nested documents of the 'deep'
+    case, generating couples with the depth of the document and the function to
+    measure. The encoding is not measured because it's still recursive.
+    """
+    schema = xmlschema.XMLSchema(DEEP_SCHEMA)
+    for depth in depths:
+        filename = generate_deep_document(depth, dirname)
+        yield depth, 'parse', lambda: ElementTree.parse(filename)
+
+        xml_document = ElementTree.parse(filename)
+        yield depth, 'is_valid', lambda: schema.is_valid(xml_document)
+        yield depth, 'iter_errors', lambda: list(schema.iter_errors(xml_document))
+        yield depth, 'to_dict:XMLSchemaConverter', lambda: list(schema.iter_decode(xml_document))
+        xml_document = None
+        os.unlink(filename)
+
+
+def get_metadata():
+    metadata = {
+        'type': 'metadata',
+        'xmlschema': xmlschema.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'tracemalloc': tracemalloc is not None,
+    }
+    try:
+        metadata['commit'] = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata['commit'] = None
+    return metadata
+
+
+def run_benchmarks(args, output):
+    dirname = tempfile.mkdtemp(prefix='xmlschema-bench-')
+    try:
+        output.write(json.dumps(get_metadata(), sort_keys=True) + '\n')
+        for case in BENCHMARK_CASES:
+            if args.cases and case['name'] not in args.cases:
+                continue
+            sizes = args.depths if case['schema'] is None else args.sizes
+            for size, name, func in iter_benchmarks(case, sizes, dirname):
+                if args.benchmarks and not any(name.startswith(b) for b in args.benchmarks):
+                    continue
+                record = measure(func, args.repeat, memory=args.memory)
+                record.update(type='benchmark', case=case['name'], benchmark=name, size=size)
+                output.write(json.dumps(record, sort_keys=True) + '\n')
+                output.flush()
+
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            output.write(json.dumps({'type': 'resources', 'max_rss': max_rss}) + '\n')
+    finally:
+        shutil.rmtree(dirname)
+
+
+def load_results(filename):
+    results = {}
+    with io.open(filename, encoding='utf-8') as fp:
+        for line in fp:
+            record = json.loads(line)
+            if record.get('type') == 'benchmark':
+                results[record['case'], record['benchmark'], record['size']] = record
+    return results
+
+
+def compare_results(base_file, new_file, output):
+    """Prints a comparison between the results of two runs, with the ratio of the best times."""
+    base, new = load_results(base_file), load_results(new_file)
+    output.write('%-16s %-44s %6s %12s %12s %8s\n' % ('case', 'benchmark', 'size', 'base', 'new', 'ratio'))
+    for key in sorted(base, key=lambda x: (x[0], x[2] or 0, x[1])):
+        if key not in new:
+            continue
+        base_time, new_time = base[key]['time'], new[key]['time']
+        output.write('%-16s %-44s %6s %12.6f %12.6f %8.3f\n' % (
+            key[0], key[1], format_size(key[2]) if key[2] else '-',
+            base_time, new_time, new_time / base_time if base_time else float('nan')
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmarks of the xmlschema package.")
+    parser.add_argument('--sizes', type=lambda x: [parse_size(v) for v in x.split(',')],
+                        default=[parse_size(v) for v in ('1K', '10K', '100K', '1M')],
+                        help="comma separated list of document sizes (eg. 1K,1M,1G).")
+    parser.add_argument('--depths', type=lambda x: [int(v) for v in x.split(',')],
+                        default=[100, 1000, 10000],
+                        help="comma separated list of depths of the documents of the 'deep' case.")
+    parser.add_argument('--cases', type=lambda x: x.split(','), default=None,
+                        help="comma separated list of cases to run (default: all).")
+    parser.add_argument('--benchmarks', type=lambda x: x.split(','), default=None,
+                        help="comma separated list of benchmark name prefixes (eg. build,to_dict).")
+    parser.add_argument('--repeat', type=int, default=3, help="number of timed runs for each benchmark.")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip the measuring of peak memory (requires tracemalloc).")
+    parser.add_argument('--output', default=None, help="write the results to a file instead of stdout.")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), default=None,
+                        help="compare two result files instead of running the benchmarks.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(args.compare[0], args.compare[1], sys.stdout)
+    elif args.output:
+        with io.open(args.output, 'w', encoding='utf-8') as output:
+            run_benchmarks(args, output)
+    else:
+        run_benchmarks(args, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
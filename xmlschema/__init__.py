@@ -10,16 +10,24 @@
 #
 from .exceptions import XMLSchemaException, XMLSchemaXPathError, XMLSchemaRegexError, XMLSchemaURLError
 from .etree import etree_get_namespaces
-from .resources import fetch_resource, load_xml_resource, fetch_schema, fetch_schema_locations, normalize_url
+from .resources import (
+    fetch_resource, load_xml_resource, fetch_schema, fetch_schema_locations, normalize_url,
+    XMLResourceResolver, XMLCatalog
+)
 from .converters import (
     XMLSchemaConverter, ParkerConverter, BadgerFishConverter, AbderaConverter, JsonMLConverter
 )
 
 from .validators.exceptions import (
     XMLSchemaParseError, XMLSchemaValidationError, XMLSchemaDecodeError,
-    XMLSchemaEncodeError, XMLSchemaNotBuiltError, XMLSchemaChildrenValidationError
+    XMLSchemaEncodeError, XMLSchemaNotBuiltError, XMLSchemaChildrenValidationError,
+    ValidationErrorRecord
+)
+from .validators.schema import (
+    XsdGlobals, BuildStats, XMLSchemaBase, XMLSchema, XMLSchema_v1_0, create_validator, MetaValidationRegistry
 )
-from .validators.schema import XsdGlobals, XMLSchemaBase, XMLSchema, XMLSchema_v1_0, create_validator
+from .generators import XMLInstanceGenerator
+from .profiling import XMLSchemaProfiler
 
 __version__ = '0.9.22'
 __author__ = "Davide Brunato"
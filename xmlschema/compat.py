@@ -18,14 +18,22 @@ try:
     from urllib.request import urlopen, urljoin, urlsplit, pathname2url
     from urllib.parse import uses_relative, urlparse, urlunsplit
     from urllib.error import URLError
+    from http.client import HTTPConnection, HTTPSConnection, HTTPException
     from io import StringIO
 except ImportError:
     # Python 2 imports
     from urllib import pathname2url
     from urllib2 import urlopen, URLError
+    from httplib import HTTPConnection, HTTPSConnection, HTTPException
     from urlparse import urlsplit, urljoin, uses_relative, urlparse, urlunsplit
     from StringIO import StringIO  # the io.StringIO accepts only unicode type
 
+try:
+    from time import perf_counter
+except ImportError:
+    # Python 2 fallback
+    from time import time as perf_counter
+
 
 PY2 = sys.version_info[0] == 2
 PY3 = sys.version_info[0] == 3
@@ -39,3 +47,17 @@ else:
     unicode_type = unicode
     unicode_chr = unichr
 
+try:
+    from sys import intern as _intern  # Python 3
+except ImportError:
+    _intern = intern  # Python 2 built-in
+
+
+def intern_string(obj):
+    """
+    Returns the interned copy of a string, that is shared by all the equal strings
+    interned by the process. Other objects, including the unicode strings of Python 2,
+    are returned unchanged.
+    """
+    return _intern(obj) if type(obj) is str else obj
+
@@ -14,6 +14,7 @@ This module contains classes for converting XML elements with XMLSchema support.
 from collections import OrderedDict, namedtuple
 import string
 
+from .compat import intern_string
 from .exceptions import XMLSchemaValueError
 from .namespaces import NamespaceMapper
 
@@ -51,6 +52,7 @@ class XMLSchemaConverter(NamespaceMapper):
         self.text_key = text_key
         self.attr_prefix = attr_prefix
         self.cdata_prefix = cdata_prefix
+        self._attr_keys = None, {}
         super(XMLSchemaConverter, self).__init__(namespaces)
 
     def __setattr__(self, name, value):
@@ -76,8 +78,19 @@ class XMLSchemaConverter(NamespaceMapper):
         if self.attr_prefix is None or not attributes:
             return
         elif self.attr_prefix:
+            # The prefixed names are interned and cached, like the mapped names.
+            attr_prefix, keys = self._attr_keys
+            if attr_prefix != self.attr_prefix:
+                attr_prefix, keys = self._attr_keys = self.attr_prefix, {}
+
+            map_qname = self.map_qname
             for name, value in attributes:
-                yield u'%s%s' % (self.attr_prefix, self.map_qname(name)), value
+                mapped_name = map_qname(name)
+                try:
+                    key = keys[mapped_name]
+                except KeyError:
+                    key = keys[mapped_name] = intern_string(u'%s%s' % (attr_prefix, mapped_name))
+                yield key, value
         else:
             for name, value in attributes:
                 yield self.map_qname(name), value
@@ -11,6 +11,7 @@
 """
 This module contains ElementTree setup and helpers for xmlschema package.
 """
+import threading
 from xml.etree import ElementTree
 from .compat import PY3, StringIO
 from .exceptions import XMLSchemaValueError
@@ -28,7 +29,30 @@ etree_fromstring = ElementTree.fromstring
 etree_parse_error = ElementTree.ParseError
 etree_element = ElementTree.Element
 etree_iselement = ElementTree.iselement
-etree_register_namespace = ElementTree.register_namespace
+
+_register_namespace_lock = threading.Lock()
+
+
+def etree_register_namespace(prefix, uri):
+    """
+    Registers a namespace prefix in the ElementTree's global namespace map.
+    The map is shared by all threads, so the update is serialized.
+    """
+    with _register_namespace_lock:
+        ElementTree.register_namespace(prefix, uri)
+
+
+def etree_register_namespaces(namespaces):
+    """
+    Registers a map of namespace prefixes into the ElementTree's global
+    namespace map, skipping the entries that are already registered.
+
+    :param namespaces: a dictionary from prefixes to namespace URIs.
+    """
+    namespace_map = ElementTree._namespace_map
+    for prefix, uri in namespaces.items():
+        if namespace_map.get(uri) != prefix:
+            etree_register_namespace(prefix, uri)
 
 
 def etree_tostring(elem, indent='', max_lines=None, spaces_for_tab=4):
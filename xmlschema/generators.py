@@ -0,0 +1,661 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2018, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a generator of synthetic XML instances driven by the schema model.
+"""
+import base64
+import binascii
+import io
+import random
+import string
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+from .compat import unicode_type, unicode_chr
+from .exceptions import XMLSchemaValueError
+from .namespaces import XSD_NAMESPACE_PATH, XML_NAMESPACE_PATH, XSI_NAMESPACE_PATH
+from .qnames import (
+    XSD_CHOICE_TAG, XSD_ENUMERATION_TAG, XSD_TOTAL_DIGITS_TAG, XSD_FRACTION_DIGITS_TAG,
+    get_namespace, local_name
+)
+from .validators.exceptions import XMLSchemaValidationError
+from .validators.simple_types import XsdList, XsdUnion
+from .validators.wildcards import XsdAnyElement
+from .validators.groups import XsdGroup
+from .validators.elements import XsdElement
+
+
+ASCII_CHARACTERS = string.ascii_letters + string.digits + '-_.:!?@#+*/ '
+
+INTEGER_RANGES = {
+    'byte': (-2 ** 7, 2 ** 7 - 1),
+    'short': (-2 ** 15, 2 ** 15 - 1),
+    'int': (-2 ** 31, 2 ** 31 - 1),
+    'long': (-2 ** 63, 2 ** 63 - 1),
+    'unsignedByte': (0, 2 ** 8 - 1),
+    'unsignedShort': (0, 2 ** 16 - 1),
+    'unsignedInt': (0, 2 ** 32 - 1),
+    'unsignedLong': (0, 2 ** 64 - 1),
+    'nonNegativeInteger': (0, None),
+    'positiveInteger': (1, None),
+    'nonPositiveInteger': (None, 0),
+    'negativeInteger': (None, -1),
+}
+
+INVALID_VALUES = (u'-INVALID-', u'', u'99999999999999999999999', u'-1', u'0.5', u'x y')
+
+
+def iter_base_types(xsd_type):
+    """
+    Iterates a simple type and its base types, following the restriction chain
+    until a builtin, a list or a union type. For complex types with simple content
+    the chain is started from the content type.
+    """
+    while xsd_type is not None:
+        if xsd_type.is_complex():
+            if not xsd_type.has_simple_content():
+                return
+            xsd_type = xsd_type.content_type
+            continue
+        yield xsd_type
+        xsd_type = getattr(xsd_type, 'base_type', None)
+
+
+class RegexSampler(object):
+    """
+    Generates random strings matching a Python regular expression, walking the parse
+    tree of the expression. The choice of characters is restricted to printable ASCII
+    characters when a character class includes some of them.
+
+    :param rnd: the `random.Random` instance to use.
+    :param max_repeat: the maximum number of additional repetitions for unbounded \
+    or large quantifiers.
+    """
+    def __init__(self, rnd, max_repeat=4):
+        self.rnd = rnd
+        self.max_repeat = max_repeat
+        self._parsed = {}
+        self._classes = {}
+
+    def sample(self, pattern):
+        try:
+            parsed = self._parsed[pattern]
+        except KeyError:
+            parsed = self._parsed[pattern] = sre_parse.parse(pattern)
+        return u''.join(self._iter_sample(parsed))
+
+    def _iter_sample(self, items):
+        rnd = self.rnd
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                yield unicode_chr(av)
+            elif op is sre_constants.NOT_LITERAL:
+                yield rnd.choice([c for c in ASCII_CHARACTERS if ord(c) != av])
+            elif op is sre_constants.ANY:
+                yield rnd.choice(string.ascii_letters)
+            elif op is sre_constants.IN:
+                yield self._sample_class(av)
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+                min_repeat, max_repeat, subpattern = av
+                max_repeat = min(max_repeat, min_repeat + self.max_repeat)
+                for _ in range(rnd.randint(min_repeat, max_repeat)):
+                    for s in self._iter_sample(subpattern):
+                        yield s
+            elif op is sre_constants.BRANCH:
+                for s in self._iter_sample(rnd.choice(av[1])):
+                    yield s
+            elif op is sre_constants.SUBPATTERN:
+                for s in self._iter_sample(av[-1]):
+                    yield s
+
+    def _sample_class(self, items):
+        key = id(items)
+        try:
+            ascii_chars = self._classes[key][1]
+        except KeyError:
+            ascii_chars = [c for c in ASCII_CHARACTERS if self._match_class(items, ord(c))]
+            self._classes[key] = items, ascii_chars  # keeps a reference to items for the id
+
+        if ascii_chars:
+            return self.rnd.choice(ascii_chars)
+
+        # No ASCII characters in the class: pick a character from ranges and literals
+        for _ in range(100):
+            op, av = self.rnd.choice(items)
+            if op is sre_constants.LITERAL:
+                code = av
+            elif op is sre_constants.RANGE:
+                code = self.rnd.randint(av[0], av[1])
+            else:
+                continue
+            if self._match_class(items, code):
+                return unicode_chr(code)
+        return u''
+
+    @staticmethod
+    def _match_class(items, code):
+        char = unicode_chr(code)
+        negate = False
+        for op, av in items:
+            if op is sre_constants.NEGATE:
+                negate = True
+            elif op is sre_constants.LITERAL:
+                if code == av:
+                    return not negate
+            elif op is sre_constants.RANGE:
+                if av[0] <= code <= av[1]:
+                    return not negate
+            elif op is sre_constants.CATEGORY:
+                if av is sre_constants.CATEGORY_DIGIT:
+                    matched = char.isdigit()
+                elif av is sre_constants.CATEGORY_NOT_DIGIT:
+                    matched = not char.isdigit()
+                elif av is sre_constants.CATEGORY_SPACE:
+                    matched = char.isspace()
+                elif av is sre_constants.CATEGORY_NOT_SPACE:
+                    matched = not char.isspace()
+                elif av is sre_constants.CATEGORY_WORD:
+                    matched = char.isalnum() or char == u'_'
+                elif av is sre_constants.CATEGORY_NOT_WORD:
+                    matched = not (char.isalnum() or char == u'_')
+                else:
+                    matched = False
+                if matched:
+                    return not negate
+        return negate
+
+
+class XMLInstanceGenerator(object):
+    """
+    Generator of synthetic XML instances for a schema. The documents are produced
+    walking the XSD elements, groups and types of the schema, respecting the occurrences
+    of the particles and the facets, enumerations and patterns of the simple types.
+    The generator is deterministic for a given seed.
+
+    :param schema: the schema instance.
+    :param seed: the seed for the pseudo-random generator. With the same seed the \
+    same documents are generated.
+    :param error_rate: the probability, from 0.0 to 1.0, of injecting an error into \
+    each generated element. Errors are invalid values, undeclared attributes or unexpected \
+    child elements.
+    :param max_occurs: the maximum number of occurrences generated for a particle \
+    over its minOccurs, used for unbounded or large maxOccurs values.
+    :param max_depth: the maximum depth of the generated tree, over it only the \
+    required content is generated.
+    :param namespaces: an optional mapping from namespace prefixes to URIs to use \
+    for the prefixes of the generated document.
+    :param max_attempts: the number of attempts for generating a value that is valid \
+    for a simple type before giving up.
+    """
+    def __init__(self, schema, seed=None, error_rate=0.0, max_occurs=5, max_depth=10,
+                 namespaces=None, max_attempts=10):
+        if not 0.0 <= error_rate <= 1.0:
+            raise XMLSchemaValueError("error_rate must be between 0.0 and 1.0: %r" % error_rate)
+        self.schema = schema
+        self.seed = seed
+        self.error_rate = error_rate
+        self.max_occurs = max_occurs
+        self.max_depth = max_depth
+        self.max_attempts = max_attempts
+        self.rnd = random.Random(seed)
+        self.sampler = RegexSampler(self.rnd)
+        self.injected_errors = 0
+        self._ids = []
+        self._size = None
+        self._written = 0
+
+        # Namespace URI to prefix map
+        self.prefixes = {XML_NAMESPACE_PATH: 'xml', XSI_NAMESPACE_PATH: 'xsi'}
+        for mapping in (namespaces or {}, schema.namespaces):
+            for prefix, uri in sorted(mapping.items()):
+                if prefix and uri and uri not in self.prefixes:
+                    self.prefixes[uri] = prefix
+
+        maps = schema.maps
+        self.declared_namespaces = {XSI_NAMESPACE_PATH}
+        for uri, schemas in maps.namespaces.items():
+            if uri and any(s.maps is maps for s in schemas):
+                self.declared_namespaces.add(uri)
+        for uri in sorted(self.declared_namespaces):
+            if uri not in self.prefixes:
+                self.prefixes[uri] = self._get_unused_prefix()
+
+        self._global_elements = sorted(maps.elements.values(), key=lambda x: x.name)
+        self._wildcard_elements = {}
+
+    def _get_unused_prefix(self):
+        prefixes = set(self.prefixes.values())
+        k = 0
+        while 'ns%d' % k in prefixes:
+            k += 1
+        return 'ns%d' % k
+
+    def get_root_element(self, path=None, namespaces=None):
+        """
+        Gets the XSD element to use as root of the generated documents.
+
+        :param path: an optional XPath expression on the schema that selects the \
+        element declaration. If it's `None` the first global element that is not \
+        referenced by other global declarations is used.
+        :param namespaces: an optional mapping from namespace prefixes to URIs for the path.
+        """
+        if path is not None:
+            xsd_element = self.schema.find(path, namespaces)
+            if not isinstance(xsd_element, XsdElement):
+                raise XMLSchemaValueError("the path %r doesn't match any element of the schema!" % path)
+            return xsd_element
+
+        elements = [e for e in self._global_elements if e.schema.maps is self.schema.maps]
+        if not elements:
+            raise XMLSchemaValueError("%r has no global elements." % self.schema)
+
+        referenced = set()
+        for xsd_element in elements:
+            for component in xsd_element.type.iter_components(XsdElement):
+                if component.ref is not None:
+                    referenced.add(component.name)
+        for xsd_element in elements:
+            if xsd_element.name not in referenced and not xsd_element.abstract:
+                return xsd_element
+        return elements[0]
+
+    def iter_generate(self, path=None, size=None, namespaces=None):
+        """
+        Generates a document, yielding it in chunks of text.
+
+        :param path: an optional XPath expression on the schema that selects the \
+        root element of the document.
+        :param size: an optional size, in characters, of the document. When provided \
+        the occurrences of the first unbounded particles are repeated until the size is \
+        reached, so a schema without unbounded particles may produce smaller documents.
+        :param namespaces: an optional mapping from namespace prefixes to URIs for the path.
+        """
+        xsd_element = self.get_root_element(path, namespaces)
+        self._size = size
+        self._written = 0
+        try:
+            chunk = u'<?xml version="1.0" encoding="UTF-8"?>\n'
+            self._written += len(chunk)
+            yield chunk
+            for chunk in self._iter_element(xsd_element, depth=0):
+                self._written += len(chunk)
+                yield chunk
+            yield u'\n'
+        finally:
+            self._size = None
+
+    def generate(self, target=None, path=None, size=None, namespaces=None):
+        """
+        Generates a document.
+
+        :param target: an optional file path or a binary file-like object where \
+        the document is written with UTF-8 encoding. If not provided the document is \
+        returned as a string.
+        :param path: an optional XPath expression on the schema that selects the \
+        root element of the document.
+        :param size: an optional size in characters of the document.
+        :param namespaces: an optional mapping from namespace prefixes to URIs for the path.
+        """
+        chunks = self.iter_generate(path, size, namespaces)
+        if target is None:
+            return u''.join(chunks)
+        elif hasattr(target, 'write'):
+            for chunk in chunks:
+                target.write(chunk.encode('utf-8'))
+        else:
+            with io.open(target, 'w', encoding='utf-8') as fp:
+                for chunk in chunks:
+                    fp.write(chunk)
+
+    #
+    # Names and structures
+    def _get_prefixed_name(self, qname, declarations):
+        if qname[0] != '{':
+            return qname
+        uri = get_namespace(qname)
+        try:
+            prefix = self.prefixes[uri]
+        except KeyError:
+            # A namespace not declared in the root element, declare it locally
+            prefix = self._get_unused_prefix()
+            self.prefixes[uri] = prefix
+            self.declared_namespaces.add(uri)
+            declarations.append((u'xmlns:%s' % prefix, uri))
+        return u'%s:%s' % (prefix, local_name(qname))
+
+    def _iter_occurs(self, particle, depth, fill=True):
+        min_occurs, max_occurs = particle.min_occurs, particle.max_occurs
+        if depth >= self.max_depth:
+            count = min_occurs
+        elif max_occurs is None:
+            count = self.rnd.randint(min_occurs, min_occurs + self.max_occurs)
+        else:
+            count = self.rnd.randint(min_occurs, min(max_occurs, min_occurs + self.max_occurs))
+
+        k = 0
+        while k < count:
+            yield k
+            k += 1
+
+        if fill and max_occurs is None and depth < self.max_depth:
+            # Fill the document up to the requested size
+            while self._size is not None and self._written < self._size:
+                written = self._written
+                yield k
+                k += 1
+                if self._written == written:
+                    break
+
+    def _inject_error(self):
+        return self.error_rate and self.rnd.random() < self.error_rate
+
+    def _iter_element(self, xsd_element, depth):
+        if xsd_element.abstract:
+            substitutes = sorted(
+                (e for e in self.schema.maps.substitution_groups.get(xsd_element.name, ()) if not e.abstract),
+                key=lambda x: x.name
+            )
+            if substitutes:
+                xsd_element = self.rnd.choice(substitutes)
+
+        declarations = []
+        if depth == 0:
+            for uri in sorted(self.declared_namespaces):
+                declarations.append((u'xmlns:%s' % self.prefixes[uri], uri))
+        tag = self._get_prefixed_name(xsd_element.name, declarations)
+
+        xsd_type = xsd_element.type
+        attributes = []
+        if xsd_type.is_complex() and xsd_type.abstract:
+            derived_types = sorted(
+                (t for t in self.schema.maps.types.values()
+                 if t.is_complex() and not t.abstract and t.is_derived(xsd_type)),
+                key=lambda x: x.name
+            )
+            if derived_types:
+                xsd_type = self.rnd.choice(derived_types)
+                attributes.append((
+                    u'xsi:type', self._get_prefixed_name(xsd_type.name, declarations)
+                ))
+
+        if xsd_type.is_complex():
+            attributes.extend(self._generate_attributes(xsd_type.attributes, declarations))
+
+        has_simple_content = xsd_type.is_simple() or xsd_type.has_simple_content()
+        if has_simple_content:
+            if xsd_element.fixed is not None:
+                text = xsd_element.fixed
+            else:
+                text = self._generate_value(xsd_type)
+        else:
+            text = None
+        extra_child = False
+
+        if self._inject_error():
+            errors = ['value', 'attribute', 'child']
+            self.rnd.shuffle(errors)
+            for error in errors:
+                if error == 'value':
+                    if has_simple_content:
+                        value = self._generate_invalid_value(xsd_type)
+                        if value is not None:
+                            text = value
+                            break
+                elif error == 'attribute':
+                    if xsd_type.is_simple() or None not in xsd_type.attributes:
+                        attributes.append((u'unexpectedAttribute', u'invalid'))
+                        break
+                elif xsd_type.is_simple() or xsd_type.has_simple_content() or \
+                        not any(isinstance(e, XsdAnyElement) for e in xsd_type.content_type.iter_elements()):
+                    extra_child = True
+                    break
+            else:
+                error = None
+            if error is not None:
+                self.injected_errors += 1
+
+        start_tag = u'<%s' % tag
+        if declarations or attributes:
+            start_tag += u''.join(
+                u' %s="%s"' % (name, escape(value, {'"': '&quot;'}))
+                for name, value in declarations + attributes
+            )
+
+        if has_simple_content or xsd_type.is_empty():
+            if text:
+                yield u'%s>%s' % (start_tag, escape(text))
+            elif extra_child:
+                yield start_tag + u'>'
+            else:
+                yield start_tag + u'/>'
+                return
+        else:
+            yield start_tag + u'>'
+            for chunk in self._iter_group(xsd_type.content_type, depth):
+                yield chunk
+
+        if extra_child:
+            yield u'<unexpectedElement/>'
+        yield u'</%s>' % tag
+
+    def _generate_attributes(self, attributes, declarations):
+        result = []
+        for name in sorted(k for k in attributes if k is not None):
+            xsd_attribute = attributes[name]
+            use = xsd_attribute.use
+            if use == 'prohibited' or use != 'required' and self.rnd.random() < 0.5:
+                continue
+            elif xsd_attribute.fixed is not None:
+                value = xsd_attribute.fixed
+            else:
+                value = self._generate_value(xsd_attribute.type)
+            result.append((self._get_prefixed_name(name, declarations), value))
+        return result
+
+    def _iter_group(self, xsd_group, depth):
+        for _ in self._iter_occurs(xsd_group, depth, fill=False):
+            if xsd_group.model == XSD_CHOICE_TAG:
+                items = [self.rnd.choice(xsd_group)] if len(xsd_group) else []
+            else:
+                items = xsd_group
+
+            for item in items:
+                if isinstance(item, XsdGroup):
+                    for chunk in self._iter_group(item, depth):
+                        yield chunk
+                elif isinstance(item, XsdAnyElement):
+                    for chunk in self._iter_wildcard(item, depth):
+                        yield chunk
+                else:
+                    for _ in self._iter_occurs(item, depth):
+                        for chunk in self._iter_element(item, depth + 1):
+                            yield chunk
+
+    def _iter_wildcard(self, xsd_any, depth):
+        try:
+            candidates = self._wildcard_elements[xsd_any]
+        except KeyError:
+            candidates = self._wildcard_elements[xsd_any] = [
+                e for e in self._global_elements if not e.abstract and xsd_any.match(e.name)
+            ]
+
+        if candidates:
+            for _ in self._iter_occurs(xsd_any, depth, fill=False):
+                for chunk in self._iter_element(self.rnd.choice(candidates), depth + 1):
+                    yield chunk
+
+    #
+    # Simple values
+    def _is_valid_value(self, xsd_type, text):
+        for result in xsd_type.iter_decode(text, validation='lax'):
+            if isinstance(result, XMLSchemaValidationError):
+                return False
+        return True
+
+    def _generate_value(self, xsd_type):
+        if xsd_type.is_complex():
+            xsd_type = xsd_type.content_type
+        text = u''
+        for _ in range(self.max_attempts):
+            text = self._generate_text(xsd_type)
+            if self._is_valid_value(xsd_type, text):
+                break
+        return text
+
+    def _generate_invalid_value(self, xsd_type):
+        if xsd_type.is_complex():
+            xsd_type = xsd_type.content_type
+        max_length = self._get_first(xsd_type, 'max_length')
+        candidates = list(INVALID_VALUES)
+        if max_length is not None:
+            candidates.append(u'x' * (max_length + 1))
+        self.rnd.shuffle(candidates)
+        for text in candidates:
+            if not self._is_valid_value(xsd_type, text):
+                return text
+
+    @staticmethod
+    def _get_first(xsd_type, name):
+        for base_type in iter_base_types(xsd_type):
+            value = getattr(base_type, name, None)
+            if value is not None:
+                return value
+
+    @staticmethod
+    def _get_facet(xsd_type, tag):
+        for base_type in iter_base_types(xsd_type):
+            facet = getattr(base_type, 'facets', {}).get(tag)
+            if facet is not None:
+                return facet
+
+    def _generate_text(self, xsd_type):
+        rnd = self.rnd
+        enumeration = self._get_facet(xsd_type, XSD_ENUMERATION_TAG)
+        if enumeration is not None:
+            return rnd.choice(enumeration).get('value')
+
+        base_types = list(iter_base_types(xsd_type))
+        builtin_type = None
+        for k, base_type in enumerate(base_types):
+            if base_type.is_global and base_type.name and base_type.name.startswith('{%s}' % XSD_NAMESPACE_PATH):
+                builtin_type = base_type
+                base_types = base_types[:k + 1]
+                break
+        builtin_name = local_name(builtin_type.name) if builtin_type is not None else None
+
+        # The patterns of the derived types take precedence over the ones of the builtin type
+        patterns = [t.patterns for t in base_types if t.patterns and t is not builtin_type]
+        if not patterns:
+            if builtin_name == 'ID':
+                self._ids.append(u'id%d' % (len(self._ids) + 1))
+                return self._ids[-1]
+            elif builtin_name == 'IDREF' and self._ids:
+                return rnd.choice(self._ids)
+            elif builtin_type is not None and builtin_type.patterns:
+                patterns = [builtin_type.patterns]
+
+        if patterns:
+            return self.sampler.sample(rnd.choice(patterns[0].patterns).pattern)
+
+        min_length = self._get_first(xsd_type, 'min_length')
+        max_length = self._get_first(xsd_type, 'max_length')
+        if isinstance(base_types[-1], XsdList):
+            item_type = base_types[-1].item_type
+            min_length = min_length or 1
+            max_length = max_length if max_length is not None else min_length + 3
+            return u' '.join(
+                self._generate_value(item_type) for _ in range(rnd.randint(min_length, max_length))
+            )
+        elif isinstance(base_types[-1], XsdUnion):
+            return self._generate_value(rnd.choice(base_types[-1].member_types))
+
+        min_value = self._get_first(xsd_type, 'min_value')
+        max_value = self._get_first(xsd_type, 'max_value')
+        if builtin_name in INTEGER_RANGES or builtin_name == 'integer':
+            low, high = INTEGER_RANGES.get(builtin_name, (None, None))
+            if min_value is not None:
+                low = int(min_value) if low is None else max(low, int(min_value))
+            if max_value is not None:
+                high = int(max_value) if high is None else min(high, int(max_value))
+            total_digits = getattr(self._get_facet(xsd_type, XSD_TOTAL_DIGITS_TAG), 'value', None)
+            if total_digits is not None:
+                low = 1 - 10 ** total_digits if low is None else max(low, 1 - 10 ** total_digits)
+                high = 10 ** total_digits - 1 if high is None else min(high, 10 ** total_digits - 1)
+
+            # Prefer values with few digits, keeping them inside the range
+            if low is None:
+                low = -1000 if high is None or high > 0 else high - 1000
+            if high is None:
+                high = max(low, 0) + 1000
+            center = 0 if low <= 0 <= high else low
+            low, high = max(low, center - 1000), min(high, center + 1000)
+            return unicode_type(rnd.randint(low, high))
+
+        elif builtin_name == 'decimal':
+            fraction_digits = getattr(self._get_facet(xsd_type, XSD_FRACTION_DIGITS_TAG), 'value', 2)
+            total_digits = getattr(self._get_facet(xsd_type, XSD_TOTAL_DIGITS_TAG), 'value', None)
+            low = float(min_value) if min_value is not None else 0.0
+            high = float(max_value) if max_value is not None else low + 10000.0
+            if total_digits is not None:
+                fraction_digits = min(fraction_digits, total_digits)
+                high = min(high, 10.0 ** (total_digits - fraction_digits) - 1)
+            value = Decimal(repr(rnd.uniform(low, high))).quantize(Decimal(10) ** -fraction_digits)
+            return unicode_type(value)
+
+        elif builtin_name in ('float', 'double'):
+            low = float(min_value) if min_value is not None else -1000.0
+            high = float(max_value) if max_value is not None else low + 2000.0
+            return u'%.3f' % rnd.uniform(low, high)
+
+        elif builtin_name == 'boolean':
+            return rnd.choice((u'true', u'false', u'1', u'0'))
+
+        elif builtin_name in ('date', 'dateTime', 'time', 'gYear', 'gYearMonth',
+                              'gMonth', 'gMonthDay', 'gDay'):
+            year, month, day = rnd.randint(1970, 2030), rnd.randint(1, 12), rnd.randint(1, 28)
+            hour, minute, second = rnd.randint(0, 23), rnd.randint(0, 59), rnd.randint(0, 59)
+            return {
+                'date': u'%04d-%02d-%02d' % (year, month, day),
+                'dateTime': u'%04d-%02d-%02dT%02d:%02d:%02d' % (year, month, day, hour, minute, second),
+                'time': u'%02d:%02d:%02d' % (hour, minute, second),
+                'gYear': u'%04d' % year,
+                'gYearMonth': u'%04d-%02d' % (year, month),
+                'gMonth': u'--%02d' % month,
+                'gMonthDay': u'--%02d-%02d' % (month, day),
+                'gDay': u'---%02d' % day,
+            }[builtin_name]
+
+        elif builtin_name == 'duration':
+            return u'P%dY%dM%dDT%dH%dM%dS' % tuple(rnd.randint(0, 12) for _ in range(6))
+
+        elif builtin_name == 'anyURI':
+            return u'http://example.com/%s' % self._generate_word(min_length, max_length)
+
+        elif builtin_name in ('hexBinary', 'base64Binary'):
+            data = bytes(bytearray(rnd.randint(0, 255) for _ in range(rnd.randint(1, 8))))
+            if builtin_name == 'hexBinary':
+                return binascii.hexlify(data).decode('ascii').upper()
+            return base64.b64encode(data).decode('ascii')
+
+        return self._generate_word(min_length, max_length)
+
+    def _generate_word(self, min_length=None, max_length=None):
+        min_length = min_length or 1
+        if max_length is None:
+            max_length = min_length + 9
+        length = self.rnd.randint(min_length, max(min_length, max_length))
+        return u''.join(self.rnd.choice(string.ascii_lowercase) for _ in range(length))
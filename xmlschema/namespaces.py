@@ -13,7 +13,7 @@ This module contains namespace related constants, functions and classes.
 """
 import re
 from collections import Mapping, MutableMapping
-from .compat import urlsplit
+from .compat import urlsplit, intern_string
 
 _RE_MATCH_NAMESPACE = re.compile(r'{([^}]*)}')
 
@@ -43,6 +43,9 @@ HFP_NAMESPACE_PATH = 'http://www.w3.org/2001/XMLSchema-hasFacetAndProperty'
 VC_NAMESPACE_PATH = "http://www.w3.org/2007/XMLSchema-versioning"
 "URI of the XML Schema Versioning namespace (vc)"
 
+XML_CATALOG_NAMESPACE_PATH = "urn:oasis:names:tc:entity:xmlns:xml:catalog"
+"URI of the OASIS XML Catalogs namespace"
+
 
 def get_namespace(name):
     try:
@@ -101,12 +104,15 @@ class NamespaceResourcesMap(URIDict):
 class NamespaceMapper(MutableMapping):
     """
     A class to map/unmap XML namespace URIs to prefixes. An instance
-    memorize the used prefixes.
+    memorize the used prefixes. The mapped names are interned and cached
+    until the namespace map is replaced, so the equal names mapped by an
+    instance are the same string object.
 
     :param namespaces: The reference dictionary for namespace prefix to URI mapping.
     """
     def __init__(self, namespaces=None):
         self._xmlns = {}
+        self._qnames = None, {}
         self.namespaces = namespaces if namespaces is not None else {}
 
     def __getitem__(self, key):
@@ -128,25 +134,37 @@ class NamespaceMapper(MutableMapping):
         self._xmlns.clear()
 
     def map_qname(self, qname):
+        namespaces, qnames = self._qnames
+        if namespaces is not self.namespaces:
+            self._qnames = self.namespaces, {}
+            qnames = self._qnames[1]
+
+        try:
+            mapped_qname, prefix, uri = qnames[qname]
+        except KeyError:
+            mapped_qname, prefix, uri = qnames[qname] = self._map_qname(qname)
+        if prefix is not None:
+            self._xmlns[prefix] = uri
+        return mapped_qname
+
+    def _map_qname(self, qname):
+        # Returns the mapped name and the prefix and URI to register, if any.
         try:
             if qname[0] != '{' or not self.namespaces:
-                return qname
+                return qname, None, None
         except IndexError:
-            return qname
+            return qname, None, None
 
         qname_uri = get_namespace(qname)
         for prefix, uri in self.namespaces.items():
             if uri != qname_uri:
                 continue
             if prefix:
-                self._xmlns[prefix] = uri
-                return qname.replace(u'{%s}' % uri, u'%s:' % prefix)
-            else:
-                if uri:
-                    self._xmlns[prefix] = uri
-                return qname.replace(u'{%s}' % uri, '')
+                return intern_string(qname.replace(u'{%s}' % uri, u'%s:' % prefix)), prefix, uri
+            mapped_qname = intern_string(qname.replace(u'{%s}' % uri, ''))
+            return (mapped_qname, prefix, uri) if uri else (mapped_qname, None, None)
         else:
-            return qname
+            return qname, None, None
 
     def unmap_qname(self, qname):
         try:
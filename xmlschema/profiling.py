@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2018, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module contains a profiler for measuring the decoding and encoding activity
+of the schema components.
+"""
+import json
+import threading
+
+from .compat import perf_counter
+from .exceptions import XMLSchemaValueError
+from .validators.exceptions import XMLSchemaValidationError
+from .validators.xsdbase import ValidatorMixin, NestedCall
+from .validators.attributes import XsdAttributeGroup
+from .validators.simple_types import XsdSimpleType
+
+PROFILED_METHODS = ('iter_decode', 'iter_encode', 'iter_validate', '_iter_decode', '_iter_validate')
+
+SORT_KEYS = ('time', 'own_time', 'calls', 'errors')
+
+
+def is_mixin_method(cls, name):
+    """Returns `True` if the class inherits the method from :class:`ValidatorMixin`."""
+    for base in cls.__mro__:
+        if name in base.__dict__:
+            return base is ValidatorMixin
+    return False
+
+
+def is_profiled_method(cls, name):
+    """
+    Returns `True` if the method of the class has to be profiled. The default methods
+    of :class:`ValidatorMixin` and the methods that only run the step generators of
+    the class (eg. `iter_decode` for `_iter_decode`) are skipped, because they delegate
+    to the other profiled methods of the component.
+    """
+    return hasattr(cls, name) and not is_mixin_method(cls, name) and not hasattr(cls, '_' + name)
+
+
+class ComponentStats(object):
+    """
+    Counters collected for a single component or facet.
+
+    :ivar component: the profiled XSD component, facet or validator function.
+    :ivar calls: number of calls of the component's decoding/encoding methods.
+    :ivar time: cumulative time in seconds, including the time spent in the inner components.
+    :ivar own_time: time in seconds spent in the component, excluding the inner components.
+    :ivar errors: number of validation errors generated by the component.
+    """
+    __slots__ = ('component', 'calls', 'time', 'own_time', 'errors')
+
+    def __init__(self, component):
+        self.component = component
+        self.calls = 0
+        self.time = 0.0
+        self.own_time = 0.0
+        self.errors = 0
+
+    def __repr__(self):
+        return u'%s(%r, calls=%d, time=%f, errors=%d)' % (
+            self.__class__.__name__, self.component, self.calls, self.time, self.errors
+        )
+
+    @property
+    def name(self):
+        try:
+            return repr(self.component)
+        except Exception:
+            return getattr(self.component, '__name__', str(type(self.component)))
+
+    def as_dict(self):
+        return {
+            'component': self.name,
+            'kind': self.component.__class__.__name__,
+            'calls': self.calls,
+            'time': self.time,
+            'own_time': self.own_time,
+            'errors': self.errors,
+        }
+
+
+class ProfiledFacet(object):
+    """
+    A callable that replaces a facet or a validator function in the validators of
+    a simple type during the profiling. Other attributes are read from the facet.
+    """
+    def __init__(self, facet, stats, profiler):
+        self.facet = facet
+        self.stats = stats
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.facet, name)
+
+    def __len__(self):
+        return len(self.facet)
+
+    def __repr__(self):
+        return repr(self.facet)
+
+    def __call__(self, *args, **kwargs):
+        stats = self.stats
+        stack = self.profiler.stack
+        stats.calls += 1
+        stack.append(0.0)
+        start = perf_counter()
+        try:
+            errors = list(self.facet(*args, **kwargs))
+        finally:
+            self.profiler.account(stats, perf_counter() - start)
+        stats.errors += len(errors)
+        return errors
+
+
+class XMLSchemaProfiler(object):
+    """
+    Collects call counts, timings and error counts for the components of a schema
+    during decoding, encoding and validation. The profiling of the elements, the model
+    groups, the types and the attributes is done replacing the methods `iter_decode`,
+    `iter_encode` and `iter_validate` of their classes, or the step generators `_iter_decode`
+    and `_iter_validate` where defined, with instrumented wrappers, the facets are
+    replaced in the validators of simple types. During the profiling the attribute
+    groups of the schema call the methods of the XSD attributes instead of their inlined
+    decoding, so the attributes are counted. All the replacements are removed when the profiling
+    is stopped, so there is no overhead outside a profiling session.
+
+    The built-in types are shared between schemas of the same XSD version, so their
+    counters includes the activity of other schemas in the profiling interval.
+    Only one profiler at a time can be active.
+
+    :param schema: the schema instance to profile.
+    """
+    active = None
+    _lock = threading.Lock()
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._stats = {}
+        self._local = threading.local()
+        self._components = {}
+        self._instrumented = []
+        self._patched_classes = []
+        self._attribute_groups = []
+
+    def __repr__(self):
+        return u'%s(schema=%r, active=%r)' % (self.__class__.__name__, self.schema, self.is_active())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def is_active(self):
+        return XMLSchemaProfiler.active is self
+
+    @property
+    def stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def account(self, stats, elapsed):
+        stack = self.stack
+        stats.time += elapsed
+        stats.own_time += elapsed - stack.pop()
+        if stack:
+            stack[-1] += elapsed
+
+    def get_stats(self, component):
+        try:
+            return self._stats[id(component)]
+        except KeyError:
+            stats = self._stats[id(component)] = ComponentStats(component)
+            return stats
+
+    def iter_components(self):
+        """Iterates over the components of the schema's global maps, including the base maps."""
+        maps = self.schema.maps
+        while maps is not None:
+            for xsd_global in maps.iter_globals():
+                for obj in xsd_global.iter_components():
+                    yield obj
+            maps = getattr(maps, 'base', None)
+
+    def start(self):
+        """Installs the instrumentation on the schema components."""
+        with self._lock:
+            if XMLSchemaProfiler.active is not None:
+                raise XMLSchemaValueError("another profiler is already active: %r" % XMLSchemaProfiler.active)
+            XMLSchemaProfiler.active = self
+
+        try:
+            seen = set()
+            for component in self.iter_components():
+                if id(component) in seen:
+                    continue
+                seen.add(id(component))
+                if isinstance(component, XsdAttributeGroup) and component.inline_attributes:
+                    # The attributes are decoded by their methods, so they are profiled too
+                    self._attribute_groups.append(component)
+                    component.inline_attributes = False
+                elif isinstance(component, ValidatorMixin):
+                    self._instrument(component)
+        except Exception:
+            self.stop()
+            raise
+
+    def _instrument(self, component):
+        self._components[id(component)] = self.get_stats(component)
+        if isinstance(component, XsdSimpleType):
+            self._instrumented.append((component, (component.validators, component.patterns)))
+            component.validators = [
+                ProfiledFacet(v, self.get_stats(v), self) for v in component.validators
+            ]
+            if component.patterns is not None:
+                component.patterns = ProfiledFacet(
+                    component.patterns, self.get_stats(component.patterns), self
+                )
+
+        cls = component.__class__
+        if all(cls is not x[0] for x in self._patched_classes):
+            # The components are slotted, so the methods are replaced in the class.
+            names = [name for name in PROFILED_METHODS if is_profiled_method(cls, name)]
+            self._patched_classes.append((cls, [(name, cls.__dict__.get(name)) for name in names]))
+            for name in names:
+                setattr(cls, name, self._profile_method(cls, getattr(cls, name)))
+
+    def stop(self):
+        """Removes the instrumentation from the schema components."""
+        if not self.is_active():
+            return
+        try:
+            while self._patched_classes:
+                cls, methods = self._patched_classes.pop()
+                for name, method in methods:
+                    if method is None:
+                        delattr(cls, name)
+                    else:
+                        setattr(cls, name, method)
+            while self._instrumented:
+                component, saved = self._instrumented.pop()
+                component.validators, component.patterns = saved
+            while self._attribute_groups:
+                self._attribute_groups.pop().inline_attributes = True
+            self._components.clear()
+        finally:
+            XMLSchemaProfiler.active = None
+
+    def reset(self):
+        """Clears the collected counters."""
+        for stats in self._stats.values():
+            stats.calls = stats.errors = 0
+            stats.time = stats.own_time = 0.0
+
+    def _profile_method(self, cls, method):
+        components = self._components
+
+        def profiled_method(component, *args, **kwargs):
+            stats = components.get(id(component))
+            if stats is None or component.__class__ is not cls:
+                # Not profiled component or a call from a subclass method
+                return method(component, *args, **kwargs)
+            stats.calls += 1
+            return self._iter_profiled(method(component, *args, **kwargs), stats)
+        return profiled_method
+
+    def _iter_profiled(self, generator, stats):
+        component = stats.component
+        stack = self.stack
+        value = None
+        while True:
+            stack.append(0.0)
+            start = perf_counter()
+            try:
+                result = generator.send(value)
+                while isinstance(result, NestedCall):
+                    # The time of a nested call is included in the time of the component
+                    try:
+                        value = yield result
+                    except GeneratorExit:
+                        self.account(stats, perf_counter() - start)
+                        raise
+                    result = generator.send(value)
+            except StopIteration:
+                self.account(stats, perf_counter() - start)
+                return
+            except XMLSchemaValidationError as err:
+                # Strict validation mode
+                self.account(stats, perf_counter() - start)
+                if err.validator is component:
+                    stats.errors += 1
+                raise
+            except Exception:
+                self.account(stats, perf_counter() - start)
+                raise
+
+            self.account(stats, perf_counter() - start)
+            if isinstance(result, XMLSchemaValidationError) and result.validator is component:
+                stats.errors += 1
+            value = yield result
+
+    @property
+    def stats(self):
+        """The list of the counters of the components that have been called at least once."""
+        return [s for s in self._stats.values() if s.calls]
+
+    def get_sorted_stats(self, sort_by='time', limit=None):
+        """
+        Returns the counters sorted in descending order.
+
+        :param sort_by: the sort key, can be 'time', 'own_time', 'calls' or 'errors'.
+        :param limit: an optional maximum number of items to return.
+        """
+        if sort_by not in SORT_KEYS:
+            raise XMLSchemaValueError("'sort_by' argument must be one of %r." % (SORT_KEYS,))
+        stats = sorted(self.stats, key=lambda x: getattr(x, sort_by), reverse=True)
+        return stats if limit is None else stats[:limit]
+
+    def report(self, sort_by='time', limit=None):
+        """
+        Returns the profiling results as a text table.
+
+        :param sort_by: the sort key, can be 'time', 'own_time', 'calls' or 'errors'.
+        :param limit: an optional maximum number of rows.
+        """
+        lines = ['%10s %8s %12s %12s  %s' % ('calls', 'errors', 'time', 'own_time', 'component')]
+        for stats in self.get_sorted_stats(sort_by, limit):
+            lines.append('%10d %8d %12.6f %12.6f  %s' % (
+                stats.calls, stats.errors, stats.time, stats.own_time, stats.name
+            ))
+        return '\n'.join(lines)
+
+    def to_json(self, sort_by='time', limit=None, **kwargs):
+        """
+        Returns the profiling results as a JSON array of objects.
+
+        :param sort_by: the sort key, can be 'time', 'own_time', 'calls' or 'errors'.
+        :param limit: an optional maximum number of items.
+        :param kwargs: other keyword arguments for `json.dumps()`.
+        """
+        return json.dumps([s.as_dict() for s in self.get_sorted_stats(sort_by, limit)], **kwargs)
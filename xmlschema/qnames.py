@@ -11,7 +11,9 @@
 """
 This module contains functions for manipulating fully qualified names and XML Schema tags.
 """
-from .namespaces import get_namespace, XML_NAMESPACE_PATH, XSD_NAMESPACE_PATH, XSI_NAMESPACE_PATH
+from .namespaces import (
+    get_namespace, XML_NAMESPACE_PATH, XSD_NAMESPACE_PATH, XSI_NAMESPACE_PATH, XML_CATALOG_NAMESPACE_PATH
+)
 from .exceptions import XMLSchemaTypeError, XMLSchemaValueError
 
 
@@ -208,6 +210,7 @@ XSD_ATTRIBUTE_TAG = xsd_qname('attribute')
 XSD_ELEMENT_TAG = xsd_qname('element')
 XSD_NOTATION_TAG = xsd_qname('notation')
 XSD_NOTATION_TYPE = xsd_qname('NOTATION')
+XSD_QNAME_TYPE = xsd_qname('QName')
 
 # Grouping
 XSD_GROUP_TAG = xsd_qname('group')
@@ -278,3 +281,11 @@ XSI_NIL = get_qname(XSI_NAMESPACE_PATH, 'nil')
 XSI_TYPE = get_qname(XSI_NAMESPACE_PATH, 'type')
 XSI_SCHEMA_LOCATION = get_qname(XSI_NAMESPACE_PATH, 'schemaLocation')
 XSI_NONS_SCHEMA_LOCATION = get_qname(XSI_NAMESPACE_PATH, 'noNamespaceSchemaLocation')
+
+#
+# OASIS XML Catalogs elements
+XML_CATALOG_URI_TAG = get_qname(XML_CATALOG_NAMESPACE_PATH, 'uri')
+XML_CATALOG_SYSTEM_TAG = get_qname(XML_CATALOG_NAMESPACE_PATH, 'system')
+XML_CATALOG_REWRITE_URI_TAG = get_qname(XML_CATALOG_NAMESPACE_PATH, 'rewriteURI')
+XML_CATALOG_REWRITE_SYSTEM_TAG = get_qname(XML_CATALOG_NAMESPACE_PATH, 'rewriteSystem')
+XML_CATALOG_NEXT_CATALOG_TAG = get_qname(XML_CATALOG_NAMESPACE_PATH, 'nextCatalog')
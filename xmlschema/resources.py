@@ -9,14 +9,21 @@
 # @author Davide Brunato <brunato@sissa.it>
 #
 import os.path
+import hashlib
+import json
+import threading
 
 from .compat import (
-    PY3, StringIO, unicode_type, urlopen, urlsplit, urljoin, uses_relative, urlunsplit, pathname2url, URLError
+    PY3, StringIO, unicode_type, urlopen, urlsplit, urljoin, uses_relative, urlunsplit, pathname2url, URLError,
+    HTTPConnection, HTTPSConnection, HTTPException
 )
 from .etree import etree_iterparse, etree_fromstring, etree_parse_error, etree_iselement
 from .exceptions import XMLSchemaTypeError, XMLSchemaValueError, XMLSchemaURLError, XMLSchemaOSError
 from .namespaces import get_namespace
-from .qnames import XSI_SCHEMA_LOCATION, XSI_NONS_SCHEMA_LOCATION
+from .qnames import (
+    XSI_SCHEMA_LOCATION, XSI_NONS_SCHEMA_LOCATION, XML_CATALOG_URI_TAG, XML_CATALOG_SYSTEM_TAG,
+    XML_CATALOG_REWRITE_URI_TAG, XML_CATALOG_REWRITE_SYSTEM_TAG, XML_CATALOG_NEXT_CATALOG_TAG, local_name
+)
 
 
 def iter_schema_location_hints(elem, namespace=None):
@@ -46,7 +53,7 @@ def iter_schema_location_hints(elem, namespace=None):
             pass
 
 
-def load_xml_resource(source, element_only=True):
+def load_xml_resource(source, element_only=True, resolver=None):
     """
     Examines the source and returns the root Element, the XML text and an url
     if available. Returns only the root Element if the optional argument 
@@ -55,6 +62,7 @@ def load_xml_resource(source, element_only=True):
 
     :param source: an URL, a filename path or a file-like object.
     :param element_only: If True the function returns only the root Element of the tree.
+    :param resolver: an optional :class:`XMLResourceResolver` instance for fetching URLs.
     :return: a tuple with three items (root Element, XML text and XML URL) or
     only the root Element if 'element_only' argument is True.
     """
@@ -68,7 +76,7 @@ def load_xml_resource(source, element_only=True):
         else:
             return xml_root if element_only else (xml_root, source, None)
 
-        xml_data, xml_url = load_resource(source)
+        xml_data, xml_url = load_resource(source, resolver)
     else:
         try:
             # source is a file-like object containing XML data
@@ -92,25 +100,29 @@ def load_xml_resource(source, element_only=True):
         return xml_root if element_only else (xml_root, xml_data, xml_url)
 
 
-def load_resource(url):
+def load_resource(url, resolver=None):
     """
     Load resource from an URL, decoding into a UTF-8 string.
 
     :param url: Resource URLs.
+    :param resolver: an optional :class:`XMLResourceResolver` instance for fetching the URL.
     :return: Resource as unicode string ad the loaded URL.
     """
-    msg = "cannot load resource from %r: %s"
-    try:
-        source = urlopen(normalize_url(url))
-    except URLError as err:
-        raise XMLSchemaURLError(reason=msg % (url, err.reason))
+    if resolver is not None:
+        data = resolver.fetch(normalize_url(url))
     else:
+        msg = "cannot load resource from %r: %s"
         try:
-            data = source.read()
-        except (OSError, IOError) as err:
-            raise XMLSchemaOSError(msg % (url, err))
-        finally:
-            source.close()
+            source = urlopen(normalize_url(url))
+        except URLError as err:
+            raise XMLSchemaURLError(reason=msg % (url, err.reason))
+        else:
+            try:
+                data = source.read()
+            except (OSError, IOError) as err:
+                raise XMLSchemaOSError(msg % (url, err))
+            finally:
+                source.close()
 
     if PY3:
         try:
@@ -159,19 +171,36 @@ def normalize_url(url, base_url=None):
                 return urljoin(u'file:', url_parts.geturl())
 
 
-def fetch_resource(location, base_url=None):
+def fetch_resource(location, base_url=None, resolver=None):
     """
     Fetch a resource trying to open it. If the resource is accessible
     returns the URL, otherwise raises an error (XMLSchemaURLError).
 
     :param location: An URL or a file path.
     :param base_url: Reference path for completing local URLs.
+    :param resolver: An optional :class:`XMLResourceResolver` instance. If provided \
+    the resource is fetched and cached by the resolver, so a following load of the \
+    URL doesn't access the resource again.
     :return: A normalized URL.
     """
     if not location:
         raise XMLSchemaValueError("'location' argument must contains a not empty string.")
 
     url = normalize_url(location, base_url)
+    if resolver is not None:
+        try:
+            resolver.fetch(url)
+        except XMLSchemaURLError as err:
+            # fallback joining the path without a base URL
+            url = normalize_url(location)
+            try:
+                resolver.fetch(url)
+            except XMLSchemaURLError:
+                raise XMLSchemaURLError(
+                    reason="cannot access resource from %r: %s" % (location, err.reason)
+                )
+        return url
+
     try:
         resource = urlopen(url)
     except URLError as err:
@@ -191,6 +220,325 @@ def fetch_resource(location, base_url=None):
         return url
 
 
+class XMLResourceResolver(object):
+    """
+    A resolver for fetching XML resources. Each resource is fetched only once and
+    then served from an in-memory cache. HTTP connections are kept alive and reused
+    for following requests to the same host. If a cache directory is provided the
+    HTTP responses with an *ETag* or a *Last-Modified* header are saved on disk,
+    and revalidated with a conditional request at the next fetch of the URL.
+
+    URLs and namespaces can be mapped to other locations, usually local files, with
+    a catalog. In offline mode the resolver never accesses the network: only the
+    resources with a *file* URL, eventually mapped by the catalog, can be fetched.
+
+    A custom resolver can be defined with a subclass that overrides the *fetch* method,
+    that takes a normalized URL and returns the resource content as bytes, raising an
+    :exc:`XMLSchemaURLError` if the resource is not accessible.
+
+    :param cache_dir: an optional directory path for the on-disk cache of HTTP responses.
+    :param timeout: an optional timeout in seconds for HTTP connections.
+    :param max_redirects: the maximum number of HTTP redirections to follow.
+    :param catalog: an optional :class:`XMLCatalog` instance, or a dictionary from \
+    URLs and namespace URIs to locations, or the path of an XML catalog file.
+    :param offline: if `True` the resolver doesn't access the network.
+    """
+    def __init__(self, cache_dir=None, timeout=None, max_redirects=5, catalog=None, offline=False):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        if catalog is None or isinstance(catalog, XMLCatalog):
+            self.catalog = catalog
+        else:
+            self.catalog = XMLCatalog(catalog)
+        self.offline = offline
+        self._cache = {}
+        self._pending = {}
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return u'%s(cache_dir=%r)' % (self.__class__.__name__, self.cache_dir)
+
+    def fetch(self, url):
+        """
+        Returns the content of a resource as bytes. Concurrent requests of
+        the same URL wait for the first one, so the resource is fetched once.
+
+        :param url: a normalized URL.
+        """
+        while True:
+            with self._lock:
+                try:
+                    return self._cache[url]
+                except KeyError:
+                    event = self._pending.get(url)
+                    if event is None:
+                        event = self._pending[url] = threading.Event()
+                        break
+            event.wait()
+
+        try:
+            location = self.resolve(url)
+            scheme = urlsplit(location).scheme
+            if self.offline and scheme != 'file':
+                raise XMLSchemaURLError(
+                    reason="cannot access resource from %r: the resolver is offline" % location
+                )
+            elif scheme in ('http', 'https'):
+                data = self._http_fetch(location)
+            else:
+                data = self._fetch(location)
+            with self._lock:
+                self._cache[url] = data
+            return data
+        finally:
+            with self._lock:
+                del self._pending[url]
+            event.set()
+
+    def resolve(self, uri):
+        """
+        Returns the location mapped by the catalog for an URL or a namespace URI.
+        If the URI is not mapped returns it unchanged.
+
+        :param uri: an URL or a namespace URI.
+        """
+        if self.catalog is None:
+            return uri
+        return self.catalog.resolve(uri) or uri
+
+    def clear(self):
+        """Clears the in-memory cache of the resources."""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        """Closes the HTTP connections kept alive by the resolver."""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for pool in connections.values():
+            for connection in pool:
+                connection.close()
+
+    @staticmethod
+    def _fetch(url):
+        msg = "cannot access resource from %r: %s"
+        try:
+            resource = urlopen(url)
+        except URLError as err:
+            raise XMLSchemaURLError(reason=msg % (url, err.reason))
+        else:
+            try:
+                return resource.read()
+            except (OSError, IOError) as err:
+                raise XMLSchemaOSError(msg % (url, err))
+            finally:
+                resource.close()
+
+    def _http_fetch(self, url, redirects=0):
+        metadata = self._load_metadata(url)
+        headers = {}
+        if metadata is not None:
+            if metadata.get('etag'):
+                headers['If-None-Match'] = metadata['etag']
+            if metadata.get('last-modified'):
+                headers['If-Modified-Since'] = metadata['last-modified']
+
+        status, reason, response_headers, data = self._request(url, headers)
+        if status == 200:
+            self._save_response(url, response_headers, data)
+            return data
+        elif status == 304 and metadata is not None:
+            try:
+                with open(self._get_cache_path(url) + '.data', 'rb') as fp:
+                    return fp.read()
+            except (OSError, IOError) as err:
+                raise XMLSchemaOSError("cannot load resource from %r: %s" % (url, err))
+        elif status in (301, 302, 303, 307, 308) and 'location' in response_headers:
+            if redirects >= self.max_redirects:
+                raise XMLSchemaURLError(reason="cannot access resource from %r: too many redirects" % url)
+            return self._http_fetch(urljoin(url, response_headers['location']), redirects + 1)
+        else:
+            raise XMLSchemaURLError(
+                reason="cannot access resource from %r: HTTP Error %d: %s" % (url, status, reason)
+            )
+
+    def _request(self, url, headers):
+        url_parts = urlsplit(url)
+        key = url_parts.scheme, url_parts.netloc
+        path = url_parts.path or '/'
+        if url_parts.query:
+            path += '?' + url_parts.query
+
+        while True:
+            with self._lock:
+                try:
+                    connection, reused = self._connections[key].pop(), True
+                except (KeyError, IndexError):
+                    connection, reused = None, False
+
+            if connection is None:
+                connection_class = HTTPSConnection if key[0] == 'https' else HTTPConnection
+                if self.timeout is None:
+                    connection = connection_class(key[1])
+                else:
+                    connection = connection_class(key[1], timeout=self.timeout)
+
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (HTTPException, OSError, IOError) as err:
+                connection.close()
+                if reused:
+                    continue  # The server has closed an idle connection, retry with another one
+                raise XMLSchemaURLError(reason="cannot access resource from %r: %s" % (url, err))
+
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    self._connections.setdefault(key, []).append(connection)
+
+            response_headers = dict((k.lower(), v) for k, v in response.getheaders())
+            return response.status, response.reason, response_headers, data
+
+    def _get_cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _load_metadata(self, url):
+        if self.cache_dir is None:
+            return
+        cache_path = self._get_cache_path(url)
+        if not os.path.isfile(cache_path + '.data'):
+            return
+        try:
+            with open(cache_path + '.json') as fp:
+                return json.load(fp)
+        except (OSError, IOError, ValueError):
+            return
+
+    def _save_response(self, url, headers, data):
+        if self.cache_dir is None or ('etag' not in headers and 'last-modified' not in headers):
+            return
+
+        metadata = {'url': url}
+        for name in ('etag', 'last-modified'):
+            if name in headers:
+                metadata[name] = headers[name]
+
+        cache_path = self._get_cache_path(url)
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(cache_path + '.data', 'wb') as fp:
+                fp.write(data)
+            with open(cache_path + '.json', 'w') as fp:
+                json.dump(metadata, fp)
+        except (OSError, IOError):
+            pass  # The on-disk cache is an optimization, an unwritable directory is not an error
+
+
+class XMLCatalog(object):
+    """
+    A catalog for mapping URIs, like schema locations or namespace names, to other
+    locations. Entries map a single URI, rewrite rules replace an URI prefix. The
+    entries can be loaded from OASIS XML catalog files, using the *uri*, *system*,
+    *rewriteURI*, *rewriteSystem* and *nextCatalog* elements.
+
+    :param source: an optional dictionary from URIs to locations, or the path of \
+    an XML catalog file, or a list of paths.
+    """
+    def __init__(self, source=None):
+        self.entries = {}
+        self.rewrites = []
+        if source is None:
+            return
+        elif isinstance(source, dict):
+            for uri, location in source.items():
+                self.add(uri, location)
+        elif isinstance(source, (str, bytes, unicode_type)):
+            self.load(source)
+        else:
+            for path in source:
+                self.load(path)
+
+    def __repr__(self):
+        return u'%s(entries=%d, rewrites=%d)' % (self.__class__.__name__, len(self.entries), len(self.rewrites))
+
+    def add(self, uri, location):
+        """Maps an URI to a location. Locations can be file paths or URLs."""
+        self.entries[uri] = normalize_url(location)
+
+    def add_rewrite(self, prefix, location_prefix):
+        """Adds a rule that replaces an URI prefix with a location prefix."""
+        url_prefix = normalize_url(location_prefix)
+        if (prefix.endswith('/') or location_prefix.endswith('/')) and not url_prefix.endswith('/'):
+            url_prefix += '/'
+        self.rewrites.append((prefix, url_prefix))
+        self.rewrites.sort(key=lambda x: len(x[0]), reverse=True)
+
+    def load(self, path):
+        """
+        Loads entries from an OASIS XML catalog file. Relative locations are
+        referred to the directory of the catalog file. The catalogs chained with
+        *nextCatalog* are loaded only once, so loops of catalogs are admitted.
+
+        :param path: the file path of the catalog.
+        :raises: :exc:`XMLSchemaValueError` if an entry misses a required attribute.
+        """
+        self._load(path, set())
+
+    def _load(self, path, loaded):
+        path = os.path.abspath(path)
+        if path in loaded:
+            return
+        loaded.add(path)
+
+        root = load_xml_resource(path)
+        base_dir = os.path.dirname(path)
+
+        def get_attribute(elem, name):
+            try:
+                return elem.attrib[name]
+            except KeyError:
+                raise XMLSchemaValueError(
+                    "missing %r attribute in %r entry of catalog %r." % (name, local_name(elem.tag), path)
+                )
+
+        for elem in root.iter():
+            if elem.tag == XML_CATALOG_URI_TAG:
+                self.add(get_attribute(elem, 'name'), normalize_url(get_attribute(elem, 'uri'), base_dir))
+            elif elem.tag == XML_CATALOG_SYSTEM_TAG:
+                self.add(get_attribute(elem, 'systemId'), normalize_url(get_attribute(elem, 'uri'), base_dir))
+            elif elem.tag in (XML_CATALOG_REWRITE_URI_TAG, XML_CATALOG_REWRITE_SYSTEM_TAG):
+                if elem.tag == XML_CATALOG_REWRITE_URI_TAG:
+                    prefix = get_attribute(elem, 'uriStartString')
+                else:
+                    prefix = get_attribute(elem, 'systemIdStartString')
+                location_prefix = get_attribute(elem, 'rewritePrefix')
+                url_prefix = normalize_url(location_prefix, base_dir)
+                if location_prefix.endswith('/') and not url_prefix.endswith('/'):
+                    url_prefix += '/'
+                self.add_rewrite(prefix, url_prefix)
+            elif elem.tag == XML_CATALOG_NEXT_CATALOG_TAG:
+                self._load(os.path.join(base_dir, get_attribute(elem, 'catalog')), loaded)
+
+    def resolve(self, uri):
+        """
+        Returns the location mapped to an URI, `None` if the URI is not mapped.
+        Entries have precedence over rewrite rules, and the longest matching
+        prefix is used.
+        """
+        try:
+            return self.entries[uri]
+        except KeyError:
+            for prefix, location_prefix in self.rewrites:
+                if uri.startswith(prefix):
+                    return location_prefix + uri[len(prefix):]
+
+
 def get_xml_root(source):
     """
     Returns the root Element and an URL, if available.
@@ -28,11 +28,12 @@ if __name__ == '__main__':
     from xmlschema.tests import tests_factory, print_test_header
     from xmlschema.tests.test_regex import TestCodePoints, TestUnicodeSubset, TestUnicodeCategories
     from xmlschema.tests.test_xpath import XsdXPathTest
-    from xmlschema.tests.test_resources import TestResources
+    from xmlschema.tests.test_resources import TestResources, TestResourceResolver
     from xmlschema.tests.test_meta import TestBuiltinTypes, TestGlobalMaps
-    from xmlschema.tests.test_schemas import make_test_schema_function
+    from xmlschema.tests.test_schemas import make_test_schema_function, TestSchemaBuilding
     from xmlschema.tests.test_decoding import make_test_decoding_function, TestDecoding
     from xmlschema.tests.test_validation import TestValidation
+    from xmlschema.tests.test_generators import TestInstanceGenerator
 
     print_test_header()
 
@@ -32,7 +32,10 @@ except ImportError:
     sys.path.insert(0, pkg_base_dir)
     import xmlschema
 
+from xmlschema.compat import PY3
+from xmlschema.exceptions import XMLSchemaValueError
 from xmlschema.qnames import local_name
+from xmlschema.validators.simple_types import LexicalCache
 
 
 _VEHICLES_DICT = {
@@ -409,6 +412,21 @@ class TestDecoding(unittest.TestCase):
             for e1, e2 in zip(elem.iter(), xt.getroot().iter())
         ]))
 
+    def test_namespace_registration(self):
+        filename = os.path.join(self.test_dir, 'cases/examples/collection/collection.xml')
+        self.assertEqual(_ElementTree._namespace_map.get('http://example.com/ns/collection'), 'col')
+
+        # Decoding doesn't touch the global namespace map of ElementTree
+        _ElementTree.register_namespace('other', 'http://example.com/ns/collection')
+        try:
+            xd = self.col_schema.to_dict(filename, dict_class=OrderedDict)
+            self.assertEqual(_ElementTree._namespace_map['http://example.com/ns/collection'], 'other')
+        finally:
+            _ElementTree.register_namespace('col', 'http://example.com/ns/collection')
+
+        elem = self.col_schema.encode(xd, path='./col:collection', namespaces=self.namespaces)
+        self.assertTrue(_ElementTree.tostring(elem).startswith(b'<col:collection'))
+
     def test_dict_granularity(self):
         """Based on Issue #22, test to make sure an xsd indicating list with
         dictionaries, returns just that even when it has a single dict. """
@@ -437,6 +455,218 @@ class TestDecoding(unittest.TestCase):
             'Value': {'Integer': 0}
         })
 
+    def test_attributes_decoding(self):
+        schema = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+                xmlns:tns="http://example.com/ns" targetNamespace="http://example.com/ns">
+              <xs:element name="item">
+                <xs:complexType>
+                  <xs:attribute name="id" type="xs:int" use="required"/>
+                  <xs:attribute name="kind" type="xs:token" fixed="A"/>
+                  <xs:attribute name="size" type="xs:int" default="3"/>
+                  <xs:anyAttribute namespace="##other" processContents="lax"/>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        namespaces = 'xmlns:tns="http://example.com/ns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ' \
+                     'xmlns:xml="http://www.w3.org/XML/1998/namespace"'
+        xml_data = '<tns:item %s id="1" kind="A" size="" tns:id="2" xml:lang="en"/>' % namespaces
+        self.assertEqual(schema.to_dict(xml_data),
+                         {'@id': 1, '@kind': 'A', '@size': 3, '@tns:id': 2, '@xml:lang': 'en'})
+        self.assertEqual(schema.to_dict(xml_data), schema.to_dict(xml_data))  # Reuses the decode plan
+
+        xml_data = '<tns:item %s kind="B" other="1" xsi:unknown="2"/>' % namespaces
+        reasons = [e.reason for e in schema.iter_errors(xml_data)]
+        self.assertEqual(len(reasons), 4)
+        self.assertIn("value differs from fixed value", reasons)
+        self.assertIn("attribute 'other' not allowed.", reasons)
+        self.assertTrue(reasons[-1].startswith("missing required attributes: "))
+        self.assertIn("'{http://www.w3.org/2001/XMLSchema-instance}unknown' is not an attribute "
+                      "of the XSI namespace.", reasons)
+        results = list(schema.iter_decode(xml_data))
+        self.assertEqual([e.reason for e in results[:-1]], reasons)
+        self.assertEqual(results[-1], {'@kind': 'B'})
+
+    def test_decode_cache(self):
+        schema = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:simpleType name="codeType">
+                <xs:restriction base="xs:token">
+                  <xs:enumeration value="A"/>
+                  <xs:enumeration value="B"/>
+                  <xs:enumeration value="C"/>
+                </xs:restriction>
+              </xs:simpleType>
+              <xs:simpleType name="codesType">
+                <xs:list itemType="codeType"/>
+              </xs:simpleType>
+              <xs:simpleType name="priceType">
+                <xs:restriction base="xs:decimal"/>
+              </xs:simpleType>
+              <xs:simpleType name="refType">
+                <xs:restriction base="xs:QName"/>
+              </xs:simpleType>
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:element name="code" type="codeType" maxOccurs="unbounded"/>
+                    <xs:element name="codes" type="codesType" maxOccurs="unbounded"/>
+                    <xs:element name="price" type="priceType" minOccurs="0"/>
+                  </xs:sequence>
+                  <xs:attribute name="ref" type="refType"/>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        xml_data = '<root ref="x"><code>A</code><code> B </code><code>A</code><code>D</code><code>D</code>' \
+                   '<codes>A B</codes><codes>A B</codes><price>1.5</price></root>'
+        expected = list(schema.iter_decode(xml_data))
+        schema.set_decode_cache(maxsize=2)
+        try:
+            caches = {xsd_type.name: cache for xsd_type, cache in schema.iter_decode_caches()}
+            self.assertEqual(sorted(caches), ['codeType', 'codesType', 'priceType'])
+            self.assertIsNone(schema.types['refType'].decode_cache)
+
+            results = list(schema.iter_decode(xml_data))
+            self.assertEqual([r.reason if isinstance(r, Exception) else r for r in results],
+                             [r.reason if isinstance(r, Exception) else r for r in expected])
+            self.assertEqual(len([r for r in results if isinstance(r, Exception)]), 2)  # Errors aren't cached
+            self.assertEqual((caches['codeType'].hits, caches['codeType'].misses), (2, 5))
+            self.assertEqual(len(caches['codeType']), 2)
+            self.assertEqual(caches['codeType'].hit_rate, 2.0 / 7)
+            self.assertEqual(caches['codesType'].hits, 1)
+
+            data = results[-1]
+            data['codes'][0].append('C')
+            self.assertEqual(data['codes'], [['A', 'B', 'C'], ['A', 'B']])  # Lists aren't shared
+            self.assertEqual(schema.to_dict(xml_data, validation='skip')['codes'], [['A', 'B'], ['A', 'B']])
+
+            self.assertEqual(schema.to_dict(xml_data, validation='skip', decimal_type=float)['price'], 1.5)
+            self.assertEqual(caches['priceType'].hits, 1)
+        finally:
+            schema.set_decode_cache(None)
+        self.assertEqual(list(schema.iter_decode_caches()), [])
+        self.assertRaises(XMLSchemaValueError, LexicalCache, 0)
+
+    def test_decode_cache_of_attributes(self):
+        # The attributes decoding stops at the decoded value, that has to be cached anyway.
+        schema = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:simpleType name="codeType">
+                <xs:restriction base="xs:token">
+                  <xs:enumeration value="A"/>
+                  <xs:enumeration value="B"/>
+                </xs:restriction>
+              </xs:simpleType>
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:element name="item" maxOccurs="unbounded">
+                      <xs:complexType>
+                        <xs:simpleContent>
+                          <xs:extension base="codeType">
+                            <xs:attribute name="code" type="codeType"/>
+                          </xs:extension>
+                        </xs:simpleContent>
+                      </xs:complexType>
+                    </xs:element>
+                  </xs:sequence>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        schema.set_decode_cache(maxsize=100)
+        xml_data = '<root>%s</root>' % ('<item code="A">B</item>' * 50)
+        self.assertEqual(schema.to_dict(xml_data)['item'][0], {'@code': 'A', '$': 'B'})
+        cache = schema.types['codeType'].decode_cache
+        self.assertEqual((len(cache), cache.hits, cache.misses), (2, 98, 2))
+
+        schema.to_dict('<root><item code="A">C</item></root>', validation='lax')
+        self.assertEqual((len(cache), cache.hits, cache.misses), (2, 99, 3))
+
+    def test_interned_strings(self):
+        schema = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:tns="http://example.com/ns"
+                targetNamespace="http://example.com/ns" elementFormDefault="qualified">
+              <xs:simpleType name="colorType">
+                <xs:restriction base="xs:string">
+                  <xs:enumeration value="red"/>
+                  <xs:enumeration value="green"/>
+                </xs:restriction>
+              </xs:simpleType>
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:element name="item" maxOccurs="unbounded">
+                      <xs:complexType>
+                        <xs:simpleContent>
+                          <xs:extension base="tns:colorType">
+                            <xs:attribute name="label" type="xs:token"/>
+                          </xs:extension>
+                        </xs:simpleContent>
+                      </xs:complexType>
+                    </xs:element>
+                  </xs:sequence>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        xsd_element = schema.elements['root']
+        self.assertEqual(xsd_element.local_name, 'root')
+        self.assertEqual(xsd_element.type.content_type[0].local_name, 'item')
+
+        xml_data = '<tns:root xmlns:tns="http://example.com/ns">' \
+                   '<tns:item label="a  b">red</tns:item><tns:item label="a b">red</tns:item></tns:root>'
+        items = schema.to_dict(xml_data)['tns:item']
+        self.assertEqual(items, [{'@label': 'a b', '$': 'red'}, {'@label': 'a b', '$': 'red'}])
+        keys = [sorted(item) for item in items]
+        self.assertIs(keys[0][1], keys[1][1])  # The prefixed attribute names are shared
+
+        data = schema.to_dict(xml_data, converter=xmlschema.BadgerFishConverter)
+        self.assertIs(list(data)[0], list(schema.to_dict(xml_data, converter=xmlschema.BadgerFishConverter))[0])
+
+        if PY3:
+            items = schema.to_dict(xml_data, intern_values=True)['tns:item']
+            self.assertIs(items[0]['@label'], items[1]['@label'])
+            self.assertIs(items[0]['$'], items[1]['$'])
+
+    def test_deep_document(self):
+        # The elements are decoded iteratively, so the depth is not limited by the recursion limit
+        schema = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:element name="node" type="nodeType"/>
+              <xs:complexType name="nodeType">
+                <xs:group ref="nodeGroup"/>
+                <xs:attribute name="level" type="xs:int"/>
+              </xs:complexType>
+              <xs:group name="nodeGroup">
+                <xs:sequence>
+                  <xs:element name="node" type="nodeType" minOccurs="0"/>
+                </xs:sequence>
+              </xs:group>
+            </xs:schema>""")
+        depth = 10000
+        xml_data = ''.join('<node level="%d">' % k for k in range(depth)) + '</node>' * depth
+        root = _ElementTree.fromstring(xml_data)
+        self.assertTrue(schema.is_valid(root))
+
+        data = schema.to_dict(root)
+        for k in range(depth - 1):
+            self.assertEqual(data['@level'], k)
+            data = data['node']
+        self.assertEqual(data, {'@level': depth - 1})
+
+        leaf = root
+        while len(leaf):
+            leaf = leaf[0]
+        leaf.set('level', 'unknown')
+        errors = list(schema.iter_errors(root))
+        self.assertEqual(len(errors), 1)
+        self.assertIs(errors[0].elem, leaf)
+        self.assertIs(errors[0].validator, schema.types['nodeType'].attributes['level'].type)
+        results = list(schema.iter_decode(root))
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0].elem, leaf)
+        self.assertEqual(results[1]['@level'], 0)
+        self.assertRaises(xmlschema.XMLSchemaValidationError, schema.to_dict, root)
+
 
 if __name__ == '__main__':
     from xmlschema.tests import print_test_header, tests_factory
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c), 2016-2018, SISSA (International School for Advanced Studies).
+# All rights reserved.
+# This file is distributed under the terms of the MIT License.
+# See the file 'LICENSE' in the root directory of the present
+# distribution, or http://opensource.org/licenses/MIT.
+#
+# @author Davide Brunato <brunato@sissa.it>
+#
+"""
+This module runs tests concerning the generation of synthetic XML instances.
+"""
+import unittest
+import os
+import sys
+import random
+import re
+import shutil
+import tempfile
+
+try:
+    import xmlschema
+except ImportError:
+    # Adds the package base dir path as first search path for imports
+    pkg_base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    sys.path.insert(0, pkg_base_dir)
+    import xmlschema
+
+from xmlschema.exceptions import XMLSchemaValueError
+from xmlschema.generators import RegexSampler
+
+
+FACETS_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:tns="http://example.com/gen"
+    targetNamespace="http://example.com/gen" elementFormDefault="qualified">
+  <xs:simpleType name="codeType">
+    <xs:restriction base="xs:string">
+      <xs:pattern value="[A-Z]{3}-\\d{2,4}"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="colorType">
+    <xs:restriction base="xs:token">
+      <xs:enumeration value="red"/>
+      <xs:enumeration value="green"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="percentType">
+    <xs:restriction base="xs:decimal">
+      <xs:minInclusive value="0"/>
+      <xs:maxInclusive value="100"/>
+      <xs:fractionDigits value="1"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="smallType">
+    <xs:restriction base="xs:int">
+      <xs:minExclusive value="10"/>
+      <xs:maxExclusive value="20"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="nameType">
+    <xs:restriction base="xs:string">
+      <xs:minLength value="3"/>
+      <xs:maxLength value="5"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="tripleType">
+    <xs:restriction>
+      <xs:simpleType><xs:list itemType="xs:positiveInteger"/></xs:simpleType>
+      <xs:length value="3"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="unionType">
+    <xs:union memberTypes="xs:date tns:colorType xs:boolean"/>
+  </xs:simpleType>
+  <xs:complexType name="priceType">
+    <xs:simpleContent>
+      <xs:extension base="tns:percentType">
+        <xs:attribute name="currency" type="xs:language" use="required"/>
+      </xs:extension>
+    </xs:simpleContent>
+  </xs:complexType>
+  <xs:element name="root">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="item" maxOccurs="unbounded">
+          <xs:complexType>
+            <xs:choice maxOccurs="3">
+              <xs:element name="code" type="tns:codeType"/>
+              <xs:element name="color" type="tns:colorType"/>
+              <xs:element name="price" type="tns:priceType"/>
+            </xs:choice>
+            <xs:attribute name="id" type="xs:ID" use="required"/>
+            <xs:attribute name="small" type="tns:smallType" use="required"/>
+            <xs:attribute name="name" type="tns:nameType"/>
+            <xs:attribute name="triple" type="tns:tripleType"/>
+            <xs:attribute name="union" type="tns:unionType"/>
+            <xs:attribute name="timestamp" type="xs:dateTime"/>
+            <xs:attribute name="binary" type="xs:hexBinary"/>
+          </xs:complexType>
+        </xs:element>
+        <xs:element name="options" minOccurs="0">
+          <xs:complexType>
+            <xs:all>
+              <xs:element name="label" type="xs:NCName"/>
+              <xs:element name="month" type="xs:gYearMonth" minOccurs="0"/>
+            </xs:all>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>"""
+
+
+class TestInstanceGenerator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = os.path.dirname(__file__)
+        cls.vh_schema = xmlschema.XMLSchema(
+            os.path.join(cls.test_dir, 'cases/examples/vehicles/vehicles.xsd')
+        )
+        cls.col_schema = xmlschema.XMLSchema(
+            os.path.join(cls.test_dir, 'cases/examples/collection/collection.xsd')
+        )
+        cls.facets_schema = xmlschema.XMLSchema(FACETS_SCHEMA)
+
+    def test_valid_instances(self):
+        for schema in (self.vh_schema, self.col_schema, self.facets_schema):
+            for seed in range(10):
+                xml_data = schema.generate(seed=seed)
+                self.assertTrue(schema.is_valid(xml_data), msg="seed=%d: %s" % (seed, xml_data))
+
+    def test_deterministic_seed(self):
+        self.assertEqual(self.facets_schema.generate(seed=7), self.facets_schema.generate(seed=7))
+        self.assertNotEqual(self.facets_schema.generate(seed=7), self.facets_schema.generate(seed=8))
+
+    def test_root_element(self):
+        xml_data = self.vh_schema.generate(seed=1)
+        self.assertIn('<vh:vehicles ', xml_data)
+        namespaces = {'vh': 'http://example.com/vehicles'}
+        xml_data = self.vh_schema.generate(seed=1, path='vh:cars', namespaces=namespaces)
+        self.assertIn('<vh:cars ', xml_data)
+        self.assertTrue(self.vh_schema.is_valid(xml_data))
+        self.assertRaises(XMLSchemaValueError, self.vh_schema.generate, path='vh:unknown', namespaces=namespaces)
+
+    def test_document_size(self):
+        chunks = list(self.col_schema.iter_generate(size=50000, seed=1))
+        self.assertGreater(len(chunks), 100)
+        xml_data = ''.join(chunks)
+        self.assertGreaterEqual(len(xml_data), 50000)
+        self.assertLess(len(xml_data), 60000)
+        self.assertTrue(self.col_schema.is_valid(xml_data))
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, 'vehicles.xml')
+            self.vh_schema.generate(filename, size=20000, seed=1)
+            self.assertGreaterEqual(os.path.getsize(filename), 20000)
+            self.assertTrue(self.vh_schema.is_valid(filename))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_error_injection(self):
+        generator = xmlschema.XMLInstanceGenerator(self.facets_schema, seed=1, error_rate=0.2)
+        xml_data = generator.generate(size=20000)
+        self.assertGreater(generator.injected_errors, 0)
+        errors = list(self.facets_schema.iter_errors(xml_data))
+        self.assertGreater(len(errors), generator.injected_errors // 2)
+        self.assertLessEqual(len(errors), generator.injected_errors)
+
+        xml_data = self.vh_schema.generate(seed=1, error_rate=1.0)
+        self.assertFalse(self.vh_schema.is_valid(xml_data))
+        self.assertRaises(XMLSchemaValueError, self.vh_schema.generate, error_rate=1.5)
+
+    def test_regex_sampler(self):
+        sampler = RegexSampler(random.Random(0))
+        for pattern in (r'^[A-Z]{3}-\d{2,4}$', r'^(ab|cd)+[^xyz]?\w*$', r'^\s?[0-9a-f]{8}(-[0-9a-f]{4})*$'):
+            for _ in range(20):
+                self.assertIsNotNone(re.match(pattern, sampler.sample(pattern)))
+
+
+if __name__ == '__main__':
+    from xmlschema.tests import print_test_header
+
+    print_test_header()
+    unittest.main()
@@ -15,6 +15,18 @@ This module runs tests concerning resources.
 import unittest
 import os
 import sys
+import hashlib
+import shutil
+import tempfile
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    # Python 2 fallback
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
 
 try:
     import xmlschema
@@ -24,6 +36,8 @@ except ImportError:
     sys.path.insert(0, pkg_base_dir)
     import xmlschema
 
+from xmlschema.exceptions import XMLSchemaValueError
+
 
 class TestResources(unittest.TestCase):
 
@@ -45,10 +59,189 @@ class TestResources(unittest.TestCase):
         right_path = os.path.join(self.test_dir, 'resources/dummy file.txt')
         self.assertTrue(xmlschema.fetch_resource(right_path).endswith('y%20file.txt'))
 
+    def test_catalog(self):
+        catalog = xmlschema.XMLCatalog(os.path.join(self.test_dir, 'resources/catalog.xml'))
+        self.assertTrue(catalog.resolve('http://example.com/vehicles').endswith('/vehicles/vehicles.xsd'))
+        self.assertTrue(catalog.resolve('http://example.com/xsd/collection.xsd').endswith(
+            '/examples/collection/collection.xsd'))
+        self.assertTrue(catalog.resolve('http://example.com/xsd/vehicles/cars.xsd').endswith(
+            '/examples/vehicles/cars.xsd'))
+        self.assertIsNone(catalog.resolve('http://example.com/other.xsd'))
+
+        catalog = xmlschema.XMLCatalog({'http://example.com/xsd/cars.xsd': 'cars.xsd'})
+        self.assertEqual(catalog.resolve('http://example.com/xsd/cars.xsd'), xmlschema.normalize_url('cars.xsd'))
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            # Catalogs chained in a loop are loaded once
+            with open(os.path.join(tmp_dir, 'a.xml'), 'w') as fp:
+                fp.write('<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">'
+                         '<uri name="http://example.com/a" uri="a.xsd"/><nextCatalog catalog="b.xml"/></catalog>')
+            with open(os.path.join(tmp_dir, 'b.xml'), 'w') as fp:
+                fp.write('<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">'
+                         '<uri name="http://example.com/b" uri="b.xsd"/><nextCatalog catalog="a.xml"/>'
+                         '<nextCatalog catalog="b.xml"/></catalog>')
+            catalog = xmlschema.XMLCatalog(os.path.join(tmp_dir, 'a.xml'))
+            self.assertEqual(sorted(catalog.entries), ['http://example.com/a', 'http://example.com/b'])
+
+            # Entries without a required attribute
+            for entry in ('<uri name="http://example.com/a"/>', '<system uri="a.xsd"/>',
+                          '<rewriteURI uriStartString="http://example.com/"/>', '<nextCatalog/>'):
+                with open(os.path.join(tmp_dir, 'c.xml'), 'w') as fp:
+                    fp.write('<catalog xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">%s</catalog>' % entry)
+                self.assertRaises(XMLSchemaValueError, xmlschema.XMLCatalog, os.path.join(tmp_dir, 'c.xml'))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_offline_resolver(self):
+        resolver = xmlschema.XMLResourceResolver(
+            catalog=os.path.join(self.test_dir, 'resources/catalog.xml'), offline=True
+        )
+        self.assertRaises(xmlschema.XMLSchemaURLError, resolver.fetch, 'http://example.com/other.xsd')
+
+        # Included schemas are mapped by the rewrite rule
+        schema = xmlschema.XMLSchema('http://example.com/xsd/vehicles/vehicles.xsd', resolver=resolver)
+        self.assertTrue(schema.is_valid(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xml')))
+        self.assertEqual(schema.url, 'http://example.com/xsd/vehicles/vehicles.xsd')
+
+        # Imported namespaces are mapped by the catalog
+        schema = xmlschema.XMLSchema("""
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:import namespace="http://example.com/vehicles"
+                  schemaLocation="http://unreachable.example.test/vehicles.xsd"/>
+            </xs:schema>""", resolver=resolver)
+        self.assertIn('http://example.com/vehicles', schema.maps.namespaces)
+
     def test_get_namespace(self):
         self.assertFalse(xmlschema.etree_get_namespaces(os.path.join(self.test_dir, 'resources/malformed.xml')))
 
 
+
+class LocalHTTPServer(ThreadingMixIn, HTTPServer):
+    """A local HTTP server for test cases, that records the received requests."""
+    daemon_threads = True
+
+    def __init__(self, root_dir):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), LocalHTTPRequestHandler)
+        self.root_dir = root_dir
+        self.requests = []
+        self.clients = set()
+        self.not_modified = 0
+
+
+class LocalHTTPRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.clients.add(self.client_address)
+
+        try:
+            with open(os.path.join(server.root_dir, *self.path.lstrip('/').split('/')), 'rb') as fp:
+                data = fp.read()
+        except (OSError, IOError):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResourceResolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = os.path.dirname(__file__)
+        cls.server = LocalHTTPServer(os.path.join(cls.test_dir, 'cases/examples'))
+        cls.base_url = 'http://127.0.0.1:%d/' % cls.server.server_address[1]
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.server.clients.clear()
+        self.server.not_modified = 0
+
+    def test_schema_from_http(self):
+        schema = xmlschema.XMLSchema(self.base_url + 'vehicles/vehicles.xsd')
+        self.assertTrue(schema.is_valid(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xml')))
+
+        # Each resource is requested once, using a single keep-alive connection.
+        self.assertEqual(sorted(self.server.requests), [
+            '/vehicles/bikes.xsd', '/vehicles/cars.xsd', '/vehicles/types.xsd', '/vehicles/vehicles.xsd'
+        ])
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_prefetch(self):
+        url = self.base_url + 'vehicles/vehicles.xsd'
+        schema = xmlschema.XMLSchema(url, prefetch=True)
+        self.assertEqual(sorted(self.server.requests), [
+            '/vehicles/bikes.xsd', '/vehicles/cars.xsd', '/vehicles/types.xsd', '/vehicles/vehicles.xsd'
+        ])
+
+        # The registration order doesn't depend on the prefetch
+        other = xmlschema.XMLSchema(url)
+        self.assertEqual([s.url for s in schema.maps.iter_schemas()], [s.url for s in other.maps.iter_schemas()])
+        self.assertEqual(list(schema.maps.types), list(other.maps.types))
+        self.assertEqual(list(schema.maps.elements), list(other.maps.elements))
+
+    def test_fetch(self):
+        resolver = xmlschema.XMLResourceResolver()
+        url = self.base_url + 'vehicles/cars.xsd'
+        with open(os.path.join(self.test_dir, 'cases/examples/vehicles/cars.xsd'), 'rb') as fp:
+            self.assertEqual(resolver.fetch(url), fp.read())
+        self.assertEqual(resolver.fetch(url), resolver.fetch(url))
+        self.assertEqual(self.server.requests, ['/vehicles/cars.xsd'])
+
+        self.assertRaises(xmlschema.XMLSchemaURLError, resolver.fetch, self.base_url + 'vehicles/unknown.xsd')
+        self.assertRaises(xmlschema.XMLSchemaURLError, xmlschema.fetch_resource,
+                          'unknown.xsd', self.base_url + 'vehicles/', resolver)
+        self.assertEqual(xmlschema.fetch_resource('cars.xsd', self.base_url + 'vehicles/', resolver), url)
+        self.assertEqual(len(self.server.requests), 3)  # Failed fetches are not cached
+        resolver.close()
+
+    def test_disk_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            url = self.base_url + 'vehicles/vehicles.xsd'
+            resolver = xmlschema.XMLResourceResolver(cache_dir=cache_dir)
+            data = resolver.fetch(url)
+            resolver.close()
+            self.assertEqual(self.server.not_modified, 0)
+
+            # A new resolver revalidates the cached response
+            resolver = xmlschema.XMLResourceResolver(cache_dir=cache_dir)
+            self.assertEqual(resolver.fetch(url), data)
+            resolver.close()
+            self.assertEqual(self.server.not_modified, 1)
+            self.assertEqual(len(self.server.requests), 2)
+        finally:
+            shutil.rmtree(cache_dir)
+
+
 if __name__ == '__main__':
     from xmlschema.tests import print_test_header
 
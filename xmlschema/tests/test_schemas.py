@@ -15,6 +15,12 @@ This module runs tests concerning the building of XSD schemas with the 'xmlschem
 import unittest
 import os
 import sys
+import shutil
+import tempfile
+try:
+    from collections.abc import Sequence, Mapping
+except ImportError:
+    from collections import Sequence, Mapping
 
 try:
     import lxml.etree as _lxml_etree
@@ -30,7 +36,9 @@ except ImportError:
     import xmlschema
 
 from xmlschema import XMLSchemaParseError, XMLSchemaURLError
+from xmlschema.exceptions import XMLSchemaValueError
 from xmlschema.tests import SchemaObserver
+from xmlschema.qnames import XSD_INCLUDE_TAG
 
 
 def make_test_schema_function(xsd_file, schema_class, expected_errors=0, inspect=False, locations=None):
@@ -80,6 +88,254 @@ def make_test_schema_function(xsd_file, schema_class, expected_errors=0, inspect
     return test_schema
 
 
+class TestSchemaBuilding(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_dir = os.path.dirname(__file__)
+        cls.vh_xsd_file = os.path.join(cls.test_dir, 'cases/examples/vehicles/vehicles.xsd')
+        cls.vh_xml_file = os.path.join(cls.test_dir, 'cases/examples/vehicles/vehicles.xml')
+
+    def test_trusted_schema(self):
+        schema = xmlschema.XMLSchema(self.vh_xsd_file)
+        self.assertTrue(all(s.meta_validation_time is not None for s in schema.maps.resources.values()
+                            if s.meta_schema is not None))
+
+        schema = xmlschema.XMLSchema(self.vh_xsd_file, trusted=True)
+        self.assertTrue(all(s.meta_validation_time is None for s in schema.maps.resources.values()))
+        self.assertTrue(schema.is_valid(self.vh_xml_file))
+
+    def test_meta_validation_registry(self):
+        registry_dir = tempfile.mkdtemp()
+        try:
+            registry_file = os.path.join(registry_dir, 'registry.txt')
+            registry = xmlschema.MetaValidationRegistry(registry_file)
+            schema = xmlschema.XMLSchema(self.vh_xsd_file, registry=registry)
+            self.assertEqual(len(registry), 4)
+            self.assertIsNotNone(schema.meta_validation_time)
+
+            # A new registry loads the validated schemas from the file
+            registry = xmlschema.MetaValidationRegistry(registry_file)
+            self.assertEqual(len(registry), 4)
+            schema = xmlschema.XMLSchema(self.vh_xsd_file, registry=registry)
+            self.assertIsNone(schema.meta_validation_time)
+            self.assertTrue(all(s.meta_validation_time is None for s in schema.maps.resources.values()))
+            self.assertTrue(schema.is_valid(self.vh_xml_file))
+
+            # Invalid schemas are not registered
+            schema = xmlschema.XMLSchema("""
+                <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                  <xs:element name="a" type="xs:string" wrong="attribute"/>
+                </xs:schema>""", validation='lax', registry=registry)
+            self.assertTrue(schema.errors)
+            self.assertEqual(len(registry), 4)
+        finally:
+            shutil.rmtree(registry_dir)
+
+    def test_layered_maps(self):
+        meta_maps = xmlschema.XMLSchema.meta_schema.maps
+        num_types = len(meta_maps.types)
+        schema = xmlschema.XMLSchema(self.vh_xsd_file)
+        self.assertIs(schema.maps.base, meta_maps)
+        self.assertEqual(list(schema.maps.types), ['{http://example.com/vehicles}vehicleType'])
+        self.assertEqual(len(meta_maps.types), num_types)
+        self.assertNotIn('http://example.com/vehicles', meta_maps.namespaces)
+
+        xsd_string = '{http://www.w3.org/2001/XMLSchema}string'
+        self.assertIs(schema.maps.lookup_type(xsd_string), meta_maps.types[xsd_string])
+        self.assertTrue(schema.maps.built)
+
+        maps = schema.maps.copy()
+        self.assertIs(maps.base, meta_maps)
+        self.assertEqual(sorted(maps.elements), sorted(schema.maps.elements))
+        vh_namespace = 'http://example.com/vehicles'
+        self.assertIsNot(maps.namespaces[vh_namespace], schema.maps.namespaces[vh_namespace])
+
+    def test_built_status_cache(self):
+        schema = xmlschema.XMLSchema(self.vh_xsd_file)
+        version = schema.maps.version
+        self.assertTrue(schema.built)
+        self.assertEqual(schema._built, (version, True))
+        self.assertTrue(schema.maps.built)
+        self.assertEqual(schema.maps._built, (version, True))
+
+        schema.maps.clear()
+        self.assertNotEqual(schema.maps.version, version)
+        self.assertFalse(schema.built)
+        self.assertEqual(schema.validation_attempted, 'none')
+
+        schema.maps.build()
+        self.assertTrue(schema.built)
+        self.assertEqual(schema.validation_attempted, 'full')
+
+    def test_build_stats(self):
+        schema = xmlschema.XMLSchema(self.vh_xsd_file)
+        stats = schema.build_stats
+        self.assertIs(stats, schema.maps.build_stats)
+        phases = [r.phase for r in stats.records]
+        self.assertEqual(phases.count('load'), 4)  # vehicles.xsd, cars.xsd, bikes.xsd, types.xsd
+        self.assertEqual(phases.count('meta_validation'), 4)
+        self.assertEqual(phases[-6:], [
+            'load_globals', 'build_globals', 'expand_groups', 'substitution_groups', 'keyrefs', 'base_elements'
+        ])
+        self.assertEqual(stats.records[0].document, schema.url)
+        self.assertEqual(stats.records[1].time, schema.meta_validation_time)
+        self.assertAlmostEqual(stats.total_time, sum(stats.get_phase_times().values()))
+        self.assertEqual(stats.components[schema.url]['elements'], 1)
+        self.assertEqual(sum(c.get('elements', 0) for c in stats.components.values()), 3)
+        self.assertIn('expand_groups', stats.report())
+        self.assertEqual(len(stats.as_dict()['phases']), len(stats.records))
+
+        # A new build replaces the records of the global maps phases
+        schema.maps.clear()
+        schema.maps.build()
+        self.assertEqual([r.phase for r in stats.records], phases)
+
+    def test_drop_sources(self):
+        schema = xmlschema.XMLSchema(self.vh_xsd_file)
+        data = schema.to_dict(self.vh_xml_file)
+        errors = [e.reason for e in schema.iter_errors(self.vh_xml_file.replace('.xml', '-2_errors.xml'))]
+
+        schema = xmlschema.XMLSchema(self.vh_xsd_file, keep_source=False)
+        self.assertEqual(schema.to_dict(self.vh_xml_file), data)
+        self.assertEqual(
+            [e.reason for e in schema.iter_errors(self.vh_xml_file.replace('.xml', '-2_errors.xml'))], errors
+        )
+        for xsd_schema in schema.maps.iter_schemas():
+            if xsd_schema.maps is schema.maps:
+                self.assertIsNone(xsd_schema._text)
+                self.assertIsNone(xsd_schema._parent_map)
+                self.assertTrue(all(e.tag == XSD_INCLUDE_TAG for e in xsd_schema.root))
+
+        # The text is loaded again from the URL when it's accessed
+        with open(self.vh_xsd_file) as fp:
+            self.assertEqual(schema.text, fp.read())
+        self.assertIsNone(schema._text)
+        vehicle_type = schema.types['vehicleType']
+        self.assertEqual(len(vehicle_type.elem), 0)
+        self.assertEqual(vehicle_type.name, '{http://example.com/vehicles}vehicleType')
+        self.assertEqual(schema.elements['cars'].type.content_type[0].max_occurs, None)
+        self.assertEqual(schema.target_namespace, 'http://example.com/vehicles')
+        self.assertEqual(schema.element_form_default, 'qualified')
+
+        self.assertIn(schema.elements['vehicles'], schema.parent_map.values())
+        self.assertIsNone(schema._parent_map)
+
+        # The global maps can be built again, reloading the sources from the URLs
+        schema.maps.clear()
+        schema.maps.build()
+        self.assertTrue(schema.built)
+        self.assertEqual(schema.to_dict(self.vh_xml_file), data)
+        self.assertIsNone(schema._text)
+        self.assertEqual(len(schema.types['vehicleType'].elem), 0)
+
+        vehicle_type = schema.types['vehicleType']
+        schema.maps.rebuild([])
+        self.assertIsNot(schema.types['vehicleType'], vehicle_type)
+        self.assertEqual(schema.to_dict(self.vh_xml_file), data)
+        self.assertIsNone(schema._text)
+
+        # A schema created from a string cannot be reloaded
+        schema = xmlschema.XMLSchema(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+            '<xs:element name="root" type="xs:string"/></xs:schema>', keep_source=False
+        )
+        self.assertIsNone(schema.url)
+        self.assertRaises(XMLSchemaValueError, getattr, schema, 'text')
+        schema.maps.clear()
+        self.assertRaises(XMLSchemaValueError, schema.maps.build)
+
+    def test_drop_sources_with_import(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(tmp_dir, 'other.xsd'), 'w') as fp:
+                fp.write('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+                         'targetNamespace="http://example.com/other">'
+                         '<xs:element name="value"><xs:complexType><xs:sequence>'
+                         '<xs:element name="item" type="xs:int"/></xs:sequence></xs:complexType>'
+                         '</xs:element></xs:schema>')
+            with open(os.path.join(tmp_dir, 'main.xsd'), 'w') as fp:
+                fp.write('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+                         'xmlns:o="http://example.com/other">'
+                         '<xs:import namespace="http://example.com/other" schemaLocation="other.xsd"/>'
+                         '<xs:element name="root"><xs:complexType><xs:sequence>'
+                         '<xs:element ref="o:value"/></xs:sequence></xs:complexType></xs:element>'
+                         '</xs:schema>')
+
+            schema = xmlschema.XMLSchema(os.path.join(tmp_dir, 'main.xsd'), keep_source=False)
+            other = schema.maps.namespaces['http://example.com/other'][0]
+            self.assertFalse(other.keep_source)
+            self.assertTrue(other._source_dropped)
+            self.assertIsNone(other._text)
+            self.assertEqual(len(other.root), 0)
+
+            self.assertIn(other.elements['value'], other.parent_map.values())
+            self.assertIsNone(other._parent_map)  # Not cached like the parent map of the main schema
+            self.assertIsNone(schema._parent_map)
+
+            # During the build of the keyrefs the parent maps are computed once
+            schema.maps._hold_parent_maps = True
+            self.assertIs(other.parent_map, other.parent_map)
+            schema.maps._hold_parent_maps = False
+            schema.maps.clear()
+            schema.maps.build()
+            self.assertIsNone(other._parent_map)
+            self.assertEqual(
+                schema.to_dict('<root xmlns:o="http://example.com/other"><o:value><item>1</item></o:value></root>'),
+                {'o:value': {'item': 1}}
+            )
+
+            schema = xmlschema.XMLSchema(os.path.join(tmp_dir, 'main.xsd'))
+            other = schema.maps.namespaces['http://example.com/other'][0]
+            self.assertTrue(other.keep_source)
+            self.assertFalse(other._source_dropped)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_slotted_components(self):
+        schema = xmlschema.XMLSchema(self.vh_xsd_file)
+        for component in schema.maps.iter_components():
+            if component is not schema.maps:
+                self.assertTrue(hasattr(component.__class__, '__slots__'))
+                if not isinstance(component, (Sequence, Mapping)) or sys.version_info >= (3,):
+                    self.assertFalse(hasattr(component, '__dict__'), msg=component)
+
+    def test_rebuild(self):
+        schema_dir = tempfile.mkdtemp()
+        try:
+            shutil.rmtree(schema_dir)
+            shutil.copytree(os.path.dirname(self.vh_xsd_file), schema_dir)
+            schema = xmlschema.XMLSchema(os.path.join(schema_dir, 'vehicles.xsd'))
+            self.assertTrue(schema.is_valid(self.vh_xml_file))
+            cars = schema.elements['cars']
+            bikes = schema.elements['bikes']
+            vehicles = schema.elements['vehicles']
+            vehicle_type = schema.types['vehicleType']
+
+            cars_file = os.path.join(schema_dir, 'cars.xsd')
+            with open(cars_file) as fp:
+                text = fp.read()
+            with open(cars_file, 'w') as fp:
+                fp.write(text.replace('maxOccurs="unbounded"', 'maxOccurs="1"'))
+
+            schema.maps.rebuild([cars_file])
+            self.assertTrue(schema.built)
+            self.assertFalse(schema.is_valid(self.vh_xml_file))
+
+            # Only the changed components and their dependants are rebuilt
+            self.assertIsNot(schema.elements['cars'], cars)
+            self.assertIsNot(schema.elements['vehicles'], vehicles)
+            self.assertIs(schema.elements['bikes'], bikes)
+            self.assertIs(schema.types['vehicleType'], vehicle_type)
+
+            with open(cars_file, 'w') as fp:
+                fp.write(text.replace('<xs:include schemaLocation="types.xsd" />', ''))
+            self.assertRaises(XMLSchemaValueError, schema.maps.rebuild, [cars_file])
+            self.assertRaises(XMLSchemaValueError, schema.maps.rebuild, ['unknown.xsd'])
+        finally:
+            shutil.rmtree(schema_dir)
+
+
 if __name__ == '__main__':
     from xmlschema.tests import print_test_header, tests_factory
 
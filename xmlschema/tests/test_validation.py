@@ -15,6 +15,8 @@ This module runs tests concerning the validation of XML files with the 'xmlschem
 import unittest
 import os
 import sys
+import json
+import threading
 try:
     import lxml.etree as etree
 except ImportError:
@@ -28,6 +30,12 @@ except ImportError:
     sys.path.insert(0, pkg_base_dir)
     import xmlschema
 
+from xmlschema.exceptions import XMLSchemaValueError
+from xmlschema.etree import ElementTree, etree_element
+from xmlschema.qnames import XSD_ANY_TAG
+from xmlschema.validators import XsdElement
+from xmlschema.validators.wildcards import Xsd11AnyElement
+
 
 def make_test_validation_function(xml_file, schema_class, expected_errors=0, inspect=False, locations=None):
     def test_validation(self):
@@ -38,6 +46,15 @@ def make_test_validation_function(xml_file, schema_class, expected_errors=0, ins
             raise ValueError(
                 "n.%d errors expected, found %d: %s" % (expected_errors, len(errors), '\n++++++\n'.join(errors[:3]))
             )
+        # The validation without decoding must report the same errors of the decoding. The
+        # document is parsed once, because the error messages include the elements' addresses.
+        xml_document = ElementTree.parse(xml_file)
+        errors = [str(e) for e in xs.iter_errors(xml_document)]
+        decode_errors = [
+            str(e) for e in xs.iter_decode(xml_document) if isinstance(e, xmlschema.XMLSchemaValidationError)
+        ]
+        self.assertEqual(errors, decode_errors)
+
         if expected_errors == 0:
             self.assertTrue(True, "Successfully validated {} with schema {}".format(xml_file, schema))
         else:
@@ -65,6 +82,320 @@ class TestValidation(unittest.TestCase):
         self.assertTrue(xs.validate(xt1) is None)
         self.assertRaises(xmlschema.XMLSchemaValidationError, xs.validate, xt2)
 
+    def test_validation_without_decoding(self):
+        xs = xmlschema.XMLSchema(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xsd'))
+        xml_file = os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles-2_errors.xml')
+        root = xmlschema.etree.ElementTree.parse(xml_file).getroot()
+        cars = xs.elements['cars']
+        for elem in root:
+            if cars.match(elem.tag):
+                decode_errors = [
+                    e.reason for e in cars.iter_decode(elem) if isinstance(e, xmlschema.XMLSchemaValidationError)
+                ]
+                self.assertEqual([e.reason for e in cars.iter_errors(elem)], decode_errors)
+
+        self.assertFalse(xs.is_valid(xml_file))
+        self.assertEqual(len(list(xs.iter_validate(xml_file, path='vh:vehicles/vh:cars',
+                                                   namespaces={'vh': 'http://example.com/vehicles'}))), 1)
+
+    def test_error_budget(self):
+        xs = xmlschema.XMLSchema(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xsd'))
+        xml_file = os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles-3_errors.xml')
+        errors = list(xs.iter_errors(xml_file))
+        self.assertEqual(len(errors), 3)
+        self.assertEqual([e.reason for e in xs.iter_errors(xml_file, max_errors=2)], [e.reason for e in errors[:2]])
+        self.assertEqual(len(list(xs.iter_errors(xml_file, max_errors=5))), 3)
+        self.assertRaises(XMLSchemaValueError, list, xs.iter_errors(xml_file, max_errors=0))
+
+        xml_data = xs.generate(size=20000, seed=1, error_rate=0.5)
+        errors = list(xs.iter_errors(xml_data))
+        collapsed_errors = list(xs.iter_errors(xml_data, collapse=True))
+        self.assertGreater(len(errors), len(collapsed_errors))
+        self.assertEqual(sum(e.occurrences for e in collapsed_errors), len(errors))
+        self.assertEqual(len(set(id(e.validator) for e in collapsed_errors)), len(collapsed_errors))
+        self.assertIn('Occurrences: ', str(max(collapsed_errors, key=lambda e: e.occurrences)))
+
+        collapsed_errors = list(xs.iter_errors(xml_data, max_errors=10, collapse=True))
+        self.assertEqual(sum(e.occurrences for e in collapsed_errors), 10)
+
+    def test_error_records(self):
+        xs = xmlschema.XMLSchema(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xsd'))
+        xml_data = xs.generate(size=5000, seed=1, error_rate=0.5)
+        errors = list(xs.iter_errors(xml_data))
+        records = list(xs.iter_errors(xml_data, records=True))
+        self.assertEqual([r.reason for r in records], [e.reason for e in errors])
+        self.assertEqual([r.validator for r in records], [e.validator for e in errors])
+        for record in records:
+            self.assertIsInstance(record, xmlschema.ValidationErrorRecord)
+            self.assertFalse(hasattr(record, '__dict__'))
+            self.assertFalse(any(xmlschema.etree.etree_iselement(getattr(record, name))
+                                 for name in record.__slots__))
+            self.assertTrue(record.path.startswith('/vh:vehicles'))
+            self.assertIn(record.path, str(record))
+
+        self.assertTrue(any(r.path.startswith('/vh:vehicles/vh:cars/vh:car[') for r in records))
+
+        collapsed = list(xs.iter_errors(xml_data, records=True, collapse=True))
+        self.assertEqual(sum(r.occurrences for r in collapsed), len(records))
+
+        # The reasons of the children errors are formatted only when accessed
+        error = next(e for e in errors if isinstance(e, xmlschema.XMLSchemaChildrenValidationError))
+        error = error.__class__(error.validator, error.elem, error.index, error.expected)
+        self.assertIsNone(error._reason)
+        self.assertIn('unexpected tag', error.reason)
+        self.assertIsNotNone(error._reason)
+
+        records = list(xs.elements['vehicles'].iter_error_records(xmlschema.etree.etree_fromstring(xml_data)))
+        self.assertEqual([r.path for r in records], [r.path for r in xs.iter_error_records(xml_data)])
+
+    def test_all_model_group(self):
+        xs = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:element name="record">
+                <xs:complexType>
+                  <xs:all>
+                    <xs:element name="id" type="xs:int"/>
+                    <xs:element name="name" type="xs:string" minOccurs="0"/>
+                    <xs:element name="code" type="xs:string"/>
+                    <xs:element name="note" type="xs:string" minOccurs="0"/>
+                  </xs:all>
+                </xs:complexType>
+              </xs:element>
+              <xs:element name="records">
+                <xs:complexType>
+                  <xs:all minOccurs="0">
+                    <xs:element name="id" type="xs:int"/>
+                  </xs:all>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        self.assertTrue(xs.is_valid('<record><id>1</id><code>A</code></record>'))
+        self.assertTrue(xs.is_valid('<record><note>x</note><code>A</code><name>y</name><id>1</id></record>'))
+        self.assertTrue(xs.is_valid('<record><name>y</name><code>A</code><id>1</id></record>'))
+        self.assertEqual(xs.to_dict('<record><code>A</code><name>y</name><id>1</id></record>'),
+                         {'code': 'A', 'name': 'y', 'id': 1})
+        self.assertTrue(xs.is_valid('<records/>'))
+
+        errors = list(xs.iter_errors('<record><name>y</name><note>x</note></record>'))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].expected, ['id', 'code'])
+        self.assertFalse(xs.is_valid('<record><id>1</id><code>A</code><id>2</id></record>'))
+        self.assertFalse(xs.is_valid('<record><id>1</id><other/><code>A</code></record>'))
+        self.assertFalse(xs.is_valid('<record/>'))
+
+    def test_wildcards(self):
+        xs = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+                xmlns:tns="http://example.com/ns" targetNamespace="http://example.com/ns">
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:any namespace="##targetNamespace ##local" processContents="lax" maxOccurs="unbounded"/>
+                  </xs:sequence>
+                  <xs:anyAttribute namespace="##other" processContents="strict"/>
+                </xs:complexType>
+              </xs:element>
+              <xs:element name="value" type="xs:int"/>
+            </xs:schema>""")
+        namespaces = 'xmlns:tns="http://example.com/ns" xmlns:o="http://example.com/other" ' \
+                     'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+        xml_data = '<tns:root %s xsi:noNamespaceSchemaLocation="x.xsd"><tns:value>1</tns:value><local/>' \
+                   '<tns:value>2</tns:value></tns:root>' % namespaces
+        self.assertTrue(xs.is_valid(xml_data))
+        self.assertEqual(xs.to_dict(xml_data, namespaces={'tns': 'http://example.com/ns'}),
+                         {'@xsi:noNamespaceSchemaLocation': 'x.xsd', 'tns:value': [1, 2]})
+        self.assertEqual(xs.to_dict(xml_data), xs.to_dict(xml_data))  # Reuses the lookups
+
+        self.assertFalse(xs.is_valid('<tns:root %s><o:value/></tns:root>' % namespaces))
+        self.assertFalse(xs.is_valid('<tns:root %s><tns:value>x</tns:value></tns:root>' % namespaces))
+        self.assertFalse(xs.is_valid('<tns:root %s tns:a="1"/>' % namespaces))
+        errors = list(xs.iter_errors('<tns:root %s o:a="1"><local/></tns:root>' % namespaces))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].reason, "attribute '{http://example.com/other}a' not found.")
+
+        xsd_any = xs.elements['root'].type.content_type[0]
+        self.assertTrue(xsd_any.match('{http://example.com/ns}value'))
+        self.assertTrue(xsd_any.match('value'))
+        self.assertTrue(xsd_any.match('{http://www.w3.org/2001/XMLSchema-instance}type'))
+        self.assertFalse(xsd_any.match('{http://example.com/other}value'))
+        self.assertIs(xsd_any.lookup_global('{http://example.com/ns}value', 'lookup_element'),
+                      xs.elements['value'])
+        self.assertIsNone(xsd_any.lookup_global('{http://example.com/ns}missing', 'lookup_element'))
+        self.assertEqual(list(xsd_any._lookups[1]['lookup_element']), ['{http://example.com/ns}value'])
+
+        any_attribute = xs.elements['root'].type.attributes[None]
+        self.assertTrue(any_attribute.match('{http://example.com/other}a'))
+        self.assertFalse(any_attribute.match('{http://example.com/ns}a'))
+        self.assertFalse(any_attribute.match('a'))
+
+        # Comments are skipped, also by a strict wildcard that doesn't admit unqualified names
+        xsd_any = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:element name="root">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:any namespace="##other" processContents="strict" maxOccurs="unbounded"/>
+                  </xs:sequence>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""").elements['root'].type.content_type[0]
+        elem = etree_element('root')
+        elem.append(ElementTree.Comment('a comment'))
+        self.assertEqual(list(xsd_any.iter_decode_children(elem)), [1])
+
+        elem = etree_element(XSD_ANY_TAG, attrib={
+            'notNamespace': '##local http://example.com/other', 'notQName': 'tns:value ##defined'
+        })
+        xsd_any = Xsd11AnyElement(elem, xs)
+        self.assertTrue(xsd_any.match('{http://example.com/ns}other'))
+        self.assertFalse(xsd_any.match('{http://example.com/ns}value'))
+        self.assertFalse(xsd_any.match('{http://example.com/other}value'))
+        self.assertFalse(xsd_any.match('value'))
+
+    def test_xsi_type(self):
+        xs = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+                xmlns:tns="http://example.com/ns" targetNamespace="http://example.com/ns">
+              <xs:complexType name="shapeType">
+                <xs:sequence><xs:element name="id" type="xs:int"/></xs:sequence>
+              </xs:complexType>
+              <xs:complexType name="circleType">
+                <xs:complexContent>
+                  <xs:extension base="tns:shapeType">
+                    <xs:sequence><xs:element name="radius" type="xs:double"/></xs:sequence>
+                  </xs:extension>
+                </xs:complexContent>
+              </xs:complexType>
+              <xs:element name="shapes">
+                <xs:complexType>
+                  <xs:sequence>
+                    <xs:element name="shape" type="tns:shapeType" maxOccurs="unbounded"/>
+                    <xs:element name="fixed" type="tns:shapeType" block="extension" minOccurs="0"/>
+                    <xs:element name="value" type="xs:anySimpleType" minOccurs="0"/>
+                  </xs:sequence>
+                </xs:complexType>
+              </xs:element>
+            </xs:schema>""")
+        namespaces = 'xmlns:tns="http://example.com/ns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+        xml_data = '<tns:shapes %s><shape xsi:type="tns:circleType"><id>1</id><radius>2.5</radius></shape>' \
+                   '<shape xsi:type="tns:circleType"><id>2</id><radius>1</radius></shape>' \
+                   '<value xsi:type="xs:int">10</value></tns:shapes>' % namespaces
+        self.assertTrue(xs.is_valid(xml_data))
+        self.assertEqual(xs.to_dict(xml_data)['value'], {'@xsi:type': 'xs:int', '$': 10})
+
+        xsd_element = xs.elements['shapes'].type.content_type[0]
+        circle_type = xs.types['circleType']
+        self.assertEqual(xsd_element.get_xsi_type('tns:circleType'), (circle_type, None))
+        self.assertIs(xsd_element.get_xsi_type('tns:circleType'), xsd_element.get_xsi_type('tns:circleType'))
+        self.assertEqual(xsd_element.get_xsi_type('tns:unknownType'),
+                         (xsd_element.type, "unknown xsi:type 'tns:unknownType'."))
+        self.assertEqual(list(xsd_element._xsi_types[1]), ['tns:circleType'])  # Errors aren't cached
+
+        xml_data = '<tns:shapes %s><shape xsi:type="xs:string">1</shape>' \
+                   '<fixed xsi:type="tns:circleType"><id>2</id><radius>1</radius></fixed>' \
+                   '<value xsi:type="unknown:int">10</value></tns:shapes>' % namespaces
+        reasons = [e.reason for e in xs.iter_errors(xml_data)]
+        self.assertEqual([r for r in reasons if 'xsi:type' in r], [
+            "xsi:type 'xs:string' is not derived from the type of the element.",
+            "xsi:type 'tns:circleType' is blocked by a derivation by extension.",
+            "unknown xsi:type 'unknown:int'.",
+        ])
+
+    def test_concurrent_validation(self):
+        xs = xmlschema.XMLSchema(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xsd'))
+        xml_files = [
+            os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xml'),
+            os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles-2_errors.xml'),
+        ]
+
+        def validate_and_decode(xml_file):
+            errors = [e.reason for e in xs.iter_errors(xml_file)]
+            data = [
+                obj for obj in xs.iter_decode(xml_file, validation='lax')
+                if not isinstance(obj, xmlschema.XMLSchemaValidationError)
+            ]
+            return errors, data
+
+        expected = [validate_and_decode(f) for f in xml_files]
+        results = []
+        failures = []
+
+        def worker():
+            try:
+                for _ in range(10):
+                    for k, f in enumerate(xml_files):
+                        results.append((k, validate_and_decode(f)))
+            except Exception as err:
+                failures.append(err)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual(len(results), 8 * 10 * len(xml_files))
+        for k, result in results:
+            self.assertEqual(result, expected[k])
+
+    def test_profiling(self):
+        xs = xmlschema.XMLSchema(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xsd'))
+        xml_file = os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles-2_errors.xml')
+        errors = [e.reason for e in xs.iter_errors(xml_file)]
+        iter_decode = XsdElement.__dict__['iter_decode']
+
+        with xs.profile() as profiler:
+            self.assertTrue(profiler.is_active())
+            self.assertRaises(XMLSchemaValueError, xs.profile().start)
+            self.assertEqual([e.reason for e in xs.iter_errors(xml_file)], errors)
+            self.assertRaises(xmlschema.XMLSchemaValidationError, xs.validate, xml_file)
+
+        self.assertFalse(profiler.is_active())
+        self.assertIs(XsdElement.__dict__['iter_decode'], iter_decode)
+        self.assertEqual(profiler.stack, [])
+        stats = profiler.get_sorted_stats()
+        self.assertEqual(stats[0].component, xs.elements['vehicles'])
+        self.assertEqual(stats[0].calls, 2)
+        self.assertTrue(all(s.own_time <= s.time for s in stats))
+        self.assertEqual(sum(s.errors for s in stats), len(errors) + 1)
+        self.assertIn("vh:cars", profiler.report())
+        self.assertEqual(len(profiler.report(limit=3).splitlines()), 4)
+        self.assertEqual(len(json.loads(profiler.to_json(sort_by='errors', limit=2))), 2)
+        self.assertRaises(XMLSchemaValueError, profiler.report, sort_by='unknown')
+
+        # The attributes are counted also if the attribute groups inline their decoding
+        other = xmlschema.XMLSchema(os.path.join(self.test_dir, 'cases/examples/vehicles/vehicles.xsd'))
+        with xs.profile() as profiler:
+            self.assertFalse(xs.types['vehicleType'].attributes.inline_attributes)
+            self.assertTrue(other.types['vehicleType'].attributes.inline_attributes)
+            xs.to_dict(xml_file.replace('-2_errors', ''))
+            xs.is_valid(xml_file.replace('-2_errors', ''))
+        self.assertTrue(xs.types['vehicleType'].attributes.inline_attributes)
+        self.assertEqual(profiler.get_stats(xs.types['vehicleType'].attributes['make']).calls, 8)
+
+        # Facets and validators of simple types
+        xs = xmlschema.XMLSchema("""<?xml version="1.0" encoding="UTF-8"?>
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+              <xs:element name="code">
+                <xs:simpleType>
+                  <xs:restriction base="xs:string">
+                    <xs:pattern value="[A-Z]+"/>
+                    <xs:maxLength value="3"/>
+                  </xs:restriction>
+                </xs:simpleType>
+              </xs:element>
+            </xs:schema>""")
+        with xs.profile() as profiler:
+            self.assertTrue(xs.is_valid('<code>ABC</code>'))
+            self.assertEqual(len(list(xs.iter_errors('<code>abcd</code>'))), 2)
+            self.assertEqual(xs.to_dict('<code>ABC</code>'), 'ABC')
+        facet_stats = {s.name.split('(')[0]: s for s in profiler.stats}
+        self.assertEqual(facet_stats['XsdPatternsFacet'].calls, 3)
+        self.assertEqual(facet_stats['XsdPatternsFacet'].errors, 1)
+        self.assertEqual(facet_stats['XsdSingleFacet'].errors, 1)
+        self.assertEqual(xs.elements['code'].type.patterns.__class__.__name__, 'XsdPatternsFacet')
+
 
 if __name__ == '__main__':
     from xmlschema.tests import print_test_header, tests_factory
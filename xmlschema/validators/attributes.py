@@ -27,6 +27,19 @@ from .simple_types import XsdSimpleType
 from .wildcards import XsdAnyAttribute
 
 
+def get_attribute_value(xsd_attribute, text, default, fixed, use_defaults=True):
+    """
+    Returns the value of an instance attribute, replaced by the default value if it's
+    empty, and the error for a value that differs from the fixed value, `None` otherwise.
+    Shared by the XSD attributes and by the inlined decoding of the attribute groups.
+    """
+    if not text and use_defaults:
+        text = default
+    if fixed is not None and text != fixed:
+        return text, XMLSchemaValidationError(xsd_attribute, text, "value differs from fixed value")
+    return text, None
+
+
 class XsdAttribute(XsdAnnotated, ValidatorMixin):
     """
     Class for XSD 1.0 'attribute' declarations.
@@ -44,6 +57,8 @@ class XsdAttribute(XsdAnnotated, ValidatorMixin):
       Content: (annotation?, simpleType?)
     </attribute>
     """
+    __slots__ = ('qualified', 'type')
+
     def __init__(self, elem, schema, name=None, xsd_type=None, is_global=False):
         if xsd_type is not None:
             self.type = xsd_type
@@ -165,10 +180,8 @@ class XsdAttribute(XsdAnnotated, ValidatorMixin):
                 yield obj
 
     def iter_decode(self, text, validation='lax', **kwargs):
-        if not text and kwargs.get('use_defaults', True):
-            text = self.default
-        if self.fixed is not None and text != self.fixed:
-            error = XMLSchemaValidationError(self, text, "value differs from fixed value")
+        text, error = get_attribute_value(self, text, self.default, self.fixed, kwargs.get('use_defaults', True))
+        if error is not None:
             if validation == 'strict':
                 raise error
             yield error
@@ -178,6 +191,14 @@ class XsdAttribute(XsdAnnotated, ValidatorMixin):
             if not isinstance(result, XMLSchemaValidationError):
                 return
 
+    def iter_validate(self, text, **kwargs):
+        text, error = get_attribute_value(self, text, self.default, self.fixed, kwargs.get('use_defaults', True))
+        if error is not None:
+            yield error
+
+        for error in self.type.iter_validate(text, **kwargs):
+            yield error
+
     def iter_encode(self, obj, validation='lax', **kwargs):
         for result in self.type.iter_encode(obj, validation):
             yield result
@@ -204,7 +225,7 @@ class Xsd11Attribute(XsdAttribute):
       Content: (annotation?, simpleType?)
     </attribute>
     """
-    pass
+    __slots__ = ()
 
 
 class XsdAttributeGroup(MutableMapping, XsdAnnotated):
@@ -219,8 +240,15 @@ class XsdAttributeGroup(MutableMapping, XsdAnnotated):
       Content: (annotation?, ((attribute | attributeGroup)*, anyAttribute?))
     </attributeGroup>
     """
+    __slots__ = ('_attribute_group', 'base_attributes', 'derivation', 'required', '_decode_plan',
+                 'inline_attributes')
+
     def __init__(self, elem, schema, name=None, derivation=None,
                  base_attributes=None, is_global=False):
+        self._decode_plan = None
+        # If `False` the attributes are decoded calling the methods of the XSD attributes
+        # instead of the inlined code of the decode plan. It's cleared during the profiling.
+        self.inline_attributes = True
         self.derivation = derivation
         self._attribute_group = dict()
         self.base_attributes = base_attributes
@@ -269,10 +297,12 @@ class XsdAttributeGroup(MutableMapping, XsdAnnotated):
             self._attribute_group[key] = value
             if value.use == 'required':
                 self.required.add(key)
+        self._decode_plan = None
 
     def __delitem__(self, key):
         del self._attribute_group[key]
         self.required.discard(key)
+        self._decode_plan = None
 
     def __iter__(self):
         if None in self._attribute_group:
@@ -297,12 +327,14 @@ class XsdAttributeGroup(MutableMapping, XsdAnnotated):
             self.required = {
                 k for k, v in self.items() if k is not None and v.use == 'required'
             }
+            self._decode_plan = None
 
     def _parse(self):
         super(XsdAttributeGroup, self)._parse()
         elem = self.elem
         any_attribute = False
         self.clear()
+        self._decode_plan = None
         if self.base_attributes is not None:
             self._attribute_group.update(self.base_attributes.items())
 
@@ -371,51 +403,109 @@ class XsdAttributeGroup(MutableMapping, XsdAnnotated):
                     for obj in attr.iter_components(xsd_classes):
                         yield obj
 
+    def _get_decode_plan(self):
+        """
+        Returns the plan for decoding and validating the attributes of the instances,
+        compiled at the first use and kept until the group or the global maps change.
+        The plan is a couple with a dictionary and the number of required attributes.
+        The dictionary maps the admitted names to tuples (XSD attribute, required flag,
+        default, fixed, type), including the qualified names of the unqualified
+        attributes and the XSI attributes already found in the instances. The
+        anyAttribute wildcard, if any, is mapped by the `None` key.
+        """
+        version = self.maps.version
+        if self._decode_plan is not None and self._decode_plan[0] == version:
+            return self._decode_plan[1]
+
+        attributes = {None: self._attribute_group.get(None)}
+        for name, xsd_attribute in self._attribute_group.items():
+            if name is not None:
+                attributes[name] = (
+                    xsd_attribute, name in self.required, xsd_attribute.default,
+                    xsd_attribute.fixed, xsd_attribute.type
+                )
+
+        # Unqualified form lookups of the names in targetNamespace
+        for name, item in list(attributes.items()):
+            if name is not None and name[0] != '{':
+                attributes.setdefault(get_qname(self.target_namespace, name), (item[0], False) + item[2:])
+
+        plan = attributes, len(self.required)
+        self._decode_plan = version, plan
+        return plan
+
+    def _lookup_plan_item(self, attributes, name):
+        """Looks up and caches an XSI attribute in the decode plan, raises `KeyError` if not found."""
+        if get_namespace(name) != XSI_NAMESPACE_PATH:
+            raise KeyError(name)
+        try:
+            xsd_attribute = self.maps.lookup_attribute(name)
+        except LookupError:
+            raise KeyError(name)
+        item = attributes[name] = (xsd_attribute, False, xsd_attribute.default, xsd_attribute.fixed, xsd_attribute.type)
+        return item
+
     def iter_decode(self, attrs, validation='lax', **kwargs):
         result_list = []
-        required_attributes = self.required.copy()
+        attributes, required_count = self._get_decode_plan()
+        use_defaults = kwargs.get('use_defaults', True)
+
         for name, value in attrs.items():
             try:
-                xsd_attribute = self[name]
+                xsd_attribute, required, default, fixed, type_ = attributes[name]
             except KeyError:
-                if get_namespace(name) == XSI_NAMESPACE_PATH:
-                    try:
-                        xsd_attribute = self.maps.lookup_attribute(name)
-                    except LookupError:
-                        if validation != 'skip':
-                            error = XMLSchemaValidationError(
-                                self, attrs, "% is not an attribute of the XSI namespace." % name
-                            )
-                            if validation == 'strict':
-                                raise error
-                            yield error
-                        continue
-                else:
-                    try:
-                        xsd_attribute = self[None]  # None key ==> anyAttribute
-                        value = {name: value}
-                    except KeyError:
+                try:
+                    xsd_attribute, required, default, fixed, type_ = self._lookup_plan_item(attributes, name)
+                except KeyError:
+                    any_attribute = attributes[None]
+                    if get_namespace(name) == XSI_NAMESPACE_PATH:
                         if validation != 'skip':
                             error = XMLSchemaValidationError(
-                                self, attrs, "%r attribute not allowed for element." % name
+                                self, attrs, "%r is not an attribute of the XSI namespace." % name
                             )
                             if validation == 'strict':
                                 raise error
                             yield error
-                        continue
-            else:
-                required_attributes.discard(name)
+                    elif any_attribute is not None:
+                        for result in any_attribute.iter_decode_attribute(name, value, validation, **kwargs):
+                            if isinstance(result, XMLSchemaValidationError):
+                                yield result
+                            else:
+                                result_list.append((name, result))
+                                break
+                    elif validation != 'skip':
+                        error = XMLSchemaValidationError(
+                            self, attrs, "%r attribute not allowed for element." % name
+                        )
+                        if validation == 'strict':
+                            raise error
+                        yield error
+                    continue
 
-            for result in xsd_attribute.iter_decode(value, validation, **kwargs):
+            if required:
+                required_count -= 1
+
+            if not self.inline_attributes:
+                results = xsd_attribute.iter_decode(value, validation, **kwargs)
+            else:
+                # Inlined decoding of the XSD attribute
+                value, error = get_attribute_value(xsd_attribute, value, default, fixed, use_defaults)
+                if error is not None:
+                    if validation == 'strict':
+                        raise error
+                    yield error
+                results = type_.iter_decode(value, validation, **kwargs)
+
+            for result in results:
                 if isinstance(result, XMLSchemaValidationError):
                     yield result
                 else:
                     result_list.append((name, result))
                     break
 
-        if required_attributes:
+        if required_count:
             error = XMLSchemaValidationError(
-                self, attrs, "missing required attributes: %r" % required_attributes
+                self, attrs, "missing required attributes: %r" % self.required.difference(attrs)
             )
             if validation == 'strict':
                 raise error
@@ -423,6 +513,54 @@ class XsdAttributeGroup(MutableMapping, XsdAnnotated):
 
         yield result_list
 
+    def iter_validate(self, attrs, **kwargs):
+        """
+        Generator method for validating the attributes of an element. Yields the same
+        errors of a 'lax' decoding, without building the list of decoded attributes.
+        """
+        attributes, required_count = self._get_decode_plan()
+        use_defaults = kwargs.get('use_defaults', True)
+
+        for name, value in attrs.items():
+            try:
+                xsd_attribute, required, default, fixed, type_ = attributes[name]
+            except KeyError:
+                try:
+                    xsd_attribute, required, default, fixed, type_ = self._lookup_plan_item(attributes, name)
+                except KeyError:
+                    any_attribute = attributes[None]
+                    if get_namespace(name) == XSI_NAMESPACE_PATH:
+                        yield XMLSchemaValidationError(
+                            self, attrs, "%r is not an attribute of the XSI namespace." % name
+                        )
+                    elif any_attribute is not None:
+                        for result in any_attribute.iter_decode_attribute(name, value, 'lax', **kwargs):
+                            if isinstance(result, XMLSchemaValidationError):
+                                yield result
+                    else:
+                        yield XMLSchemaValidationError(self, attrs, "%r attribute not allowed for element." % name)
+                    continue
+
+            if required:
+                required_count -= 1
+
+            if not self.inline_attributes:
+                for error in xsd_attribute.iter_validate(value, **kwargs):
+                    yield error
+                continue
+
+            value, error = get_attribute_value(xsd_attribute, value, default, fixed, use_defaults)
+            if error is not None:
+                yield error
+
+            for error in type_.iter_validate(value, **kwargs):
+                yield error
+
+        if required_count:
+            yield XMLSchemaValidationError(
+                self, attrs, "missing required attributes: %r" % self.required.difference(attrs)
+            )
+
     def iter_encode(self, attributes, validation='lax', **kwargs):
         result_list = []
         required_attributes = self.required.copy()
@@ -441,7 +579,7 @@ class XsdAttributeGroup(MutableMapping, XsdAnnotated):
                         xsd_attribute = self.maps.lookup_attribute(name)
                     except LookupError:
                         error = XMLSchemaValidationError(
-                            self, attributes, "% is not an attribute of the XSI namespace." % name
+                            self, attributes, "%r is not an attribute of the XSI namespace." % name
                         )
                         if validation == 'strict':
                             raise error
@@ -19,7 +19,7 @@ from ..qnames import (
 )
 from .exceptions import XMLSchemaValidationError, XMLSchemaDecodeError
 from .parseutils import check_type, get_xsd_attribute, get_xsd_bool_attribute, get_xsd_derivation_attribute
-from .xsdbase import XsdAnnotated, ValidatorMixin
+from .xsdbase import XsdAnnotated, ValidatorMixin, NestedCall, iter_nested_calls
 from .attributes import XsdAttributeGroup
 from .simple_types import XsdSimpleType
 from .groups import XsdGroup
@@ -44,6 +44,8 @@ class XsdComplexType(XsdAnnotated, ValidatorMixin):
       ((group | all | choice | sequence)?, ((attribute | attributeGroup)*, anyAttribute?))))
     </complexType>
     """
+    __slots__ = ('attributes', 'base_type', 'content_type', 'derivation', 'mixed')
+
     def __init__(self, elem, schema, name=None, content_type=None, attributes=None,
                  derivation=None, mixed=None, is_global=False):
         self.derivation = derivation
@@ -451,6 +453,9 @@ class XsdComplexType(XsdAnnotated, ValidatorMixin):
         complex content, attributes) containing the decoded parts is returned, eventually
         preceded by a sequence of validation/decode errors.
         """
+        return iter_nested_calls(self._iter_decode(elem, validation, **kwargs))
+
+    def _iter_decode(self, elem, validation='lax', **kwargs):
         # Decode attributes
         for result in self.attributes.iter_decode(elem.attrib, validation, **kwargs):
             if isinstance(result, XMLSchemaValidationError):
@@ -479,11 +484,31 @@ class XsdComplexType(XsdAnnotated, ValidatorMixin):
                 yield None, None, attributes
         else:
             # Decode a complex content element
-            for result in self.content_type.iter_decode(elem, validation, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                else:
-                    yield None, result, attributes
+            results = yield NestedCall(self.content_type._iter_decode(elem, validation, **kwargs))
+            for result in results:
+                yield None, result, attributes
+
+    def iter_validate(self, elem, **kwargs):
+        """
+        Generator method for validating complexType elements. Yields the validation
+        errors of the attributes and of the content, without decoding them.
+        """
+        return iter_nested_calls(self._iter_validate(elem, **kwargs))
+
+    def _iter_validate(self, elem, **kwargs):
+        for error in self.attributes.iter_validate(elem.attrib, **kwargs):
+            yield error
+
+        if self.has_simple_content():
+            if len(elem):
+                yield self._validation_error("a simple content element can't has child elements.", 'lax', elem)
+
+            if elem.text is not None:
+                text = elem.text or kwargs.pop('default', '')
+                for error in self.content_type.iter_validate(text, **kwargs):
+                    yield error
+        else:
+            yield NestedCall(self.content_type._iter_validate(elem, **kwargs))
 
     def iter_encode(self, data, validation='lax', **kwargs):
         # Encode attributes
@@ -532,4 +557,4 @@ class Xsd11ComplexType(XsdComplexType):
       (group | all | choice | sequence)?, ((attribute | attributeGroup)*, anyAttribute?), assert*)))
     </complexType>
     """
-    pass
+    __slots__ = ()
@@ -38,6 +38,8 @@ XsdSelectorXPathParser = create_xpath_parser(
 
 class XsdSelector(XsdAnnotated):
 
+    __slots__ = ('_selector', 'path', 'xpath_default_namespace')
+
     def __init__(self, elem, schema):
         super(XsdSelector, self).__init__(elem, schema)
 
@@ -79,12 +81,16 @@ class XsdSelector(XsdAnnotated):
 
 class XsdFieldSelector(XsdSelector):
 
+    __slots__ = ()
+
     @property
     def admitted_tags(self):
         return {XSD_FIELD_TAG}
 
 
 class XsdConstraint(XsdAnnotated):
+    __slots__ = ('fields', 'parent', 'selector')
+
     def __init__(self, elem, schema, parent):
         super(XsdConstraint, self).__init__(elem, schema)
         self.parent = parent
@@ -201,6 +207,8 @@ class XsdConstraint(XsdAnnotated):
 
 class XsdUnique(XsdConstraint):
 
+    __slots__ = ()
+
     @property
     def admitted_tags(self):
         return {XSD_UNIQUE_TAG}
@@ -208,6 +216,8 @@ class XsdUnique(XsdConstraint):
 
 class XsdKey(XsdConstraint):
 
+    __slots__ = ()
+
     @property
     def admitted_tags(self):
         return {XSD_KEY_TAG}
@@ -215,6 +225,8 @@ class XsdKey(XsdConstraint):
 
 class XsdKeyref(XsdConstraint):
 
+    __slots__ = ('refer', 'refer_walk')
+
     def __init__(self, elem, schema, parent):
         self.refer = None
         self.refer_walk = None
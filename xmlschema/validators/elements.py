@@ -14,20 +14,20 @@ This module contains classes for XML Schema elements, complex types and model gr
 from collections import Sequence
 
 from ..compat import unicode_type
-from ..exceptions import XMLSchemaAttributeError
+from ..exceptions import XMLSchemaAttributeError, XMLSchemaValueError
 from ..etree import etree_element
 from ..converters import ElementData
 from ..qnames import (
     XSD_GROUP_TAG, XSD_SEQUENCE_TAG, XSD_ALL_TAG, XSD_CHOICE_TAG, XSD_ATTRIBUTE_GROUP_TAG,
     XSD_COMPLEX_TYPE_TAG, XSD_SIMPLE_TYPE_TAG, XSD_ALTERNATIVE_TAG, XSD_ELEMENT_TAG, XSD_ANY_TYPE,
-    XSD_UNIQUE_TAG, XSD_KEY_TAG, XSD_KEYREF_TAG, XSI_NIL, XSI_TYPE, reference_to_qname, get_qname
+    XSD_ANY_SIMPLE_TYPE, XSD_UNIQUE_TAG, XSD_KEY_TAG, XSD_KEYREF_TAG, XSI_NIL, XSI_TYPE, reference_to_qname, get_qname
 )
 from ..xpath import ElementPathMixin
 from .exceptions import (
     XMLSchemaValidationError, XMLSchemaParseError, XMLSchemaChildrenValidationError
 )
 from .parseutils import check_type, get_xsd_attribute, get_xsd_bool_attribute, get_xsd_derivation_attribute
-from .xsdbase import XsdAnnotated, ParticleMixin, ValidatorMixin
+from .xsdbase import XsdAnnotated, ParticleMixin, ValidatorMixin, NestedCall, iter_nested_calls
 from .simple_types import XsdSimpleType
 from .complex_types import XsdComplexType
 from .constraints import XsdUnique, XsdKey, XsdKeyref
@@ -59,7 +59,10 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
       Content: (annotation?, ((simpleType | complexType)?, (unique | key | keyref)*))
     </element>
     """
+    __slots__ = ('attributes', 'constraints', 'qualified', 'type', '_xsi_types')
+
     def __init__(self, elem, schema, name=None, is_global=False):
+        self._xsi_types = None
         super(XsdElement, self).__init__(elem, schema, name, is_global)
         if not hasattr(self, 'type'):
             raise XMLSchemaAttributeError("undefined 'type' attribute for %r." % self)
@@ -92,6 +95,7 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
     def __setattr__(self, name, value):
         if name == "type":
             check_type(value, XsdSimpleType, XsdComplexType, type(None))
+            self._xsi_types = None
             try:
                 self.attributes = value.attributes
             except AttributeError:
@@ -240,7 +244,7 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
                 error.schema_elem = self.type.elem
             else:
                 error.schema_elem = self.elem
-        return super(XsdElement, self)._validation_error(error, validation)
+        return super(XsdElement, self)._validation_error(error, validation, obj)
 
     @property
     def built(self):
@@ -312,11 +316,66 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
     def match(self, name):
         return self.name == name or not self.qualified and self.local_name == name
 
+    def get_xsi_type(self, value):
+        """
+        Resolves the value of an *xsi:type* attribute of an instance element. Returns a
+        couple with the type to use for the element and an error message, `None` if the
+        type can replace the declared type. The derivation from the declared type and
+        the blocked derivations are checked once, the accepted types are cached until the
+        global maps or the declared type change. The rejected values are not cached, so
+        the instances can't grow the cache beyond the number of the schema's types.
+
+        :param value: the *xsi:type* attribute value, a prefixed name that is resolved \
+        with the namespace map of the schema.
+        """
+        version = self.maps.version
+        if self._xsi_types is None or self._xsi_types[0] != version:
+            self._xsi_types = version, {}
+
+        try:
+            return self._xsi_types[1][value]
+        except KeyError:
+            result = self._resolve_xsi_type(value)
+            if result[1] is None:
+                self._xsi_types[1][value] = result
+            return result
+
+    def _resolve_xsi_type(self, value):
+        try:
+            type_ = self.maps.lookup_type(reference_to_qname(value, self.namespaces))
+        except (LookupError, XMLSchemaValueError):
+            return self.type, "unknown xsi:type %r." % value
+
+        base_type = self.type
+        if type_ is base_type:
+            return type_, None
+        elif base_type.name == XSD_ANY_SIMPLE_TYPE and not type_.is_complex() or \
+                type_ in getattr(base_type, 'member_types', ()):
+            return type_, None
+        elif base_type.name != XSD_ANY_TYPE and not type_.is_derived(base_type):
+            return self.type, "xsi:type %r is not derived from the type of the element." % value
+
+        blocked = set((self.block or self.schema.block_default).split())
+        if base_type.is_complex():
+            blocked.update(base_type.block.split())
+
+        if blocked:
+            xsd_type = type_
+            while xsd_type is not None and xsd_type is not base_type:
+                derivation = getattr(xsd_type, 'derivation', None) or 'restriction'
+                if derivation in blocked:
+                    return self.type, "xsi:type %r is blocked by a derivation by %s." % (value, derivation)
+                xsd_type = getattr(xsd_type, 'base_type', None)
+        return type_, None
+
     def iter_decode(self, elem, validation='lax', **kwargs):
         """
         Generator method for decoding elements. A data structure is returned, eventually
         preceded by a sequence of validation or decode errors.
         """
+        return iter_nested_calls(self._iter_decode(elem, validation, **kwargs))
+
+    def _iter_decode(self, elem, validation='lax', **kwargs):
         try:
             converter = kwargs['converter']
         except KeyError:
@@ -330,7 +389,9 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
 
         # Get the instance type: xsi:type or the schema's declaration
         if XSI_TYPE in elem.attrib:
-            type_ = self.maps.lookup_type(reference_to_qname(elem.attrib[XSI_TYPE], self.namespaces))
+            type_, reason = self.get_xsi_type(elem.attrib[XSI_TYPE])
+            if reason is not None and validation != 'skip':
+                yield self._validation_error(reason, validation, elem)
         else:
             type_ = self.type
 
@@ -348,12 +409,10 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
         if type_.is_complex():
             if use_defaults and type_.has_simple_content():
                 kwargs['default'] = self.default
-            for result in type_.iter_decode(elem, validation, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield self._validation_error(result, validation, elem)
-                else:
-                    yield converter.element_decode(ElementData(elem.tag, *result), self)
-                    del result
+            results = yield NestedCall(type_._iter_decode(elem, validation, **kwargs), self, validation, elem)
+            for result in results:
+                yield converter.element_decode(ElementData(elem.tag, *result), self)
+            del results
         else:
             # simpleType
             if not elem.attrib:
@@ -393,6 +452,52 @@ class XsdElement(Sequence, XsdAnnotated, ValidatorMixin, ParticleMixin, ElementP
                 for error in constraint(elem):
                     yield self._validation_error(error, validation)
 
+    def iter_validate(self, elem, **kwargs):
+        """
+        Generator method for validating elements. Yields the same errors of a 'lax'
+        decoding, without decoding the values and building the data structures.
+        """
+        return iter_nested_calls(self._iter_validate(elem, **kwargs))
+
+    def _iter_validate(self, elem, **kwargs):
+        use_defaults = kwargs.get('use_defaults', False)
+
+        # Get the instance type: xsi:type or the schema's declaration
+        if XSI_TYPE in elem.attrib:
+            type_, reason = self.get_xsi_type(elem.attrib[XSI_TYPE])
+            if reason is not None:
+                yield self._validation_error(reason, 'lax', elem)
+        else:
+            type_ = self.type
+
+        # The xsi:nil checks of iter_decode() raise errors only with 'strict' validation
+        if type_.is_complex():
+            if use_defaults and type_.has_simple_content():
+                kwargs['default'] = self.default
+            yield NestedCall(type_._iter_validate(elem, **kwargs), self, 'lax', elem)
+        else:
+            # simpleType
+            if elem.attrib:
+                for error in self.attributes.iter_validate(elem.attrib, **kwargs):
+                    yield self._validation_error(error, 'lax', elem)
+
+            if len(elem):
+                yield self._validation_error("a simpleType element can't has child elements.", 'lax', elem)
+
+            text = elem.text
+            if not text and use_defaults:
+                default = self.default
+                if default is not None:
+                    text = default
+
+            if text is not None:
+                for error in type_.iter_validate(text, **kwargs):
+                    yield self._validation_error(error, 'lax', elem)
+
+        for constraint in self.constraints.values():
+            for error in constraint(elem):
+                yield self._validation_error(error, 'lax')
+
     def iter_encode(self, data, validation='lax', **kwargs):
         element_encode_hook = kwargs.get('element_encode_hook')
         if element_encode_hook is None:
@@ -545,6 +650,8 @@ class Xsd11Element(XsdElement):
       Content: (annotation?, ((simpleType | complexType)?, alternative*, (unique | key | keyref)*))
     </element>
     """
+    __slots__ = ('alternatives',)
+
     def _parse(self):
         XsdAnnotated._parse(self)
         self._parse_attributes()
@@ -588,6 +695,8 @@ class XsdAlternative(XsdAnnotated):
       Content: (annotation?, (simpleType | complexType)?)
     </alternative>
     """
+    __slots__ = ()
+
     @property
     def admitted_tags(self):
         return {XSD_ELEMENT_TAG}
@@ -11,7 +11,7 @@
 """
 This module contains exception classes for the 'xmlschema.components' subpackage.
 """
-from ..compat import PY3
+from ..compat import PY3, unicode_type
 from ..exceptions import XMLSchemaException
 from ..etree import etree_tostring, etree_iselement
 from ..qnames import qname_to_prefixed
@@ -49,6 +49,7 @@ class XMLSchemaParseError(XMLSchemaException, ValueError):
 
 class XMLSchemaValidationError(XMLSchemaException, ValueError):
     """Raised when the XML data is not validated with the XSD component or schema."""
+    occurrences = 1  # Number of errors of the validator, greater than 1 for collapsed errors
 
     def __init__(self, validator, obj, reason=None, schema_elem=None, elem=None):
         self.validator = validator
@@ -66,6 +67,7 @@ class XMLSchemaValidationError(XMLSchemaException, ValueError):
         return u''.join([
             self.message or u"failed validating %r with %r.\n" % (self.obj, self.validator),
             u'\nReason: %s\n' % self.reason if self.reason is not None else '',
+            u'\nOccurrences: %d\n' % self.occurrences if self.occurrences > 1 else '',
             u"\nSchema:\n\n  %s\n" % etree_tostring(
                 self.schema_elem, max_lines=20
             ) if self.schema_elem is not None else '',
@@ -96,25 +98,158 @@ class XMLSchemaEncodeError(XMLSchemaValidationError):
         self.message = u"failed encoding %r with %r.\n" % (obj, validator)
 
 
-class XMLSchemaChildrenValidationError(XMLSchemaValidationError):
+def get_children_reason(namespaces, tag, child_tag, index, expected=None):
+    """
+    Formats the reason of a children validation error.
+
+    :param namespaces: the map used for prefixing the tags.
+    :param tag: the tag of the element.
+    :param child_tag: the tag of the unexpected child, `None` if the content is incomplete.
+    :param index: the index of the unexpected child.
+    :param expected: the expected tag or a list of expected tags.
+    """
+    elem_ref = qname_to_prefixed(tag, namespaces)
+    if child_tag is None:
+        reason = "The content of element %r is not complete." % elem_ref
+    else:
+        child_ref = qname_to_prefixed(child_tag, namespaces)
+        reason = "The child n.%d of element %r has a unexpected tag %r." % (index + 1, elem_ref, child_ref)
+
+    if isinstance(expected, (list, tuple)):
+        if len(expected) > 1:
+            reason += " One of %r is expected." % expected
+        else:
+            reason += " Tag %r expected." % expected[0]
+    elif expected is not None:
+        reason += " Tag %r expected." % expected
+    return reason
+
 
+class XMLSchemaChildrenValidationError(XMLSchemaValidationError):
+    """
+    Raised when the children of an element don't match the content model. The reason
+    is formatted only when it's accessed.
+    """
     def __init__(self, validator, elem, index, expected=None):
-        elem_ref = qname_to_prefixed(elem.tag, validator.namespaces)
         self.index = index
         self.expected = expected
-
-        if index >= len(elem):
-            reason = "The content of element %r is not complete." % elem_ref
+        self.tags = elem.tag, elem[index].tag if index < len(elem) else None
+        super(XMLSchemaChildrenValidationError, self).__init__(validator, elem)
+
+    @property
+    def reason(self):
+        if self._reason is None:
+            self._reason = get_children_reason(self.validator.namespaces, *self.tags, index=self.index,
+                                               expected=self.expected)
+        return self._reason
+
+    @reason.setter
+    def reason(self, value):
+        self._reason = value
+
+
+class ValidationErrorRecord(object):
+    """
+    A compact record of a validation error, that doesn't keep references to the
+    validated data. The record stores the XSD component, the path of the instance
+    element and the reason of the error. The messages are formatted only when the
+    record is converted to a string.
+
+    :param error: the :class:`XMLSchemaValidationError` instance.
+    :param path: the path steps of the instance element, a tuple of couples (tag, position), \
+    where the position is `None` for elements without siblings with the same tag.
+    :param namespaces: the map used for prefixing the tags of the path.
+    """
+    __slots__ = ('validator', 'error_class', 'path_steps', 'namespaces', 'value', 'occurrences', '_reason')
+
+    def __init__(self, error, path=None, namespaces=None):
+        self.validator = error.validator
+        self.error_class = error.__class__
+        self.path_steps = path
+        self.namespaces = namespaces
+        self.occurrences = error.occurrences
+        if isinstance(error, XMLSchemaChildrenValidationError) and error._reason is None:
+            self._reason = error.tags + (error.index, error.expected)
         else:
-            child_ref = qname_to_prefixed(elem[index].tag, validator.namespaces)
-            reason = "The child n.%d of element %r has a unexpected tag %r." % (index+1, elem_ref, child_ref)
-
-        if isinstance(expected, (list, tuple)):
-            if len(expected) > 1:
-                reason += " One of %r is expected." % expected
-            else:
-                reason += " Tag %r expected." % expected[0]
-        elif expected is not None:
-            reason += " Tag %r expected." % expected
-
-        super(XMLSchemaChildrenValidationError, self).__init__(validator, elem, reason)
+            self._reason = error.reason
+        self.value = error.obj if isinstance(error.obj, (str, bytes, unicode_type)) else None
+
+    def __repr__(self):
+        return u'%s(validator=%r, path=%r, reason=%r)' % (
+            self.__class__.__name__, self.validator, self.path, self.reason
+        )
+
+    def __str__(self):
+        # noinspection PyCompatibility,PyUnresolvedReferences
+        return unicode(self).encode("utf-8")
+
+    def __unicode__(self):
+        schema_elem = getattr(self.validator, 'elem', None)
+        return u''.join([
+            u"failed validating %r with %r.\n" % (self.value if self.path is None else self.path, self.validator),
+            u'\nReason: %s\n' % self.reason if self.reason is not None else '',
+            u'\nOccurrences: %d\n' % self.occurrences if self.occurrences > 1 else '',
+            u"\nSchema:\n\n  %s\n" % etree_tostring(schema_elem, max_lines=20) if schema_elem is not None else '',
+        ])
+
+    if PY3:
+        __str__ = __unicode__
+
+    @property
+    def reason(self):
+        if isinstance(self._reason, tuple):
+            return get_children_reason(getattr(self.validator, 'namespaces', None), *self._reason)
+        return self._reason
+
+    @property
+    def path(self):
+        """The path of the instance element, `None` if the error isn't related to an element."""
+        if self.path_steps is None:
+            return None
+        namespaces = self.namespaces
+        return u''.join(
+            u'/%s' % qname_to_prefixed(tag, namespaces) if pos is None else
+            u'/%s[%d]' % (qname_to_prefixed(tag, namespaces), pos) for tag, pos in self.path_steps
+        )
+
+
+def iter_error_records(errors, root=None, namespaces=None):
+    """
+    Converts validation errors to :class:`ValidationErrorRecord` instances.
+
+    :param errors: an iterable of :class:`XMLSchemaValidationError` instances.
+    :param root: the root of the validated tree, used for computing the paths of the \
+    instance elements. The parent map of the tree is built at the first error.
+    :param namespaces: the map used for prefixing the tags of the paths.
+    """
+    parent_map = None
+    steps = {}  # The path steps of the elements whose siblings have been examined
+    for error in errors:
+        elem = error.elem
+        if elem is None or root is None:
+            yield ValidationErrorRecord(error, namespaces=namespaces)
+            continue
+        elif parent_map is None:
+            parent_map = {child: e for e in root.iter() for child in e}
+
+        path = []
+        while elem is not None:
+            try:
+                path.append(steps[elem])
+            except KeyError:
+                parent = parent_map.get(elem)
+                if parent is None:
+                    steps[elem] = elem.tag, None
+                else:
+                    counters = {}
+                    for child in parent:
+                        counters[child.tag] = counters.get(child.tag, 0) + 1
+                    positions = {}
+                    for child in parent:
+                        positions[child.tag] = positions.get(child.tag, 0) + 1
+                        steps[child] = child.tag, positions[child.tag] if counters[child.tag] > 1 else None
+                path.append(steps[elem])
+            elem = parent_map.get(elem)
+
+        path.reverse()
+        yield ValidationErrorRecord(error, tuple(path), namespaces)
@@ -87,6 +87,8 @@ class XsdFacet(XsdAnnotated):
     """
     XML Schema constraining facets base class.
     """
+    __slots__ = ('base_type',)
+
     def __init__(self, base_type, elem, schema):
         super(XsdFacet, self).__init__(elem=elem, schema=schema)
         self.base_type = base_type
@@ -118,6 +120,7 @@ class XsdSingleFacet(XsdFacet):
     maxLength, minInclusive, minExclusive, maxInclusive, maxExclusive,
     totalDigits, fractionDigits.
     """
+    __slots__ = ('fixed', 'validator', 'value')
 
     def __init__(self, base_type, elem, schema):
         super(XsdSingleFacet, self).__init__(base_type, elem=elem, schema=schema)
@@ -268,6 +271,8 @@ class XsdSingleFacet(XsdFacet):
 
 class XsdEnumerationFacet(MutableSequence, XsdFacet):
 
+    __slots__ = ('_elements', 'enumeration')
+
     def __init__(self, base_type, elem, schema):
         XsdFacet.__init__(self, base_type, elem, schema=schema)
         self._elements = []
@@ -320,6 +325,8 @@ class XsdEnumerationFacet(MutableSequence, XsdFacet):
 
 class XsdPatternsFacet(MutableSequence, XsdFacet):
 
+    __slots__ = ('_elements', 'patterns', 'regexps')
+
     def __init__(self, base_type, elem, schema):
         XsdFacet.__init__(self, base_type, elem, schema=schema)
         self._elements = [elem]
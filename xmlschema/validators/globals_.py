@@ -13,22 +13,35 @@ This module contains functions and classes for managing namespaces's
 XSD declarations/definitions.
 """
 import re
+import logging
+from collections import namedtuple
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from ..compat import perf_counter
 from ..exceptions import XMLSchemaKeyError, XMLSchemaTypeError, XMLSchemaValueError
-from ..namespaces import XSD_NAMESPACE_PATH, URIDict
+from ..namespaces import XSD_NAMESPACE_PATH, XML_NAMESPACE_PATH, URIDict
+from ..etree import etree_get_namespaces
+from ..resources import load_xml_resource, normalize_url
 from ..qnames import (
     get_qname, local_name, reference_to_qname, XSD_INCLUDE_TAG, XSD_IMPORT_TAG,
     XSD_REDEFINE_TAG, XSD_NOTATION_TAG, XSD_SIMPLE_TYPE_TAG, XSD_COMPLEX_TYPE_TAG,
     XSD_GROUP_TAG, XSD_ATTRIBUTE_TAG, XSD_ATTRIBUTE_GROUP_TAG, XSD_ELEMENT_TAG,
     XSD_ANY_TYPE
 )
-from .exceptions import XMLSchemaParseError, XMLSchemaNotBuiltError
+from .exceptions import XMLSchemaParseError, XMLSchemaValidationError, XMLSchemaNotBuiltError
 from .parseutils import get_xsd_attribute
 from .xsdbase import XsdBaseComponent
 from . import (
-    XsdKeyref, XsdAnnotated, XsdAttribute, XsdSimpleType, XsdComplexType,
+    XsdKeyref, XsdConstraint, XsdAnnotated, XsdAttribute, XsdSimpleType, XsdComplexType,
     XsdElement, XsdAttributeGroup, XsdGroup, XsdNotation
 )
 
+logger = logging.getLogger('xmlschema')
+
 
 def camel_case_split(s):
     """
@@ -53,6 +66,42 @@ iterchildren_xsd_import = iterchildren_by_tag(XSD_IMPORT_TAG)
 iterchildren_xsd_include = iterchildren_by_tag(XSD_INCLUDE_TAG)
 iterchildren_xsd_redefine = iterchildren_by_tag(XSD_REDEFINE_TAG)
 
+# Attributes of XSD declarations that refer to global components
+XSD_REFERENCE_ATTRIBUTES = ('type', 'ref', 'base', 'itemType', 'memberTypes', 'substitutionGroup')
+
+
+def iter_xsd_references(elem, namespaces):
+    """
+    Generates the qualified names of the global components referred
+    by an XSD declaration/definition element and by its descendants.
+    """
+    for e in elem.iter():
+        for attr in XSD_REFERENCE_ATTRIBUTES:
+            try:
+                value = e.attrib[attr]
+            except KeyError:
+                continue
+            for ref in value.split():
+                try:
+                    yield reference_to_qname(ref, namespaces)
+                except XMLSchemaValueError:
+                    pass  # Wrong references are reported by the components
+
+
+def iter_xsd_sources(obj):
+    """
+    Generates the couples (elem, schema) of the sources of a global map item,
+    that can be a component, a couple or a list of them for redefinitions.
+    """
+    if isinstance(obj, tuple):
+        yield obj
+    elif isinstance(obj, list):
+        for item in obj:
+            for source in iter_xsd_sources(item):
+                yield source
+    elif getattr(obj, 'elem', None) is not None:
+        yield obj.elem, obj.schema
+
 
 #
 # Defines the load functions for XML Schema structures
@@ -98,6 +147,100 @@ load_xsd_groups = create_load_function(iterchildren_by_tag(XSD_GROUP_TAG))
 load_xsd_notations = create_load_function(iterchildren_by_tag(XSD_NOTATION_TAG))
 
 
+BuildPhase = namedtuple('BuildPhase', 'phase document time memory count')
+
+DOCUMENT_PHASES = ('load', 'meta_validation')
+
+
+def get_traced_memory():
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+
+
+class BuildStats(object):
+    """
+    Report of the phases of the construction of a set of schemas. Each record is a
+    :class:`BuildPhase` tuple with the name of the phase, the URL of the document
+    (`None` for the phases of the global maps), the wall time in seconds, the memory
+    delta in bytes (only if the memory allocations are traced with *tracemalloc*)
+    and an optional count of processed items.
+
+    The phases of the documents are *load* and *meta_validation*. The phases of the
+    global maps build are *load_globals* (indexing of global declarations),
+    *build_globals* (construction of global components), *expand_groups*
+    (construction of the elements declared inside model groups),
+    *substitution_groups*, *keyrefs* and *base_elements*.
+    """
+    def __init__(self):
+        self.records = []
+        self.components = {}
+
+    def __repr__(self):
+        return u'%s(time=%f, records=%d)' % (self.__class__.__name__, self.total_time, len(self.records))
+
+    def __str__(self):
+        return self.report()
+
+    @staticmethod
+    def start():
+        """Returns a start point, to be used for adding a record."""
+        return perf_counter(), get_traced_memory()
+
+    def add(self, phase, start, document=None, count=None):
+        """
+        Adds a record for a phase.
+
+        :param phase: the phase name.
+        :param start: the start point returned by :meth:`start`.
+        :param document: the URL of the document, for document phases.
+        :param count: an optional count of processed items.
+        """
+        start_time, start_memory = start
+        elapsed = perf_counter() - start_time
+        memory = get_traced_memory()
+        if memory is not None and start_memory is not None:
+            memory -= start_memory
+        self.records.append(BuildPhase(phase, document, elapsed, memory, count))
+
+    def clear_build(self):
+        """Removes the records of the global maps phases, keeping the document phases."""
+        self.records = [r for r in self.records if r.phase in DOCUMENT_PHASES]
+
+    @property
+    def total_time(self):
+        return sum(r.time for r in self.records)
+
+    def get_phase_times(self):
+        """Returns a dictionary with the total time spent for each phase."""
+        phase_times = {}
+        for record in self.records:
+            phase_times[record.phase] = phase_times.get(record.phase, 0.0) + record.time
+        return phase_times
+
+    def as_dict(self):
+        """Returns the report as a JSON serializable dictionary."""
+        return {
+            'total_time': self.total_time,
+            'phases': [r._asdict() for r in self.records],
+            'components': self.components,
+        }
+
+    def report(self):
+        """Returns the report as text."""
+        lines = ['%-20s %12s %12s %8s  %s' % ('phase', 'time', 'memory', 'count', 'document')]
+        for r in self.records:
+            lines.append('%-20s %12.6f %12s %8s  %s' % (
+                r.phase, r.time, '-' if r.memory is None else r.memory,
+                '-' if r.count is None else r.count, r.document or ''
+            ))
+        lines.append('%-20s %12.6f' % ('total', self.total_time))
+        for url in sorted(self.components, key=lambda x: x or ''):
+            lines.append('%s: %s' % (url, ', '.join(
+                '%s=%d' % item for item in sorted(self.components[url].items())
+            )))
+        return '\n'.join(lines)
+
+
 class XsdGlobals(XsdBaseComponent):
     """
     Mediator class for related XML schema instances. It stores the global
@@ -106,14 +249,26 @@ class XsdGlobals(XsdBaseComponent):
 
     :param validator: the XMLSchema class that have to be used for initializing \
     the object.
+    :param base: an optional built :class:`XsdGlobals` instance, usually the maps of \
+    the meta-schema, used as a read-only base layer. The global maps of the instance \
+    store only the new components, the lookups of missing names are delegated to the \
+    base maps, and the building process doesn't iterate over the components of the base.
     """
 
-    def __init__(self, validator):
+    def __init__(self, validator, base=None):
         super(XsdGlobals, self).__init__()
         self.validator = validator
+        self.base = base
+        self._version = 0    # Incremented at each change of the maps
+        self._built = None   # A couple (version, built status)
+        self._hold_parent_maps = False  # Caches the parent maps of the schemas during the build
+        self.build_stats = BuildStats()
 
         self.namespaces = URIDict()     # Registered schemas by namespace URI
         self.resources = URIDict()      # Registered schemas by resource URI
+        if base is not None:
+            self.namespaces.update((k, list(v)) for k, v in base.namespaces.items())
+            self.resources.update(base.resources)
 
         self.types = {}                 # Global types (both complex and simple)
         self.attributes = {}            # Global attributes
@@ -130,9 +285,9 @@ class XsdGlobals(XsdBaseComponent):
                             self.attribute_groups, self.groups, self.elements)
 
     def copy(self):
-        """Makes a copy of the object."""
-        obj = XsdGlobals(self.validator)
-        obj.namespaces.update(self.namespaces)
+        """Makes a copy of the object. A base layer is shared with the copy."""
+        obj = XsdGlobals(self.validator, self.base)
+        obj.namespaces.update((k, list(v)) for k, v in self.namespaces.items())
         obj.resources.update(self.resources)
         obj.types.update(self.types)
         obj.attributes.update(self.attributes)
@@ -150,38 +305,48 @@ class XsdGlobals(XsdBaseComponent):
     def __setattr__(self, name, value):
         if name == 'notations':
             self.lookup_notation = self._create_lookup_function(
-                value, XsdNotation, **{XSD_NOTATION_TAG: self.validator.BUILDERS.notation_class}
+                value, XsdNotation, self._get_base_lookup('lookup_notation'),
+                **{XSD_NOTATION_TAG: self.validator.BUILDERS.notation_class}
             )
         elif name == 'types':
             self.lookup_type = self._create_lookup_function(
-                value, (XsdSimpleType, XsdComplexType), **{
+                value, (XsdSimpleType, XsdComplexType), self._get_base_lookup('lookup_type'), **{
                     XSD_SIMPLE_TYPE_TAG: self.validator.BUILDERS.simple_type_factory,
                     XSD_COMPLEX_TYPE_TAG: self.validator.BUILDERS.complex_type_class
                 }
             )
         elif name == 'attributes':
             self.lookup_attribute = self._create_lookup_function(
-                value, XsdAttribute, **{XSD_ATTRIBUTE_TAG: self.validator.BUILDERS.attribute_class}
+                value, XsdAttribute, self._get_base_lookup('lookup_attribute'),
+                **{XSD_ATTRIBUTE_TAG: self.validator.BUILDERS.attribute_class}
             )
         elif name == 'attribute_groups':
             self.lookup_attribute_group = self._create_lookup_function(
-                value, XsdAttributeGroup,
+                value, XsdAttributeGroup, self._get_base_lookup('lookup_attribute_group'),
                 **{XSD_ATTRIBUTE_GROUP_TAG: self.validator.BUILDERS.attribute_group_class}
             )
         elif name == 'groups':
             self.lookup_group = self._create_lookup_function(
-                value, XsdGroup, **{XSD_GROUP_TAG: self.validator.BUILDERS.group_class}
+                value, XsdGroup, self._get_base_lookup('lookup_group'),
+                **{XSD_GROUP_TAG: self.validator.BUILDERS.group_class}
             )
         elif name == 'elements':
             self.lookup_element = self._create_lookup_function(
-                value, XsdElement, **{XSD_ELEMENT_TAG: self.validator.BUILDERS.element_class}
+                value, XsdElement, self._get_base_lookup('lookup_element'),
+                **{XSD_ELEMENT_TAG: self.validator.BUILDERS.element_class}
             )
         elif name == 'base_elements':
-            self.lookup_base_element = self._create_lookup_function(value, XsdElement)
+            self.lookup_base_element = self._create_lookup_function(
+                value, XsdElement, self._get_base_lookup('lookup_base_element')
+            )
         super(XsdGlobals, self).__setattr__(name, value)
 
+    def _get_base_lookup(self, name):
+        base = getattr(self, 'base', None)
+        return getattr(base, name) if base is not None else None
+
     @staticmethod
-    def _create_lookup_function(global_map, xsd_classes, **tag_map):
+    def _create_lookup_function(global_map, xsd_classes, base_lookup=None, **tag_map):
         if isinstance(xsd_classes, tuple):
             types_desc = ' or '.join([c.__name__ for c in xsd_classes])
         else:
@@ -191,6 +356,8 @@ class XsdGlobals(XsdBaseComponent):
             try:
                 obj = global_map[qname]
             except KeyError:
+                if base_lookup is not None:
+                    return base_lookup(qname)
                 raise XMLSchemaKeyError("missing a %s object for %r!" % (types_desc, qname))
             else:
                 if isinstance(obj, xsd_classes):
@@ -234,8 +401,27 @@ class XsdGlobals(XsdBaseComponent):
                     )
         return lookup
 
+    @property
+    def version(self):
+        """
+        A number that changes at every change of the maps, including the changes
+        of the base maps. Can be used as a key for caching data computed from the maps.
+        """
+        if self.base is None:
+            return self._version
+        return self._version + self.base.version
+
+    def _changed(self):
+        self._version += 1
+
     @property
     def built(self):
+        version = self.version
+        if self._built is None or self._built[0] != version:
+            self._built = version, self._check_built()
+        return self._built[1]
+
+    def _check_built(self):
         if not self.namespaces:
             return False
         xsd_global = None
@@ -244,7 +430,9 @@ class XsdGlobals(XsdBaseComponent):
                 return False
             if not xsd_global.built:
                 return False
-        if xsd_global is not None:
+        if self.base is not None:
+            return self.base.built
+        elif xsd_global is not None:
             return True
         else:
             return False
@@ -284,7 +472,8 @@ class XsdGlobals(XsdBaseComponent):
 
     def iter_globals(self):
         """
-        Creates an iterator for XSD global definitions/declarations.
+        Creates an iterator for XSD global definitions/declarations,
+        excluding the ones of the base maps.
         """
         for global_map in self.global_maps:
             for obj in global_map.values():
@@ -294,6 +483,7 @@ class XsdGlobals(XsdBaseComponent):
         """
         Registers an XMLSchema instance.
         """
+        self._changed()
         if schema.url:
             if schema.url not in self.resources:
                 self.resources[schema.url] = schema
@@ -315,6 +505,7 @@ class XsdGlobals(XsdBaseComponent):
         Clears the instance maps, removing also all the registered schemas
         and cleaning the cache.
         """
+        self._changed()
         for global_map in self.global_maps:
             global_map.clear()
         self.base_elements.clear()
@@ -336,18 +527,45 @@ class XsdGlobals(XsdBaseComponent):
             raise XMLSchemaValueError(
                 "%r: %r namespace is not registered." % (self, XSD_NAMESPACE_PATH))
 
-        not_built_schemas = [schema for schema in self.iter_schemas() if not schema.built]
+        not_built_schemas = [
+            schema for schema in self.iter_schemas()
+            if (self.base is None or schema.maps is not self.base) and not schema.built
+        ]
+        dropped_schemas = [schema for schema in not_built_schemas if schema._source_dropped]
+        self._reload_sources(dropped_schemas)
 
         # Load and build global declarations
-        load_xsd_notations(self.notations, not_built_schemas)
-        load_xsd_simple_types(self.types, not_built_schemas)
-        load_xsd_attributes(self.attributes, not_built_schemas)
-        load_xsd_attribute_groups(self.attribute_groups, not_built_schemas)
-        load_xsd_complex_types(self.types, not_built_schemas)
-        load_xsd_elements(self.elements, not_built_schemas)
-        load_xsd_groups(self.groups, not_built_schemas)
-
-        if not meta_schema.built:
+        self.build_stats.clear_build()
+        start = self.build_stats.start()
+        self._load_globals(self, not_built_schemas)
+        self.build_stats.add('load_globals', start, count=len(not_built_schemas))
+        self._build_globals(meta_schema)
+        if dropped_schemas:
+            dropped_schemas[0].drop_sources()
+
+    @staticmethod
+    def _reload_sources(schemas):
+        """Loads again the XSD sources of schemas whose sources have been dropped."""
+        sources = [schema._reload_source() for schema in schemas]
+        for schema, (root, text) in zip(schemas, sources):
+            schema.root = root
+            schema.text = text
+            schema._source_dropped = False
+
+    @staticmethod
+    def _load_globals(xsd_globals, schemas):
+        load_xsd_notations(xsd_globals.notations, schemas)
+        load_xsd_simple_types(xsd_globals.types, schemas)
+        load_xsd_attributes(xsd_globals.attributes, schemas)
+        load_xsd_attribute_groups(xsd_globals.attribute_groups, schemas)
+        load_xsd_complex_types(xsd_globals.types, schemas)
+        load_xsd_elements(xsd_globals.elements, schemas)
+        load_xsd_groups(xsd_globals.groups, schemas)
+
+    def _build_globals(self, meta_schema):
+        build_stats = self.build_stats
+        start = build_stats.start()
+        if self.base is None and not meta_schema.built:
             meta_schema.BUILDERS.builtin_types_factory(meta_schema, self.types)
 
         for qname in self.notations:
@@ -363,7 +581,11 @@ class XsdGlobals(XsdBaseComponent):
         for qname in self.groups:
             self.lookup_group(qname)
 
+        build_stats.add('build_globals', start, count=sum(len(m) for m in self.global_maps))
+
         # Builds element declarations inside model groups.
+        start = build_stats.start()
+        count = 0
         element_class = meta_schema.BUILDERS.element_class
         group_class = meta_schema.BUILDERS.group_class
         for xsd_global in self.iter_globals():
@@ -376,29 +598,210 @@ class XsdGlobals(XsdBaseComponent):
                             obj[k] = group_class(elem, schema, mixed=obj.mixed, is_global=is_global)
                         else:
                             obj[k] = element_class(elem, schema)
+                        count += 1
+        build_stats.add('expand_groups', start, count=count)
 
         # Build substitution groups from global element declarations
+        start = build_stats.start()
         self.substitution_groups.clear()
         for xsd_element in self.elements.values():
             if xsd_element.substitution_group:
                 qname = reference_to_qname(xsd_element.substitution_group, xsd_element.schema.namespaces)
                 if xsd_element.type.name == XSD_ANY_TYPE and 'type' not in xsd_element.elem.attrib:
-                    xsd_element.type = self.elements[qname].type
+                    xsd_element.type = self.lookup_element(qname).type
                 try:
                     self.substitution_groups[qname].add(xsd_element)
                 except KeyError:
                     self.substitution_groups[qname] = {xsd_element}
 
-        # Set referenced key/unique constraints for keyrefs
-        for xsd_global in self.iter_globals():
-            for constraint in xsd_global.iter_components(XsdKeyref):
-                constraint.parse_refer()
+        build_stats.add('substitution_groups', start, count=len(self.substitution_groups))
+
+        # Set referenced key/unique constraints for keyrefs. The parent maps are
+        # computed once also for the schemas that don't keep their sources.
+        start = build_stats.start()
+        count = 0
+        self._hold_parent_maps = True
+        try:
+            for xsd_global in self.iter_globals():
+                for constraint in xsd_global.iter_components(XsdKeyref):
+                    constraint.parse_refer()
+                    count += 1
+        finally:
+            self._hold_parent_maps = False
+            for schema in self.iter_schemas():
+                if schema.maps is self and not schema.keep_source:
+                    schema._parent_map = None
+        build_stats.add('keyrefs', start, count=count)
 
         # Rebuild base_elements
+        start = build_stats.start()
         self.base_elements.clear()
         self.base_elements.update(self.elements)
         for group in self.groups.values():
             self.base_elements.update({e.name: e for e in group.iter_elements()})
+        build_stats.add('base_elements', start, count=len(self.base_elements))
+
+        build_stats.components = self._count_components()
+        logger.debug("build report of %r:\n%s", self, build_stats, extra={'build_stats': build_stats})
 
+        self._changed()
         if not self.built:
             raise XMLSchemaNotBuiltError("Global map %r not built!" % self)
+
+    def _count_components(self):
+        """Counts the global declarations and all the components of each document."""
+        counters = {}
+        names = ('notations', 'types', 'attributes', 'attribute_groups', 'groups', 'elements')
+        for name, global_map in zip(names, self.global_maps):
+            for obj in global_map.values():
+                try:
+                    url = obj.schema.url
+                except AttributeError:
+                    continue
+                try:
+                    counter = counters[url]
+                except KeyError:
+                    counter = counters[url] = {'components': 0}
+                counter[name] = counter.get(name, 0) + 1
+                counter['components'] += sum(1 for _ in obj.iter_components())
+        return counters
+
+    def rebuild(self, changed_urls):
+        """
+        Rebuilds the global maps after changes of some registered schema documents.
+        The changed documents are loaded again and their global components are
+        rebuilt, together with the global components that depend on them, directly
+        or through other components. The other components are left untouched.
+        If a schema with redefinitions is involved, or if the XSD sources have
+        been dropped, all the non meta-schema components are rebuilt.
+
+        :param changed_urls: the URLs of the changed schema documents.
+        :raises: :exc:`XMLSchemaValueError` if an URL doesn't belong to a registered \
+        schema or if a document changes its target namespace, includes or imports. \
+        In these cases a new schema instance has to be created.
+        """
+        try:
+            meta_schema = self.namespaces[XSD_NAMESPACE_PATH][0]
+        except KeyError:
+            raise XMLSchemaValueError(
+                "%r: %r namespace is not registered." % (self, XSD_NAMESPACE_PATH))
+
+        schemas = [s for s in self.iter_schemas() if s.meta_schema is not None]
+        changed_schemas = []
+        for url in changed_urls:
+            url = normalize_url(url)
+            for schema in schemas:
+                if schema.url is not None and normalize_url(schema.url) == url:
+                    changed_schemas.append(schema)
+                    break
+            else:
+                raise XMLSchemaValueError("%r: %r is not a registered schema resource." % (self, url))
+
+        self._changed()
+        self.build_stats.clear_build()
+
+        # Load the changed documents and check that their structure doesn't change
+        sources = []
+        for schema in changed_schemas:
+            schema.resolver.clear()
+            root, text, _ = load_xml_resource(schema.url, False, schema.resolver)
+            if root.get('targetNamespace', '') != schema.target_namespace or \
+                    self._get_composition(root) != self._get_composition(schema.root):
+                raise XMLSchemaValueError(
+                    "%r: namespace, includes or imports of %r are changed, a new schema is required." % (
+                        self, schema.url
+                    ))
+            sources.append((root, text))
+
+        # The sources of the unchanged documents are needed for loading the global declarations.
+        # The dropped sources have lost the references between the components, so in this case
+        # all the non meta-schema components are rebuilt.
+        dropped_schemas = [s for s in schemas if s._source_dropped]
+        self._reload_sources([s for s in dropped_schemas if s not in changed_schemas])
+
+        # Seeds are the global components declared in the changed documents, before and after the change
+        seeds = set()
+        for global_map in self.global_maps:
+            for qname, obj in global_map.items():
+                if any(schema in changed_schemas for _, schema in iter_xsd_sources(obj)):
+                    seeds.add(qname)
+
+        for schema, (root, text) in zip(changed_schemas, sources):
+            schema.root = root
+            schema.text = text
+            schema.namespaces = {'xml': XML_NAMESPACE_PATH}
+            schema.namespaces.update(etree_get_namespaces(text))
+            if '' not in schema.namespaces:
+                schema.namespaces[''] = schema.target_namespace
+            schema._parent_map = None
+            schema._source_dropped = False
+            schema.errors[:] = [e for e in schema.errors if not isinstance(e, XMLSchemaValidationError)]
+            if schema.validation == 'strict' and not schema.trusted:
+                schema.check_schema(root)
+            elif schema.validation == 'lax' and not schema.trusted:
+                schema.errors.extend([e for e in meta_schema.iter_errors(root)])
+
+        # Loads the global declarations of the schemas into a new unbuilt map
+        loaded_globals = XsdGlobals(self.validator)
+        self._load_globals(loaded_globals, schemas)
+        for global_map in loaded_globals.global_maps:
+            seeds.update(qname for qname, obj in global_map.items()
+                         if any(schema in changed_schemas for _, schema in iter_xsd_sources(obj)))
+
+        # Dependency graph between global components (reversed)
+        if dropped_schemas or \
+                any(any(True for _ in iterchildren_xsd_redefine(schema.root)) for schema in schemas):
+            affected = set(qname for global_map in loaded_globals.global_maps for qname in global_map)
+        else:
+            dependants = {}
+            for global_map in self.global_maps:
+                for qname, obj in global_map.items():
+                    for elem, schema in iter_xsd_sources(obj):
+                        if schema.meta_schema is None or schema in changed_schemas:
+                            continue
+                        for ref in iter_xsd_references(elem, schema.namespaces):
+                            try:
+                                dependants[ref].add(qname)
+                            except KeyError:
+                                dependants[ref] = {qname}
+
+            affected = set(seeds)
+            qnames = list(seeds)
+            while qnames:
+                for qname in dependants.get(qnames.pop(), ()):
+                    if qname not in affected:
+                        affected.add(qname)
+                        qnames.append(qname)
+
+        # Replaces the affected components with their unbuilt declarations
+        for global_map, loaded_map in zip(self.global_maps, loaded_globals.global_maps):
+            for qname in affected:
+                try:
+                    obj = global_map.pop(qname)
+                except KeyError:
+                    pass
+                else:
+                    if isinstance(obj, XsdBaseComponent):
+                        for constraint in obj.iter_components(XsdConstraint):
+                            self.constraints.pop(constraint.name, None)
+                try:
+                    global_map[qname] = loaded_map[qname]
+                except KeyError:
+                    pass
+
+        # Keyrefs have to find again the referenced constraints
+        for xsd_global in self.iter_globals():
+            if isinstance(xsd_global, XsdBaseComponent):
+                for constraint in xsd_global.iter_components(XsdKeyref):
+                    if isinstance(constraint.refer, XsdConstraint):
+                        constraint.refer = constraint.refer.name
+                        constraint.refer_walk = None
+
+        self._build_globals(meta_schema)
+        if dropped_schemas:
+            dropped_schemas[0].drop_sources()
+
+    @staticmethod
+    def _get_composition(root):
+        return [(e.tag, e.get('namespace'), e.get('schemaLocation')) for e in root
+                if e.tag in (XSD_INCLUDE_TAG, XSD_IMPORT_TAG, XSD_REDEFINE_TAG)]
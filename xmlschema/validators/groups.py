@@ -27,7 +27,7 @@ from .exceptions import (
     XMLSchemaValidationError, XMLSchemaParseError, XMLSchemaEncodeError,
     XMLSchemaNotBuiltError, XMLSchemaChildrenValidationError
 )
-from .xsdbase import ValidatorMixin, XsdAnnotated, ParticleMixin
+from .xsdbase import ValidatorMixin, XsdAnnotated, ParticleMixin, NestedCall, iter_nested_calls
 from .wildcards import XsdAnyElement
 
 XSD_MODEL_GROUP_TAGS = {XSD_GROUP_TAG, XSD_SEQUENCE_TAG, XSD_ALL_TAG, XSD_CHOICE_TAG}
@@ -72,8 +72,11 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
       Content: (annotation?, (element | group | choice | sequence | any)*)
     </sequence>
     """
+    __slots__ = ('_group', 'mixed', 'model', '_all_slots')
+
     def __init__(self, elem, schema, name=None, model=None, mixed=False,
                  initlist=None, is_global=False):
+        self._all_slots = None
         self.model = model
         self.mixed = mixed
         self._group = []
@@ -99,9 +102,11 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
     def __setitem__(self, i, item):
         check_type(item, ParticleMixin)
         self._group[i] = item
+        self._all_slots = None
 
     def __delitem__(self, i):
         del self._group[i]
+        self._all_slots = None
 
     def __len__(self):
         return len(self._group)
@@ -109,6 +114,7 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
     def insert(self, i, item):
         check_type(item, tuple, ParticleMixin)
         self._group.insert(i, item)
+        self._all_slots = None
 
     def __setattr__(self, name, value):
         if name == 'model':
@@ -244,6 +250,7 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
 
     def clear(self):
         del self._group[:]
+        self._all_slots = None
 
     def is_empty(self):
         return not self.mixed and not self
@@ -268,6 +275,9 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
         (key, decoded data, decoder) is returned, eventually preceded by a sequence
         of validation/decode errors.
         """
+        return iter_nested_calls(self._iter_decode(elem, validation, **kwargs))
+
+    def _iter_decode(self, elem, validation='lax', **kwargs):
         def not_whitespace(s):
             return s is not None and s.strip()
 
@@ -306,11 +316,11 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
                     elif isinstance(obj, tuple):
                         xsd_element, child = obj
                         if xsd_element is not None:
-                            for result in xsd_element.iter_decode(child, validation, **kwargs):
-                                if isinstance(result, XMLSchemaValidationError):
-                                    yield self._validation_error(result, validation)
-                                else:
-                                    result_list.append((child.tag, result, xsd_element))
+                            results = yield NestedCall(
+                                xsd_element._iter_decode(child, validation, **kwargs), self, validation
+                            )
+                            for result in results:
+                                result_list.append((child.tag, result, xsd_element))
                             if cdata_index and child.tail is not None:
                                 tail = unicode_type(child.tail.strip())
                                 if tail:
@@ -339,11 +349,11 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
                 for index in range(start_index, len(elem)):
                     for xsd_element in self.iter_elements():
                         if xsd_element.match(elem[index].tag):
-                            for result in xsd_element.iter_decode(elem[index], validation, **kwargs):
-                                if isinstance(result, XMLSchemaValidationError):
-                                    yield self._validation_error(result, validation)
-                                else:
-                                    result_list.append((elem[index].tag, result, xsd_element))
+                            results = yield NestedCall(
+                                xsd_element._iter_decode(elem[index], validation, **kwargs), self, validation
+                            )
+                            for result in results:
+                                result_list.append((elem[index].tag, result, xsd_element))
                             if cdata_index and elem[index].tail is not None:
                                 tail = unicode_type(elem[index].tail.strip())
                                 if tail:
@@ -366,6 +376,76 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
 
         yield result_list
 
+    def iter_validate(self, elem, **kwargs):
+        """
+        Generator method for validating complex content elements. Yields the same errors
+        of a 'lax' decoding, without collecting the decoded children and character data.
+        """
+        return iter_nested_calls(self._iter_validate(elem, **kwargs))
+
+    def _iter_validate(self, elem, **kwargs):
+        def not_whitespace(s):
+            return s is not None and s.strip()
+
+        if not self.mixed:
+            # Validate character data between tags
+            if not_whitespace(elem.text) or any([not_whitespace(child.tail) for child in elem]):
+                if len(self) == 1 and isinstance(self[0], XsdAnyElement):
+                    pass  # [XsdAnyElement()] is equivalent to an empty complexType declaration
+                else:
+                    cdata_msg = "character data between child elements not allowed!"
+                    yield self._validation_error(cdata_msg, 'lax', obj=elem)
+
+        if len(elem):
+            # Validate child elements
+            index = 0
+            child = None
+            while index < len(elem):
+                obj = index
+                for obj in self.iter_decode_children(elem, index, 'lax'):
+                    if isinstance(obj, XMLSchemaValidationError):
+                        yield self._validation_error(obj, 'lax')
+                        try:
+                            child = elem[getattr(obj, 'index')]
+                        except (AttributeError, IndexError):
+                            pass
+                    elif isinstance(obj, tuple):
+                        xsd_element, child = obj
+                        if xsd_element is not None:
+                            yield NestedCall(xsd_element._iter_validate(child, **kwargs), self)
+                    elif obj < index:
+                        raise XMLSchemaValueError("returned a lesser index, this is a bug!")
+                    else:
+                        # obj is the last index used by inner validators
+                        index = obj + 1
+                        break
+                else:
+                    if isinstance(obj, XMLSchemaValidationError):
+                        raise XMLSchemaTypeError(
+                            "the iteration cannot ends with a validation error, an integer expected.")
+                    break
+
+            if elem[-1] is not child:
+                # residual content not validated by the model: generate an error and validate the matching children
+                start_index = 0 if child is None else etree_child_index(elem, child) + 1
+                if self:
+                    yield self._validation_error(XMLSchemaChildrenValidationError(self, elem, start_index), 'lax')
+
+                for index in range(start_index, len(elem)):
+                    for xsd_element in self.iter_elements():
+                        if xsd_element.match(elem[index].tag):
+                            yield NestedCall(xsd_element._iter_validate(elem[index], **kwargs), self)
+                            break
+                    else:
+                        if self and index > start_index:
+                            yield self._validation_error(XMLSchemaChildrenValidationError(self, elem, index), 'lax')
+
+        elif not self.is_emptiable():
+            # no child elements: generate errors if the model is not emptiable
+            expected = [e.prefixed_name for e in self.iter_elements() if e.min_occurs]
+            error = XMLSchemaChildrenValidationError(self, elem, 0, expected=expected)
+            yield self._validation_error(error, 'lax')
+
     def iter_encode(self, data, validation='lax', **kwargs):
         children = []
         level = kwargs.get('level', 0)
@@ -416,6 +496,48 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
                 text = text[:-indent]
         yield text, children
 
+    def _get_all_slots(self):
+        """
+        Returns the data for matching the children of an 'all' model group, a tuple
+        with the following items:
+
+          * a dictionary that maps each admitted tag to a tuple with the bit of the \
+          member, the matching XSD element and the member, that is the head element \
+          for the tags of its substitution group;
+          * a list of couples (bit, member) for the wildcards of the group;
+          * the bitmask of the required members;
+          * the bitmask of the members that admit more than one occurrence or that \
+          require more than one occurrence.
+
+        The data is cached until the group or the global maps are changed.
+        """
+        version = self.maps.version
+        if self._all_slots is not None and self._all_slots[0] == version:
+            return self._all_slots[1]
+
+        tags = {}
+        wildcards = []
+        required = multiple = 0
+        for k, member in enumerate(self):
+            bit = 1 << k
+            if member.min_occurs:
+                required |= bit
+            if member.max_occurs != 1 or member.min_occurs > 1:
+                multiple |= bit
+            if isinstance(member, XsdAnyElement):
+                wildcards.append((bit, member))
+                continue
+
+            tags.setdefault(member.name, (bit, member, member))
+            if not member.qualified:
+                tags.setdefault(get_qname(member.target_namespace, member.name), (bit, member, member))
+            for xsd_element in self.maps.substitution_groups.get(member.name, ()):
+                tags.setdefault(xsd_element.name, (bit, xsd_element, member))
+
+        all_slots = tags, wildcards, required, multiple
+        self._all_slots = version, all_slots
+        return all_slots
+
     def iter_decode_children(self, elem, index=0, validation='lax'):
         if not len(self):
             return  # Skip empty groups!
@@ -439,26 +561,48 @@ class XsdGroup(MutableSequence, XsdAnnotated, ValidatorMixin, ParticleMixin):
                             child_index = obj
 
             elif self.model == XSD_ALL_TAG:
-                elements = [e for e in self]
-                while elements:
-                    for item in elements:
-                        for obj in item.iter_decode_children(elem, child_index, validation='lax'):
-                            if isinstance(obj, tuple):
-                                yield obj
-                            elif isinstance(obj, int):
-                                child_index = obj
+                # The children are matched in any order with a map from tags to the members,
+                # the members that reached their maxOccurs and the ones that satisfied their
+                # minOccurs are tracked with two bitsets.
+                tags, wildcards, required, multiple = self._get_all_slots()
+                full = seen = 0
+                counts = {}
+                while child_index < len(elem):
+                    tag = elem[child_index].tag
+                    try:
+                        bit, xsd_element, member = tags[tag]
+                    except KeyError:
+                        for bit, member in wildcards:
+                            if not full & bit and member.match(tag):
+                                xsd_element = member
                                 break
                         else:
-                            continue
+                            break
+
+                    if full & bit:
                         break
+                    elif multiple & bit:
+                        counts[bit] = occurs = counts.get(bit, 0) + 1
+                        if occurs >= member.min_occurs:
+                            seen |= bit
+                        if member.max_occurs is not None and occurs >= member.max_occurs:
+                            full |= bit
                     else:
-                        if self.min_occurs > model_occurs:
-                            yield XMLSchemaChildrenValidationError(
-                                self, elem, child_index, expected=[e.prefixed_name for e in elements]
-                            )
-                        yield index
-                        return
-                    elements.remove(item)
+                        full |= bit
+                        seen |= bit
+
+                    yield xsd_element, elem[child_index]
+                    child_index += 1
+
+                missing = required & ~seen
+                if missing:
+                    if validation != 'skip' and (child_index > index or self.min_occurs > model_occurs):
+                        yield XMLSchemaChildrenValidationError(
+                            self, elem, child_index,
+                            expected=[e.prefixed_name for k, e in enumerate(self) if missing & 1 << k]
+                        )
+                    yield child_index  # the matched children are consumed, also if the content is incomplete
+                    return
 
             elif self.model == XSD_CHOICE_TAG:
                 matched_choice = False
@@ -510,4 +654,4 @@ class Xsd11Group(XsdGroup):
       Content: (annotation?, (element | any | group)*)
     </all>
     """
-    pass
+    __slots__ = ()
@@ -25,6 +25,8 @@ class XsdNotation(XsdAnnotated):
       Content: (annotation?)
     </notation>
     """
+    __slots__ = ()
+
     def __init__(self, elem, schema, is_global=True):
         super(XsdNotation, self).__init__(elem, schema, is_global=is_global)
 
@@ -12,23 +12,33 @@
 This module contains XMLSchema class creator for xmlschema package.
 """
 import os.path
-from collections import namedtuple
+import hashlib
+import threading
+from collections import namedtuple, OrderedDict
+from multiprocessing.pool import ThreadPool
 
+from ..compat import unicode_type
 from ..exceptions import (
     XMLSchemaTypeError, XMLSchemaURLError, XMLSchemaValueError
 )
 from ..namespaces import (
     XSD_NAMESPACE_PATH, XML_NAMESPACE_PATH, HFP_NAMESPACE_PATH, XSI_NAMESPACE_PATH, XLINK_NAMESPACE_PATH
 )
-from ..etree import etree_get_namespaces, etree_register_namespace, etree_iselement
+from ..etree import (
+    etree_element, etree_get_namespaces, etree_register_namespaces, etree_iselement, etree_fromstring,
+    etree_parse_error
+)
 
 from ..namespaces import NamespaceResourcesMap, NamespaceView
-from ..qnames import XSD_SCHEMA_TAG
-from ..resources import fetch_resource, load_xml_resource, iter_schema_location_hints
+from ..qnames import XSD_SCHEMA_TAG, XSD_INCLUDE_TAG, XSD_IMPORT_TAG, XSD_REDEFINE_TAG
+from ..resources import fetch_resource, load_xml_resource, iter_schema_location_hints, XMLResourceResolver
 from ..converters import XSD_VALIDATION_MODES, XMLSchemaConverter
 from ..xpath import ElementPathMixin, relative_path
+from ..generators import XMLInstanceGenerator
+from ..profiling import XMLSchemaProfiler
 from .exceptions import (
-    XMLSchemaParseError, XMLSchemaValidationError, XMLSchemaEncodeError, XMLSchemaNotBuiltError
+    XMLSchemaParseError, XMLSchemaValidationError, XMLSchemaEncodeError, XMLSchemaNotBuiltError,
+    iter_error_records
 )
 from .parseutils import check_value, has_xsd_components, get_xsd_derivation_attribute
 from .xsdbase import XsdBaseComponent, ValidatorMixin
@@ -38,7 +48,7 @@ from . import (
     xsd_build_any_content_group, xsd_build_any_attribute_group, XsdAnnotated
 )
 from .globals_ import (
-    XsdGlobals, iterchildren_xsd_import, iterchildren_xsd_include, iterchildren_xsd_redefine
+    XsdGlobals, BuildStats, iterchildren_xsd_import, iterchildren_xsd_include, iterchildren_xsd_redefine
 )
 
 DEFAULT_BUILDERS = {
@@ -72,6 +82,52 @@ BASE_SCHEMAS = {
 }
 
 
+class MetaValidationRegistry(object):
+    """
+    A registry of schema documents that are valid against the meta-schema, keyed
+    by a hash of their content and by the XSD version. Schemas that are found in
+    the registry are not validated again. If a file path is provided the registry
+    is persistent: the file is loaded at creation and the new entries are appended.
+
+    :param path: an optional file path for storing the registry.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self._keys = set()
+        self._lock = threading.Lock()
+        if path is not None and os.path.isfile(path):
+            with open(path) as fp:
+                self._keys.update(line.strip() for line in fp if line.strip())
+
+    def __repr__(self):
+        return u'%s(path=%r)' % (self.__class__.__name__, self.path)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    @staticmethod
+    def get_key(schema):
+        """Returns the registry key for a schema instance."""
+        text = schema.text.encode('utf-8') if isinstance(schema.text, unicode_type) else schema.text
+        return '%s:%s' % (schema.XSD_VERSION, hashlib.sha256(text).hexdigest())
+
+    def add(self, key):
+        """Adds a key to the registry, storing it in the registry file if any."""
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            if self.path is not None:
+                try:
+                    with open(self.path, 'a') as fp:
+                        fp.write(key + '\n')
+                except (OSError, IOError):
+                    pass  # An unwritable registry doesn't prevent the schema building
+
+
 class XMLSchemaMeta(type):
 
     def __new__(mcs, name, bases, dict_):
@@ -88,6 +144,7 @@ class XMLSchemaMeta(type):
         for uri, pathname in list(base_schemas.items()):
             meta_schema.import_schema(namespace=uri, location=pathname)
         meta_schema.maps.build()
+        meta_schema.resolver.clear()
         dict_['BASE_SCHEMAS'] = base_schemas
         dict_['meta_schema'] = meta_schema
 
@@ -122,6 +179,22 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
     :type locations: dict or None
     :param build: Defines whether build the schema maps.
     :type build: bool
+    :param resolver: An optional :class:`XMLResourceResolver` instance, used for fetching \
+    the schema resources. If not provided a new resolver is created and shared by the \
+    included and imported schemas, so each resource is fetched only once.
+    :type resolver: XMLResourceResolver or None
+    :param trusted: If `True` the schema documents are not validated against the \
+    meta-schema. Use it only with schemas from a trusted source, that are known to be valid.
+    :type trusted: bool
+    :param registry: An optional :class:`MetaValidationRegistry` instance, for skipping \
+    the meta-schema validation of documents that are already validated.
+    :type registry: MetaValidationRegistry or None
+    :param prefetch: If `True` the resources of the include/import closure of the schema \
+    are fetched concurrently before loading the included and imported schemas.
+    :type prefetch: bool
+    :param keep_source: If `False` the XSD sources of the schema documents are released \
+    after the build, see :meth:`drop_sources`.
+    :type keep_source: bool
 
     :cvar XSD_VERSION: Store the XSD version (1.0 or 1.1).
     :vartype XSD_VERSION: str
@@ -129,7 +202,8 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
     :vartype meta_schema: XMLSchema
     :ivar root: schema ElementTree root element
     :vartype root: Element
-    :ivar text: text source of the schema
+    :ivar text: text source of the schema. If the XSD sources have been dropped the text \
+    is loaded again from the URL each time it's accessed.
     :vartype text: str
     :ivar url: The schema resource URL. It's `None` if the schema is built from a string.
     :vartype url: str
@@ -140,6 +214,11 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
     :vartype target_namespace: str
     :ivar validation: Validation mode, can be 'strict', 'lax' or 'skip'.
     :vartype validation: str
+    :ivar resolver: The resolver used for fetching the schema resources.
+    :vartype resolver: XMLResourceResolver
+    :ivar meta_validation_time: The seconds spent validating the schema document \
+    against the meta-schema, `None` if the validation has been skipped.
+    :vartype meta_validation_time: float or None
     :ivar maps: XSD global declarations/definitions maps. This is an instance of :class:`XsdGlobal`, \
     that store the global_maps argument or a new object when this argument is not provided.
     :vartype maps: XsdGlobals
@@ -169,11 +248,21 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
     BASE_SCHEMAS = None
     meta_schema = None
     _parent_map = None
+    _text = None
+    _built = None
+    _source_dropped = False
 
     def __init__(self, source, namespace=None, validation='strict', global_maps=None,
-                 converter=None, locations=None, build=True):
+                 converter=None, locations=None, build=True, resolver=None, prefetch=False,
+                 trusted=False, registry=None, keep_source=True):
+        if resolver is None:
+            self.resolver = XMLResourceResolver()
+        else:
+            self.resolver = resolver
+
+        start = BuildStats.start()
         try:
-            self.root, self.text, self.url = load_xml_resource(source, element_only=False)
+            self.root, self.text, self.url = load_xml_resource(source, False, self.resolver)
         except (XMLSchemaParseError, XMLSchemaTypeError, OSError, IOError) as err:
             raise type(err)('cannot create schema: %s' % err)
         super(XMLSchemaBase, self).__init__()
@@ -208,6 +297,8 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
             # For default local names are mapped to targetNamespace
             self.namespaces[''] = self.target_namespace
 
+        # Register schema's namespaces once, for serializing encoded data
+        etree_register_namespaces(self.namespaces)
         self.converter = self.get_converter(converter)
 
         # Create or set the XSD global maps instance
@@ -217,7 +308,7 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
             elif self.target_namespace in self.BASE_SCHEMAS:
                 # Change the meta-schema instance
                 meta_schema_class = self.meta_schema.__class__
-                meta_schema = meta_schema_class(self.meta_schema.url, build=False)
+                meta_schema = meta_schema_class(self.meta_schema.url, build=False, resolver=self.resolver)
                 for uri, pathname in list(self.BASE_SCHEMAS.items()):
                     if uri == self.target_namespace:
                         meta_schema.import_schema(namespace=uri, location=self.url)
@@ -226,21 +317,36 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                 self.meta_schema = meta_schema
                 self.maps = self.meta_schema.maps
             else:
-                self.maps = self.meta_schema.maps.copy()
+                self.maps = XsdGlobals(self.__class__, base=self.meta_schema.maps)
 
         elif isinstance(global_maps, XsdGlobals):
             self.maps = global_maps
         else:
             raise XMLSchemaTypeError("'global_maps' argument must be a %r instance." % XsdGlobals)
+        self.maps.build_stats.add('load', start, self.url)
 
         # Validate the schema document
+        self.trusted = trusted
+        self.keep_source = keep_source
+        self.registry = registry
+        self.meta_validation_time = None
         if self.meta_schema is None:
             # Base schemas use single file and don't have to be checked
             return
-        elif validation == 'strict':
-            self.check_schema(self.root)
-        elif validation == 'lax':
-            self.errors.extend([e for e in self.meta_schema.iter_errors(self.root)])
+        elif validation != 'skip' and not trusted:
+            registry_key = None if registry is None else registry.get_key(self)
+            if registry_key is None or registry_key not in registry:
+                start = BuildStats.start()
+                try:
+                    if validation == 'strict':
+                        self.check_schema(self.root)
+                    else:
+                        self.errors.extend([e for e in self.meta_schema.iter_errors(self.root)])
+                finally:
+                    self.maps.build_stats.add('meta_validation', start, self.url)
+                    self.meta_validation_time = self.maps.build_stats.records[-1].time
+                if registry_key is not None and not self.errors:
+                    registry.add(registry_key)
 
         # XSD 1.1 xpathDefaultNamespace attribute
         if self.XSD_VERSION > '1.0':
@@ -248,6 +354,9 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                 self.root, self.namespaces, self.target_namespace
             )
 
+        if prefetch:
+            self.prefetch_resources()
+
         # Includes
         for child in iterchildren_xsd_include(self.root):
             try:
@@ -304,7 +413,12 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                         pass
 
         if build:
-            self.maps.build()
+            self.build()
+
+        if resolver is None:
+            # The resources are loaded: release the connections and the cached data
+            self.resolver.close()
+            self.resolver.clear()
 
     def __repr__(self):
         return u'%s(namespace=%r)' % (self.__class__.__name__, self.target_namespace)
@@ -391,14 +505,24 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
     def base_url(self):
         return os.path.dirname(self.url) if self.url is not None else None
 
+    @property
+    def text(self):
+        if self._text is None and self._source_dropped:
+            return self._reload_source()[1]
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+
     @property
     def parent_map(self):
-        if self._parent_map is None:
-            self._parent_map = {
-                e: p for p in self.iter()
-                for e in p.iterchildren()
-            }
-        return self._parent_map
+        if self._parent_map is not None:
+            return self._parent_map
+        parent_map = {e: p for p in self.iter() for e in p.iterchildren()}
+        if self.keep_source or self.maps._hold_parent_maps:
+            self._parent_map = parent_map
+        return parent_map
 
     @classmethod
     def create_schema(cls, *args, **kwargs):
@@ -418,9 +542,69 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
     def build(self):
         """Builds the schema XSD global maps."""
         self.maps.build()
+        if not self.keep_source:
+            self.drop_sources()
+
+    def drop_sources(self):
+        """
+        Releases the XSD sources of the built schema and of the other schemas that share its \
+        global maps, reducing the memory used by the schema instances. The text and the \
+        parent map of each document are discarded and the root element is replaced by a copy \
+        that has only the attributes and the include, import and redefine declarations. The \
+        XSD elements of the components are replaced by copies without children, so the \
+        components keep their properties but :meth:`XsdComponent.to_string` and the validation \
+        errors show only the tag and the attributes of the XSD declarations. The sources are \
+        loaded again from the URLs when they are needed, for accessing :attr:`text` or for \
+        building again the global maps. A schema created from a string cannot be built again \
+        after the drop.
+        """
+        if not self.built:
+            raise XMLSchemaNotBuiltError("schema %r is not built." % self)
+
+        for xsd_global in self.maps.iter_globals():
+            for component in xsd_global.iter_components():
+                component._drop_source()
+
+        for schema in self.maps.iter_schemas():
+            if schema.maps is self.maps and not schema._source_dropped:
+                root = etree_element(schema.root.tag, schema.root.attrib)
+                root.extend(etree_element(child.tag, child.attrib) for child in schema.root
+                            if child.tag in (XSD_INCLUDE_TAG, XSD_IMPORT_TAG, XSD_REDEFINE_TAG))
+                schema.root = root
+                schema.text = None
+                schema._parent_map = None
+                schema._source_dropped = True
+
+    def _reload_source(self):
+        """
+        Loads again the root element and the text of a schema document whose source
+        has been dropped, checking that the namespace and the composition of the
+        document aren't changed.
+        """
+        if self.url is None:
+            raise XMLSchemaValueError("%r: the XSD source has been dropped and the schema has no URL." % self)
+        root, text, _ = load_xml_resource(self.url, False, self.resolver)
+        if root.get('targetNamespace', '') != self.target_namespace or \
+                self.maps._get_composition(root) != self.maps._get_composition(self.root):
+            raise XMLSchemaValueError(
+                "%r: namespace, includes or imports of %r are changed, a new schema is required." % (
+                    self, self.url
+                ))
+        return root, text
+
+    @property
+    def build_stats(self):
+        """The :class:`BuildStats` report of the construction of the schema's global maps."""
+        return self.maps.build_stats
 
     @property
     def built(self):
+        version = self.maps.version
+        if self._built is None or self._built[0] != version:
+            self._built = version, self._check_built()
+        return self._built[1]
+
+    def _check_built(self):
         xsd_global = None
         for xsd_global in self.iter_globals(schema=self):
             if not isinstance(xsd_global, XsdAnnotated):
@@ -489,9 +673,6 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         if namespaces is None:
             namespaces = self.namespaces
 
-        for prefix, _uri in namespaces.items():
-            etree_register_namespace(prefix, _uri)
-
         if isinstance(converter, XMLSchemaConverter):
             converter = converter.copy()
             if namespaces is not None:
@@ -507,9 +688,63 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
             msg = "'converter' argument must be a %r subclass or instance: %r"
             raise XMLSchemaTypeError(msg % (XMLSchemaConverter, converter))
 
+    def prefetch_resources(self, max_workers=None):
+        """
+        Fetches the resources of the include/import closure of the schema, using
+        a pool of threads. The fetched resources are cached by the schema's resolver,
+        so the following loading of the included and imported schemas doesn't wait
+        for I/O. Schemas are then created and registered in the usual order, and the
+        fetch errors are reported by them.
+
+        :param max_workers: the number of threads of the pool. For default is the \
+        number of CPUs of the system.
+        """
+        def iter_locations(root, base_url):
+            for child in root:
+                if child.tag == XSD_IMPORT_TAG:
+                    namespace = child.get('namespace', '').strip()
+                    if namespace in self.maps.namespaces:
+                        continue
+                    elif namespace and self.resolver.resolve(namespace) != namespace:
+                        yield self.resolver.resolve(namespace), None
+                        continue
+                elif child.tag not in (XSD_INCLUDE_TAG, XSD_REDEFINE_TAG):
+                    continue
+                location = child.get('schemaLocation')
+                if location:
+                    yield location, base_url
+
+        def fetch(args):
+            try:
+                url = fetch_resource(args[0], args[1], self.resolver)
+                root = etree_fromstring(self.resolver.fetch(url))
+            except (OSError, IOError, ValueError, etree_parse_error):
+                return None, ()
+            else:
+                return url, list(iter_locations(root, os.path.dirname(url)))
+
+        fetched = {self.url}
+        visited = set()
+        locations = list(iter_locations(self.root, self.base_url))
+        pool = ThreadPool(max_workers)
+        try:
+            while locations:
+                visited.update(locations)
+                next_locations = []
+                for url, children in pool.map(fetch, locations):
+                    if url is not None and url not in fetched:
+                        fetched.add(url)
+                        next_locations.extend(x for x in children if x not in visited)
+                locations = list(OrderedDict.fromkeys(next_locations))
+        finally:
+            pool.close()
+            pool.join()
+
     def import_schema(self, namespace, location, base_url=None, force=False):
         """
-        Imports a schema for an external namespace, from a specific URL.
+        Imports a schema for an external namespace, from a specific URL. If the
+        namespace is mapped by the catalog of the resolver the mapped location is
+        used instead of the provided one.
 
         :param namespace: is the URI of the external namespace.
         :param location: is the URL of the schema.
@@ -519,8 +754,11 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         """
         if namespace in self.maps.namespaces and not force:
             return
+        elif namespace and self.resolver.resolve(namespace) != namespace:
+            location, base_url = self.resolver.resolve(namespace), None
+
         try:
-            schema_url = fetch_resource(location, base_url)
+            schema_url = fetch_resource(location, base_url, self.resolver)
         except XMLSchemaURLError as err:
             raise XMLSchemaURLError(
                 reason="cannot import namespace %r: %s" % (namespace, err.reason)
@@ -532,7 +770,8 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         try:
             self.create_schema(
                 schema_url, namespace or self.target_namespace, self.validation, self.maps,
-                self.converter, None, False
+                self.converter, None, False, self.resolver, trusted=self.trusted, registry=self.registry,
+                keep_source=self.keep_source
             )
         except (XMLSchemaParseError, XMLSchemaTypeError, OSError, IOError) as err:
             raise type(err)('cannot import namespace %r: %s' % (namespace, err))
@@ -547,7 +786,7 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         """
 
         try:
-            schema_url = fetch_resource(location, base_url)
+            schema_url = fetch_resource(location, base_url, self.resolver)
         except XMLSchemaURLError as err:
             raise XMLSchemaURLError(reason="cannot include %r: %s." % (location, err.reason))
         else:
@@ -555,14 +794,16 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                 return self.maps.resources[schema_url]
         try:
             return self.create_schema(
-                schema_url, self.target_namespace, self.validation, self.maps, self.converter, None, False
+                schema_url, self.target_namespace, self.validation, self.maps,
+                self.converter, None, False, self.resolver, trusted=self.trusted, registry=self.registry,
+                keep_source=self.keep_source
             )
         except (XMLSchemaParseError, XMLSchemaTypeError, OSError, IOError) as err:
             raise type(err)('cannot include %r: %s' % (schema_url, err))
 
     def iter_decode(self, xml_document, path=None, validation='lax', process_namespaces=True,
                     namespaces=None, use_defaults=True, decimal_type=None,
-                    converter=None, dict_class=None, list_class=None):
+                    converter=None, dict_class=None, list_class=None, intern_values=False):
         """
         Creates an iterator for decoding an XML document using the schema instance. Yields objects 
         that can be dictionaries or simple data values.
@@ -586,6 +827,9 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         dictionary class of the :class:`XMLSchemaConverter` subclass/instance.
         :param list_class: the list-like class that have to be used instead of the default \
         list class of the :class:`XMLSchemaConverter` class/instance.
+        :param intern_values: if `True` the decoded tokens (values of types with collapsed \
+        whitespaces or restricted by enumerations) are interned, so the repeated values \
+        share the same string object. Reduces the memory used by large decoded documents.
         """
         if validation not in XSD_VALIDATION_MODES:
             raise XMLSchemaValueError("validation mode argument can be 'strict', 'lax' or 'skip'.")
@@ -600,19 +844,7 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         else:
             converter = self.get_converter(converter, {}, dict_class, list_class)
 
-        try:
-            xml_root = xml_document.getroot()
-        except (AttributeError, TypeError):
-            if etree_iselement(xml_document):
-                xml_root = xml_document
-            else:
-                xml_root = load_xml_resource(xml_document)
-        else:
-            if not etree_iselement(xml_root):
-                raise XMLSchemaTypeError(
-                    "wrong type %r for 'xml_document' argument." % type(xml_document)
-                )
-
+        xml_root = self._get_xml_root(xml_document)
         if path is None:
             xsd_element = self.find(xml_root.tag, namespaces=namespaces)
             if not isinstance(xsd_element, XsdElement):
@@ -627,7 +859,8 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                         decimal_type=decimal_type,
                         converter=converter,
                         dict_class=dict_class,
-                        list_class=list_class):
+                        list_class=list_class,
+                        intern_values=intern_values):
                     yield obj
         else:
             xsd_element = self.find(path, namespaces=namespaces)
@@ -646,9 +879,84 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                             decimal_type=decimal_type,
                             converter=converter,
                             dict_class=dict_class,
-                            list_class=list_class):
+                            list_class=list_class,
+                            intern_values=intern_values):
                         yield obj
 
+    def iter_validate(self, xml_document, path=None, use_defaults=True, namespaces=None):
+        """
+        Creates an iterator for the errors generated by the validation of an XML document.
+        The errors are the same of a 'lax' decoding, but the validation doesn't decode the
+        values and doesn't build the data structures of the decoded document.
+
+        :param xml_document: can be a path to a file or an URI of a resource or an opened \
+        file-like object or an Element Tree instance or a string containing XML data.
+        :param path: is an optional XPath expression that matches the parts of the document \
+        that have to be validated. The XPath expression considers the schema as the root \
+        element with global elements as its children.
+        :param use_defaults: indicates whether to use default values for filling missing data.
+        :param namespaces: is an optional mapping from namespace prefix to URI.
+        """
+        if not self.built:
+            raise XMLSchemaNotBuiltError("schema %r is not built." % self)
+
+        xml_root = self._get_xml_root(xml_document)
+        if path is not None or not xml_root.tag.startswith('{'):
+            # The namespaces of the document are needed only for resolving prefixed
+            # names, a namespace qualified root tag is already in extended form.
+            namespaces = {} if namespaces is None else namespaces.copy()
+            namespaces.update(etree_get_namespaces(xml_document))
+
+        if path is None:
+            xsd_element = self.find(xml_root.tag, namespaces=namespaces)
+            if not isinstance(xsd_element, XsdElement):
+                msg = "%r is not a global element of the schema!" % xml_root.tag
+                yield XMLSchemaValidationError(self, xml_root, reason=msg)
+            else:
+                for error in xsd_element.iter_validate(xml_root, use_defaults=use_defaults):
+                    yield error
+        else:
+            xsd_element = self.find(path, namespaces=namespaces)
+            if not isinstance(xsd_element, XsdElement):
+                msg = "the path %r doesn't match any element of the schema!" % path
+                obj = xml_root.findall(path, namespaces=namespaces) or xml_root
+                yield XMLSchemaValidationError(self, obj, reason=msg)
+            else:
+                rel_path = relative_path(path, 1, namespaces)
+                for elem in xml_root.findall(rel_path, namespaces=namespaces):
+                    for error in xsd_element.iter_validate(elem, use_defaults=use_defaults):
+                        yield error
+
+    def iter_error_records(self, xml_document, path=None, use_defaults=True, namespaces=None):
+        """
+        Like :meth:`iter_validate` but yields :class:`ValidationErrorRecord` instances,
+        compact records that don't keep references to the XML document.
+        """
+        xml_root = self._get_xml_root(xml_document)
+        if path is not None or not xml_root.tag.startswith('{'):
+            namespaces = {} if namespaces is None else namespaces.copy()
+            namespaces.update(etree_get_namespaces(xml_document))
+
+        errors = self.iter_validate(xml_root, path, use_defaults, namespaces)
+        for record in iter_error_records(errors, xml_root, self.namespaces):
+            yield record
+
+    @staticmethod
+    def _get_xml_root(xml_document):
+        try:
+            xml_root = xml_document.getroot()
+        except (AttributeError, TypeError):
+            if etree_iselement(xml_document):
+                return xml_document
+            else:
+                return load_xml_resource(xml_document)
+        else:
+            if not etree_iselement(xml_root):
+                raise XMLSchemaTypeError(
+                    "wrong type %r for 'xml_document' argument." % type(xml_document)
+                )
+            return xml_root
+
     def iter_encode(self, data, path=None, validation='lax', namespaces=None, indent=None,
                     element_class=None, converter=None):
         if validation not in XSD_VALIDATION_MODES:
@@ -659,6 +967,7 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
         _namespaces = self.namespaces.copy()
         if namespaces:
             _namespaces.update(namespaces)
+            etree_register_namespaces(namespaces)
 
         xsd_element = self.find(path, namespaces=_namespaces)
         if not isinstance(xsd_element, XsdElement):
@@ -670,6 +979,73 @@ class XMLSchemaBase(XsdBaseComponent, ValidatorMixin, ElementPathMixin):
                                                element_encode_hook=_converter.element_encode):
                 yield obj
 
+    def iter_generate(self, path=None, size=None, seed=None, error_rate=0.0, namespaces=None, **kwargs):
+        """
+        Creates an iterator for generating a synthetic XML instance of the schema. The
+        document is yielded in chunks of text, so large documents can be streamed out.
+
+        :param path: is an optional XPath expression that selects the element declaration \
+        to use for the root element. For default the first global element that is not \
+        referenced by other declarations is used.
+        :param size: an optional minimum size, in characters, of the document. The size \
+        is reached repeating the occurrences of unbounded particles.
+        :param seed: the seed of the pseudo-random generator, the same seed produces \
+        the same document.
+        :param error_rate: the probability, from 0.0 to 1.0, of injecting an error into \
+        each generated element.
+        :param namespaces: is an optional mapping from namespace prefix to URI, used for \
+        the path and for the prefixes of the generated document.
+        :param kwargs: other options for :class:`XMLInstanceGenerator`.
+        """
+        generator = XMLInstanceGenerator(self, seed, error_rate, namespaces=namespaces, **kwargs)
+        return generator.iter_generate(path, size, namespaces)
+
+    def generate(self, target=None, path=None, size=None, seed=None, error_rate=0.0,
+                 namespaces=None, **kwargs):
+        """
+        Generates a synthetic XML instance of the schema. Returns a string if *target* \
+        is `None`, otherwise writes the document to the target, that can be a file path \
+        or a binary file-like object. The other arguments are the same of :meth:`iter_generate`.
+        """
+        generator = XMLInstanceGenerator(self, seed, error_rate, namespaces=namespaces, **kwargs)
+        return generator.generate(target, path, size, namespaces)
+
+    def set_decode_cache(self, maxsize=1024):
+        """
+        Enables or disables the caches of the decoded values for the simple types of the \
+        schema, including the local types and the simple contents. The types shared with \
+        other schemas, like the XSD built-in types, are not changed.
+        See :meth:`XsdSimpleType.set_decode_cache`.
+
+        :param maxsize: the maximum number of cached values for each type, `None` or 0 \
+        disables the caches.
+        """
+        seen = set()
+        for xsd_type in self.iter_components(XsdSimpleType):
+            if id(xsd_type) not in seen:
+                seen.add(id(xsd_type))
+                xsd_type.set_decode_cache(maxsize)
+
+    def iter_decode_caches(self):
+        """
+        Creates an iterator for the couples (simple type, cache) of the types of the schema
+        that have an enabled decode cache.
+        """
+        seen = set()
+        for xsd_type in self.iter_components(XsdSimpleType):
+            if id(xsd_type) not in seen and xsd_type.decode_cache is not None:
+                seen.add(id(xsd_type))
+                yield xsd_type, xsd_type.decode_cache
+
+    def profile(self):
+        """
+        Returns a :class:`XMLSchemaProfiler` instance for the schema, to be used as a context \
+        manager. Inside the context the schema components collect call counts, timings and \
+        error counts of the decoding, encoding and validation activity. Outside a profiling \
+        context the components are not instrumented.
+        """
+        return XMLSchemaProfiler(self)
+
     def iter(self, name=None):
         """
         Creates a subtree iterator (depth-first) for the XSD/XML element. If *name* is not ``None``
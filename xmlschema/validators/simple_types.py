@@ -11,9 +11,11 @@
 """
 This module contains classes for XML Schema simple data types.
 """
+import threading
+from collections import OrderedDict
 from decimal import Decimal, DecimalException
 
-from ..compat import unicode_type
+from ..compat import unicode_type, intern_string
 from ..exceptions import XMLSchemaAttributeError, XMLSchemaTypeError, XMLSchemaValueError
 from ..qnames import (
     get_qname, reference_to_qname, XSD_SIMPLE_TYPE_TAG, XSD_ANY_ATOMIC_TYPE, XSD_ATTRIBUTE_TAG,
@@ -21,7 +23,7 @@ from ..qnames import (
     XSD_MIN_INCLUSIVE_TAG, XSD_MIN_EXCLUSIVE_TAG, XSD_MAX_INCLUSIVE_TAG, XSD_MAX_EXCLUSIVE_TAG,
     XSD_LENGTH_TAG, XSD_MIN_LENGTH_TAG, XSD_MAX_LENGTH_TAG, XSD_WHITE_SPACE_TAG, local_name,
     XSD_LIST_TAG, XSD_ANY_SIMPLE_TYPE, XSD_UNION_TAG, XSD_RESTRICTION_TAG, XSD_ANNOTATION_TAG,
-    XSD_ANY_TYPE
+    XSD_ANY_TYPE, XSD_NOTATION_TYPE, XSD_QNAME_TYPE
 )
 from .exceptions import (
     XMLSchemaValidationError, XMLSchemaEncodeError, XMLSchemaDecodeError, XMLSchemaParseError
@@ -33,6 +35,103 @@ from .facets import (
 )
 
 
+class LexicalCache(object):
+    """
+    A size-bounded LRU cache of the decoded values of a simple type, keyed by the
+    lexical values. Only the values decoded without errors are stored, so a value
+    taken from the cache never produces validation errors. The cache is shared by
+    the threads that use the schema.
+
+    :param maxsize: the maximum number of cached values.
+    :ivar hits: the number of lookups that found a cached value.
+    :ivar misses: the number of lookups that didn't find a cached value.
+    """
+    __slots__ = ('maxsize', 'hits', 'misses', '_data', '_lock')
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise XMLSchemaValueError("'maxsize' must be a positive integer: %r" % maxsize)
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return u'%s(maxsize=%d, size=%d, hits=%d, misses=%d)' % (
+            self.__class__.__name__, self.maxsize, len(self._data), self.hits, self.misses
+        )
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self):
+        """The fraction of the lookups that found a cached value, `None` if no lookup was done."""
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else None
+
+    def get(self, text):
+        """Returns the cached value for a lexical value, raises `KeyError` if it isn't cached."""
+        with self._lock:
+            try:
+                value = self._data.pop(text)
+            except KeyError:
+                self.misses += 1
+                raise
+            self._data[text] = value
+            self.hits += 1
+        return value
+
+    def put(self, text, value):
+        with self._lock:
+            self._data[text] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Removes the cached values and resets the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+def cached_decode(iter_decode):
+    """
+    Decorator for the `iter_decode` methods of simple types. If the type has a
+    :class:`LexicalCache` the decoding of a cached lexical value is skipped, otherwise
+    the method is called without any wrapping.
+    """
+    def _iter_decode_cached(self, text, validation, kwargs):
+        cache = self.decode_cache
+        try:
+            value = cache.get(text)
+        except KeyError:
+            pass
+        else:
+            yield list(value) if isinstance(value, list) else value
+            return
+
+        # The results are collected before yielding them, because the callers can
+        # close the generator after the decoded value, skipping the cache update.
+        results = list(iter_decode(self, text, validation, **kwargs))
+        if results and validation != 'skip' and \
+                not any(isinstance(x, XMLSchemaValidationError) for x in results):
+            result = results[-1]
+            cache.put(text, list(result) if isinstance(result, list) else result)
+
+        for result in results:
+            yield result
+
+    def cached_iter_decode(self, text, validation='lax', **kwargs):
+        if self.decode_cache is None or kwargs.get('decimal_type') is not None:
+            return iter_decode(self, text, validation, **kwargs)
+        return _iter_decode_cached(self, text, validation, kwargs)
+
+    cached_iter_decode.__name__ = iter_decode.__name__
+    cached_iter_decode.__doc__ = iter_decode.__doc__
+    return cached_iter_decode
+
+
 def xsd_simple_type_factory(elem, schema, is_global=False):
     try:
         name = get_qname(schema.target_namespace, elem.attrib['name'])
@@ -76,7 +175,13 @@ class XsdSimpleType(XsdAnnotated, ValidatorMixin):
       Content: (annotation?, (restriction | list | union))
     </simpleType>
     """
+    __slots__ = (
+        'facets', 'min_length', 'max_length', 'min_value', 'max_value', 'white_space',
+        'patterns', 'validators', 'decode_cache'
+    )
+
     def __init__(self, elem, schema, name=None, facets=None, is_global=False):
+        self.decode_cache = None
         if facets is not None:
             # Only for xs:anySimpleType
             self.schema = schema
@@ -133,6 +238,39 @@ class XsdSimpleType(XsdAnnotated, ValidatorMixin):
     def is_empty(self):
         return self.max_length == 0
 
+    def is_context_dependent(self):
+        """
+        Returns `True` if the decoding depends on the instance context, that is for
+        QName and NOTATION types and for the types derived from them.
+        """
+        if self.name in (XSD_QNAME_TYPE, XSD_NOTATION_TYPE):
+            return True
+        for attr in ('base_type', 'item_type'):
+            xsd_type = getattr(self, attr, None)
+            if xsd_type is not None and xsd_type.is_simple() and xsd_type.is_context_dependent():
+                return True
+        return any(mt.is_context_dependent() for mt in getattr(self, 'member_types', ()))
+
+    def set_decode_cache(self, maxsize=1024):
+        """
+        Enables or disables a cache of the decoded values of the type, see :class:`LexicalCache`. \
+        The cache is not enabled for the types that depend on the instance context.
+
+        :param maxsize: the maximum number of cached values, `None` or 0 disables the cache.
+        :return: the cache of the type or `None` if no cache is enabled.
+        """
+        if not maxsize or self.is_context_dependent():
+            self.decode_cache = None
+        else:
+            self.decode_cache = LexicalCache(maxsize)
+        return self.decode_cache
+
+    def _drop_source(self):
+        super(XsdSimpleType, self)._drop_source()
+        for facet in getattr(self, 'facets', {}).values():
+            if isinstance(facet, XsdFacet):
+                facet._drop_source()
+
     def is_emptiable(self):
         return self.min_length is None or self.min_length == 0
 
@@ -257,6 +395,7 @@ class XsdSimpleType(XsdAnnotated, ValidatorMixin):
             pass
         return obj
 
+    @cached_decode
     def iter_decode(self, text, validation='lax', **kwargs):
         text = self.normalize(text)
         if validation != 'skip':
@@ -303,6 +442,8 @@ class XsdAtomic(XsdSimpleType):
     a base_type attribute that refers to primitive or derived atomic 
     built-in type or another derived simpleType.
     """
+    __slots__ = ('base_type',)
+
     def __init__(self, elem, schema, name=None, facets=None, base_type=None, is_global=False):
         super(XsdAtomic, self).__init__(elem, schema, name, is_global=is_global)
         if not hasattr(self, 'base_type'):
@@ -396,6 +537,8 @@ class XsdAtomicBuiltin(XsdAtomic):
       - to_python(value): Decoding from XML
       - from_python(value): Encoding to XML
     """
+    __slots__ = ('python_type', 'to_python', 'from_python')
+
     def __init__(self, elem, schema, name, python_type, base_type=None, facets=None,
                  to_python=None, from_python=None):
         """
@@ -420,6 +563,7 @@ class XsdAtomicBuiltin(XsdAtomic):
     def _parse(self):
         return
 
+    @cached_decode
     def iter_decode(self, text, validation='lax', **kwargs):
         _text = self.normalize(text)
         if validation != 'skip' and self.patterns:
@@ -447,6 +591,9 @@ class XsdAtomicBuiltin(XsdAtomic):
                 result = kwargs.get('decimal_type')(result)
             except TypeError:
                 pass
+        elif self.white_space == 'collapse' and kwargs.get('intern_values'):
+            # Collapsed strings are tokens, that usually have many repeated values.
+            result = intern_string(result)
         yield result
 
     def iter_encode(self, obj, validation='lax', **kwargs):
@@ -486,6 +633,7 @@ class XsdList(XsdSimpleType):
       Content: (annotation?, simpleType?)
     </list>
     """
+    __slots__ = ('item_type',)
 
     def __init__(self, elem, schema, name=None, facets=None, item_type=None, is_global=False):
         super(XsdList, self).__init__(elem, schema, name, is_global=is_global)
@@ -568,6 +716,7 @@ class XsdList(XsdSimpleType):
             for obj in self.item_type.iter_components(xsd_classes):
                 yield obj
 
+    @cached_decode
     def iter_decode(self, text, validation='lax', **kwargs):
         text = self.normalize(text)
         if validation != 'skip' and self.patterns:
@@ -623,6 +772,8 @@ class XsdUnion(XsdSimpleType):
       Content: (annotation?, simpleType*)
     </union>
     """
+    __slots__ = ('member_types',)
+
     def __init__(self, elem, schema, name=None, facets=None, member_types=None, is_global=False):
         super(XsdUnion, self).__init__(elem, schema, name, is_global=is_global)
         if not hasattr(self, 'member_types'):
@@ -713,6 +864,7 @@ class XsdUnion(XsdSimpleType):
                 for obj in mt.iter_components(xsd_classes):
                     yield obj
 
+    @cached_decode
     def iter_decode(self, text, validation='lax', **kwargs):
         text = self.normalize(text)
         if validation != 'skip' and self.patterns:
@@ -768,6 +920,8 @@ class XsdAtomicRestriction(XsdAtomic):
       enumeration | whiteSpace | pattern)*))
     </restriction>
     """
+    __slots__ = ()
+
     def __setattr__(self, name, value):
         if name == 'elem' and value is not None:
             if self.name != XSD_ANY_ATOMIC_TYPE and value.tag != XSD_RESTRICTION_TAG:
@@ -862,6 +1016,7 @@ class XsdAtomicRestriction(XsdAtomic):
             for obj in self.base_type.iter_components(xsd_classes):
                 yield obj
 
+    @cached_decode
     def iter_decode(self, text, validation='lax', **kwargs):
         text = self.normalize(text)
         if validation != 'skip' and self.patterns:
@@ -884,12 +1039,15 @@ class XsdAtomicRestriction(XsdAtomic):
                 yield self._validation_error(result, validation)
                 if isinstance(result, XMLSchemaDecodeError):
                     yield unicode_type(text) if validation == 'skip' else None
+                    return
             else:
                 if validation != 'skip':
                     for validator in self.validators:
                         for error in validator(result):
                             yield self._validation_error(error, validation)
 
+                if XSD_ENUMERATION_TAG in self.facets and kwargs.get('intern_values'):
+                    result = intern_string(result)
                 yield result
                 return
 
@@ -926,4 +1084,4 @@ class Xsd11AtomicRestriction(XsdAtomicRestriction):
       {any with namespace: ##other})*))
     </restriction>
     """
-    pass
+    __slots__ = ()
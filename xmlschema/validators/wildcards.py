@@ -11,16 +11,20 @@
 """
 This module contains classes for XML Schema wildcards.
 """
-from ..namespaces import get_namespace, XSI_NAMESPACE_PATH
-from ..qnames import XSD_ANY_TAG, XSD_ANY_ATTRIBUTE_TAG
+from ..exceptions import XMLSchemaValueError
+from ..namespaces import XSI_NAMESPACE_PATH
+from ..qnames import XSD_ANY_TAG, XSD_ANY_ATTRIBUTE_TAG, reference_to_qname
 from .exceptions import XMLSchemaChildrenValidationError
 from .parseutils import get_xsd_attribute
-from .xsdbase import ValidatorMixin, XsdAnnotated, ParticleMixin
+from .xsdbase import ValidatorMixin, XsdAnnotated, ParticleMixin, NestedCall, iter_nested_calls
 
 
 class XsdWildcard(XsdAnnotated, ValidatorMixin):
 
+    __slots__ = ('namespace', 'process_contents', '_namespaces', '_not_namespaces', '_lookups')
+
     def __init__(self, elem, schema):
+        self._lookups = None
         super(XsdWildcard, self).__init__(elem, schema, is_global=False)
 
     def _parse(self):
@@ -40,6 +44,40 @@ class XsdWildcard(XsdAnnotated, ValidatorMixin):
         self.process_contents = get_xsd_attribute(
             self.elem, 'processContents', ('lax', 'skip', 'strict'), default='strict'
         )
+        self._compile_namespaces()
+
+    def _compile_namespaces(self, not_namespace=None):
+        """
+        Compiles the namespace constraint into a set of admitted namespaces or, for
+        *##any*, *##other* and the XSD 1.1 *notNamespace*, into a set of excluded
+        namespaces. The XSI namespace is always admitted.
+        """
+        if not_namespace is not None:
+            items = not_namespace.split()
+        elif self.namespace == '##any':
+            items = ()
+        elif self.namespace == '##other':
+            items = ('##local', '##targetNamespace')
+        else:
+            items = None
+
+        if items is not None:
+            self._namespaces = None
+            self._not_namespaces = frozenset(
+                self._map_namespace(x) for x in items
+            ).difference((XSI_NAMESPACE_PATH,))
+        else:
+            self._namespaces = frozenset(
+                self._map_namespace(x) for x in self.namespace.split()
+            ).union((XSI_NAMESPACE_PATH,))
+            self._not_namespaces = None
+
+    def _map_namespace(self, namespace):
+        if namespace == '##local':
+            return ''
+        elif namespace == '##targetNamespace':
+            return self.target_namespace
+        return namespace
 
     def __repr__(self):
         return u'%s(namespace=%r, process_contents=%r)' % (
@@ -51,21 +89,46 @@ class XsdWildcard(XsdAnnotated, ValidatorMixin):
         return True
 
     def match(self, name):
-        return self.is_namespace_allowed(get_namespace(name))
+        # Same namespace of get_namespace(), extracted without using a regex
+        try:
+            namespace = name[1:name.index('}')] if name[0] == '{' else ''
+        except (TypeError, IndexError, ValueError):
+            namespace = ''
+        return self.is_namespace_allowed(namespace)
 
     def is_namespace_allowed(self, namespace):
-        if self.namespace == '##any' or namespace == XSI_NAMESPACE_PATH:
-            return True
-        elif self.namespace == '##other':
-            return namespace and namespace != self.target_namespace
-        else:
-            any_namespaces = self.namespace.split()
-            if '##local' in any_namespaces and namespace == '':
-                return True
-            elif '##targetNamespace' in any_namespaces and namespace == self.target_namespace:
-                return True
-            else:
-                return namespace in any_namespaces
+        if self._not_namespaces is not None:
+            return namespace not in self._not_namespaces
+        return namespace in self._namespaces
+
+    def lookup_global(self, name, lookup_name):
+        """
+        Returns the global declaration matching a name, using a cache that is
+        valid until the global maps change. Returns `None` if the declaration
+        is missing from the global maps. Only the found declarations are cached,
+        so the size of the cache is limited by the number of global declarations.
+
+        :param name: the qualified name of the element or of the attribute.
+        :param lookup_name: the name of the lookup function of the global maps, \
+        eg. 'lookup_element' or 'lookup_attribute'.
+        """
+        version = self.maps.version
+        if self._lookups is None or self._lookups[0] != version:
+            self._lookups = version, {}
+
+        try:
+            cache = self._lookups[1][lookup_name]
+        except KeyError:
+            cache = self._lookups[1][lookup_name] = {}
+
+        try:
+            return cache[name]
+        except KeyError:
+            try:
+                obj = cache[name] = getattr(self.maps, lookup_name)(name)
+            except LookupError:
+                return None
+            return obj
 
 
 class XsdAnyElement(XsdWildcard, ParticleMixin):
@@ -82,6 +145,8 @@ class XsdAnyElement(XsdWildcard, ParticleMixin):
       Content: (annotation?)
     </any>
     """
+    __slots__ = ()
+
     def _parse(self):
         super(XsdAnyElement, self)._parse()
         self._parse_particle()
@@ -91,33 +156,48 @@ class XsdAnyElement(XsdWildcard, ParticleMixin):
         return {XSD_ANY_TAG}
 
     def iter_decode(self, elem, validation='lax', **kwargs):
+        return iter_nested_calls(self._iter_decode(elem, validation, **kwargs))
+
+    def _iter_decode(self, elem, validation='lax', **kwargs):
         if self.process_contents == 'skip':
             return
 
         if self.match(elem.tag):
-            try:
-                xsd_element = self.maps.lookup_base_element(elem.tag)
-            except LookupError:
+            xsd_element = self.lookup_global(elem.tag, 'lookup_base_element')
+            if xsd_element is None:
                 if self.process_contents == 'strict' and validation != 'skip':
                     yield self._validation_error("element %r not found." % elem.tag, validation, elem)
             else:
-                for result in xsd_element.iter_decode(elem, validation, **kwargs):
+                for result in (yield NestedCall(xsd_element._iter_decode(elem, validation, **kwargs))):
                     yield result
 
         elif validation != 'skip':
             yield self._validation_error("element %r not allowed here." % elem.tag, validation, elem)
 
+    def iter_validate(self, elem, **kwargs):
+        return iter_nested_calls(self._iter_validate(elem, **kwargs))
+
+    def _iter_validate(self, elem, **kwargs):
+        if self.process_contents == 'skip':
+            return
+
+        if self.match(elem.tag):
+            xsd_element = self.lookup_global(elem.tag, 'lookup_base_element')
+            if xsd_element is None:
+                if self.process_contents == 'strict':
+                    yield self._validation_error("element %r not found." % elem.tag, 'lax', elem)
+            else:
+                yield NestedCall(xsd_element._iter_validate(elem, **kwargs))
+        else:
+            yield self._validation_error("element %r not allowed here." % elem.tag, 'lax', elem)
+
     def iter_decode_children(self, elem, index=0, validation='lax'):
         model_occurs = 0
+        max_occurs = self.max_occurs
         process_contents = self.process_contents
         while True:
             try:
-                namespace = get_namespace(elem[index].tag)
-            except TypeError:
-                # elem is a lxml.etree.Element and elem[index] is a <class 'lxml.etree._Comment'>:
-                # in this case elem[index].tag is a <cyfunction Comment>, not subscriptable. So
-                # decode nothing and take the next.
-                pass
+                tag = elem[index].tag
             except IndexError:
                 if validation != 'skip' and model_occurs == 0 and self.min_occurs > 0:
                     error = XMLSchemaChildrenValidationError(
@@ -128,27 +208,28 @@ class XsdAnyElement(XsdWildcard, ParticleMixin):
                     yield index
                 return
             else:
-                if validation != 'skip' and not self.is_namespace_allowed(namespace):
-                    error = XMLSchemaChildrenValidationError(self, elem, index)
-                    yield self._validation_error(error, validation)
-
-                try:
-                    xsd_element = self.maps.lookup_element(elem[index].tag)
-                except LookupError:
-                    if validation != 'skip' and process_contents == 'strict':
-                        yield self._validation_error(
-                            "cannot retrieve the schema for %r" % elem[index], validation, elem
-                        )
-                    yield None, elem[index]
-                else:
-                    if process_contents != 'skip':
+                # For comments and processing instructions (eg. a lxml.etree._Comment)
+                # the tag is a function: decode nothing and take the next.
+                if not callable(tag):
+                    if validation != 'skip' and not self.match(tag):
+                        error = XMLSchemaChildrenValidationError(self, elem, index)
+                        yield self._validation_error(error, validation)
+
+                    xsd_element = self.lookup_global(tag, 'lookup_element')
+                    if xsd_element is None:
+                        if validation != 'skip' and process_contents == 'strict':
+                            yield self._validation_error(
+                                "cannot retrieve the schema for %r" % elem[index], validation, elem
+                            )
+                        yield None, elem[index]
+                    elif process_contents != 'skip':
                         yield xsd_element, elem[index]
                     else:
                         yield None, elem[index]
 
             index += 1
             model_occurs += 1
-            if self.max_occurs is not None and model_occurs >= self.max_occurs:
+            if max_occurs is not None and model_occurs >= max_occurs:
                 yield index
                 return
 
@@ -165,6 +246,8 @@ class XsdAnyAttribute(XsdWildcard):
       Content: (annotation?)
     </anyAttribute>
     """
+    __slots__ = ()
+
     @property
     def admitted_tags(self):
         return {XSD_ANY_ATTRIBUTE_TAG}
@@ -174,21 +257,44 @@ class XsdAnyAttribute(XsdWildcard):
             return
 
         for name, value in attrs.items():
-            if self.match(name):
-                try:
-                    xsd_attribute = self.maps.lookup_attribute(name)
-                except LookupError:
-                    if self.process_contents == 'strict' and validation != 'skip':
-                        yield self._validation_error("attribute %r not found." % name, validation, attrs)
-                else:
-                    for result in xsd_attribute.iter_decode(value, validation, **kwargs):
-                        yield result
-            elif validation != 'skip':
-                yield self._validation_error("attribute %r not allowed." % name, validation, attrs)
+            for result in self.iter_decode_attribute(name, value, validation, attrs, **kwargs):
+                yield result
+
+    def iter_decode_attribute(self, name, value, validation='lax', attrs=None, **kwargs):
+        """
+        Generator method for decoding a single attribute matched by the wildcard.
+        Yields the decoded value, eventually preceded by validation errors, or only
+        the errors if the attribute is not decoded.
+
+        :param name: the qualified name of the attribute.
+        :param value: the value of the attribute.
+        :param validation: the validation mode.
+        :param attrs: the attributes to report in the errors, if `None` a dictionary \
+        with only the decoded attribute is reported.
+        """
+        if self.process_contents == 'skip':
+            return
+
+        if self.match(name):
+            xsd_attribute = self.lookup_global(name, 'lookup_attribute')
+            if xsd_attribute is None:
+                if self.process_contents == 'strict' and validation != 'skip':
+                    yield self._validation_error(
+                        "attribute %r not found." % name, validation, {name: value} if attrs is None else attrs
+                    )
+            else:
+                for result in xsd_attribute.iter_decode(value, validation, **kwargs):
+                    yield result
+        elif validation != 'skip':
+            yield self._validation_error(
+                "attribute %r not allowed." % name, validation, {name: value} if attrs is None else attrs
+            )
 
 
 class Xsd11Wildcard(XsdWildcard):
 
+    __slots__ = ('not_namespace', 'not_qname', '_not_qnames')
+
     def __repr__(self):
         return u'%s(namespace=%r, process_contents=%r)' % (
             self.__class__.__name__, self.namespace, self.process_contents
@@ -206,38 +312,39 @@ class Xsd11Wildcard(XsdWildcard):
             if 'namespace' in self.elem.attrib:
                 self.not_namespace = None
                 self._parse_error("'namespace' and 'notNamespace' attributes are mutually exclusive.")
-            elif not_namespace in ('##local', '##targetNamespace'):
-                self.not_namespace = not_namespace
             else:
-                self.not_namespace = not_namespace.split()
+                if not_namespace in ('##local', '##targetNamespace'):
+                    self.not_namespace = not_namespace
+                else:
+                    self.not_namespace = not_namespace.split()
+                self._compile_namespaces(not_namespace)
 
         # Parse notQName attribute
         try:
             not_qname = self.elem.attrib['notQName'].strip()
-        except:
+        except KeyError:
             self.not_qname = None
+            self._not_qnames = frozenset()
         else:
             if not_qname in ('##defined', '##definedSibling'):
                 self.not_qname = not_qname
             else:
                 self.not_qname = not_qname.split()
 
-    def is_namespace_allowed(self, namespace):
-        if self.namespace == '##any' or namespace == XSI_NAMESPACE_PATH:
-            return True
-        elif self.namespace == '##other':
-            return namespace and namespace != self.target_namespace
-        else:
-            any_namespaces = self.namespace.split()
-            if '##local' in any_namespaces and namespace == '':
-                return True
-            elif '##targetNamespace' in any_namespaces and namespace == self.target_namespace:
-                return True
-            else:
-                return namespace in any_namespaces
+            not_qnames = set()
+            for name in not_qname.split():
+                if name not in ('##defined', '##definedSibling'):
+                    try:
+                        not_qnames.add(reference_to_qname(name, self.namespaces))
+                    except XMLSchemaValueError as err:
+                        self._parse_error(err)
+            self._not_qnames = frozenset(not_qnames)
+
+    def match(self, name):
+        return name not in self._not_qnames and super(Xsd11Wildcard, self).match(name)
 
 
-class Xsd11AnyElement(XsdAnyElement):
+class Xsd11AnyElement(XsdAnyElement, Xsd11Wildcard):
     """
     Class for XSD 1.1 'any' declarations.
 
@@ -253,10 +360,10 @@ class Xsd11AnyElement(XsdAnyElement):
       Content: (annotation?)
     </any>
     """
-    pass
+    __slots__ = ()
 
 
-class Xsd11AnyAttribute(XsdAnyAttribute):
+class Xsd11AnyAttribute(XsdAnyAttribute, Xsd11Wildcard):
     """
     Class for XSD 1.1 'anyAttribute' declarations.
 
@@ -270,7 +377,7 @@ class Xsd11AnyAttribute(XsdAnyAttribute):
       Content: (annotation?)
     </anyAttribute>
     """
-    pass
+    __slots__ = ()
 
 
 class XsdOpenContent(XsdAnnotated):
@@ -284,6 +391,8 @@ class XsdOpenContent(XsdAnnotated):
       Content: (annotation?), (any?)
     </openContent>
     """
+    __slots__ = ('mode',)
+
     def __init__(self, elem, schema):
         super(XsdOpenContent, self).__init__(elem, schema, is_global=False)
         self.mode = get_xsd_attribute(
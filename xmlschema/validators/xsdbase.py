@@ -13,13 +13,13 @@ This module contains base functions and classes XML Schema components.
 """
 import re
 
-from ..compat import PY3, unicode_type
-from ..etree import etree_tostring, etree_iselement
+from ..compat import PY3, unicode_type, intern_string
+from ..etree import etree_element, etree_tostring, etree_iselement
 from ..exceptions import XMLSchemaValueError, XMLSchemaTypeError
 from ..qnames import (
     local_name, get_qname, qname_to_prefixed, XSD_ANNOTATION_TAG, XSD_APPINFO_TAG, XSD_DOCUMENTATION_TAG, XML_LANG
 )
-from .exceptions import XMLSchemaParseError, XMLSchemaValidationError
+from .exceptions import XMLSchemaParseError, XMLSchemaValidationError, iter_error_records
 from .parseutils import (
     get_xsd_component, iter_xsd_components, get_xsd_int_attribute, get_xpath_default_namespace_attribute
 )
@@ -32,6 +32,8 @@ class XsdBaseComponent(object):
 
     See: https://www.w3.org/TR/xmlschema-ref/
     """
+    __slots__ = ('validation', 'errors')
+
     def __init__(self, validation='strict'):
         self.validation = validation
         self.errors = []  # component errors
@@ -136,6 +138,8 @@ class XsdComponent(XsdBaseComponent):
     `False` if it's local.
     :param name: Name of the component, maybe overwritten by the parse of the `elem` argument.
     """
+    __slots__ = ('is_global', 'name', 'schema', 'elem', '_elem', '_local_name')
+
     _REGEX_SPACE = re.compile(r'\s')
     _REGEX_SPACES = re.compile(r'\s+')
 
@@ -170,6 +174,10 @@ class XsdComponent(XsdBaseComponent):
                     "cannot change 'schema' attribute of %r: the actual %r has a different "
                     "target namespace than %r." % (self, self.schema, value)
                 )
+        elif name == "name":
+            # The names are interned, so are shared with the equal tags and keys.
+            value = intern_string(value)
+            super(XsdComponent, self).__setattr__('_local_name', intern_string(local_name(value)))
         super(XsdComponent, self).__setattr__(name, value)
 
     @property
@@ -205,7 +213,7 @@ class XsdComponent(XsdBaseComponent):
             raise XMLSchemaValueError("'skip' validation mode incompatible with error handling.")
         elif not isinstance(error, XMLSchemaValidationError):
             error = XMLSchemaValidationError(self, obj, reason=unicode_type(error))
-        elif obj and error.elem is None and etree_iselement(obj):
+        elif obj is not None and error.elem is None and etree_iselement(obj):
             error.elem = obj
 
         if validation == 'strict':
@@ -235,7 +243,7 @@ class XsdComponent(XsdBaseComponent):
 
     @property
     def local_name(self):
-        return local_name(self.name)
+        return self._local_name
 
     @property
     def qualified_name(self):
@@ -275,6 +283,16 @@ class XsdComponent(XsdBaseComponent):
         else:
             return str(None)
 
+    def _drop_source(self):
+        """
+        Replaces the XSD element of the component with a copy that has only the tag
+        and the attributes, so the subtree of the schema document can be released.
+        The component is not parsed again.
+        """
+        super(XsdComponent, self).__setattr__('elem', etree_element(self.elem.tag, self.elem.attrib))
+        if getattr(self, '_elem', None) is not None:
+            self._elem = etree_element(self._elem.tag, self._elem.attrib)
+
 
 class XsdAnnotation(XsdComponent):
     """
@@ -299,6 +317,7 @@ class XsdAnnotation(XsdComponent):
       Content: ({any})*
     </documentation>
     """
+    __slots__ = ('appinfo', 'documentation')
 
     @property
     def admitted_tags(self):
@@ -326,6 +345,8 @@ class XsdAnnotation(XsdComponent):
 
 
 class XsdAnnotated(XsdComponent):
+    __slots__ = ('annotation',)
+
     def _parse(self):
         super(XsdAnnotated, self)._parse()
         try:
@@ -352,6 +373,7 @@ class ParticleMixin(object):
       https://www.w3.org/TR/2012/REC-xmlschema11-1-20120405/structures.html#p
       https://www.w3.org/TR/2012/REC-xmlschema11-1-20120405/structures.html#t
     """
+    __slots__ = ()
 
     def _parse_particle(self):
         max_occurs = self.max_occurs
@@ -386,11 +408,86 @@ class ParticleMixin(object):
         return True  # raise NotImplementedError  TODO: implement concrete methods
 
 
+class NestedCall(object):
+    """
+    A request for processing a nested XML element, yielded by the step generators
+    `_iter_decode` and `_iter_validate` of elements, complex types, model groups and
+    wildcards. The requesting generator is suspended until the nested generator is
+    exhausted, then it receives the list of the results of the nested generator.
+    The validation errors are instead passed to the outer generators and wrapped by
+    the `_validation_error` method of the validators of the nested calls.
+
+    :param generator: the nested step generator.
+    :param validator: the validator that wraps the errors, if any.
+    :param validation: the validation mode to use for wrapping the errors.
+    :param obj: the instance element to attach to the wrapped errors, if any.
+    """
+    __slots__ = ('generator', 'validator', 'validation', 'obj')
+
+    def __init__(self, generator, validator=None, validation='lax', obj=None):
+        self.generator = generator
+        self.validator = validator
+        self.validation = validation
+        self.obj = obj
+
+
+def iter_nested_calls(generator):
+    """
+    Runs a step generator and its nested calls using an explicit stack instead
+    of a chain of nested generators, so the depth of the processed XML data is
+    not limited by the recursion limit of the interpreter. Yields the validation
+    errors and the results of the outermost generator.
+
+    :param generator: the outermost step generator.
+    """
+    frames = []  # the suspended generators, with their nested calls and the results collected for them
+    calls = []
+    results = None
+    value = None
+    try:
+        while True:
+            try:
+                item = generator.send(value)
+            except StopIteration:
+                if not frames:
+                    return
+                value = results
+                generator, results = frames.pop()
+                calls.pop()
+                continue
+
+            if item.__class__ is NestedCall:
+                frames.append((generator, results))
+                calls.append(item)
+                generator = item.generator
+                results = []
+                value = None
+                continue
+
+            value = None
+            if not calls:
+                yield item
+            elif isinstance(item, XMLSchemaValidationError):
+                for call in reversed(calls):
+                    if call.validator is not None:
+                        item = call.validator._validation_error(item, call.validation, call.obj)
+                yield item
+            else:
+                results.append(item)
+    finally:
+        # Closes the suspended generators if the iteration is interrupted
+        generator.close()
+        while frames:
+            frames.pop()[0].close()
+
+
 class ValidatorMixin(object):
     """
     Mixin for implementing XML Schema validators. A derived class must implement the
     methods `iter_decode` and `iter_encode`.
     """
+    __slots__ = ()
+
     def validate(self, data, use_defaults=True):
         """
         Validates an XML data against the XSD schema/component instance.
@@ -405,7 +502,7 @@ class ValidatorMixin(object):
         for error in self.iter_errors(data, use_defaults=use_defaults):
             raise error
 
-    def iter_errors(self, data, path=None, use_defaults=True):
+    def iter_errors(self, data, path=None, use_defaults=True, max_errors=None, collapse=False, records=False):
         """
         Creates an iterator for the errors generated by the validation of an XML data
         against the XSD schema/component instance.
@@ -418,15 +515,42 @@ class ValidatorMixin(object):
         that have to be validated. The XPath expression considers the schema as the root element \
         with global elements as its children.
         :param use_defaults: Use schema's default values for filling missing data.
+        :param max_errors: an optional maximum number of errors. The validation stops after \
+        the detection of *max_errors* errors, including the collapsed ones.
+        :param collapse: if `True` only the first error of each XSD component is yielded. \
+        The following errors of the same component are dropped and counted in the attribute \
+        *occurrences* of the first error.
+        :param records: if `True` yields :class:`ValidationErrorRecord` instances instead \
+        of the validation errors, see :meth:`iter_error_records`.
         """
-        for chunk in self.iter_decode(data, path, use_defaults=use_defaults):
-            if isinstance(chunk, XMLSchemaValidationError):
-                yield chunk
+        if max_errors is not None and max_errors < 1:
+            raise XMLSchemaValueError("'max_errors' argument must be a positive integer.")
+
+        if records:
+            errors = self.iter_error_records(data, path=path, use_defaults=use_defaults)
+        else:
+            errors = self.iter_validate(data, path=path, use_defaults=use_defaults)
+
+        collapsed = {} if collapse else None
+        count = 0
+        for error in errors:
+            count += 1
+            if collapsed is None:
+                yield error
+            else:
+                try:
+                    collapsed[id(error.validator)].occurrences += 1
+                except KeyError:
+                    collapsed[id(error.validator)] = error
+                    yield error
+            if count == max_errors:
+                break
 
     def is_valid(self, data, use_defaults=True):
         """
         Like :meth:`validate` except that do not raises an exception but returns
-        ``True`` if the XML document is valid, ``False`` if it's invalid.
+        ``True`` if the XML document is valid, ``False`` if it's invalid. The
+        validation stops at the first error.
         """
         error = next(self.iter_errors(data, use_defaults=use_defaults), None)
         return error is None
@@ -465,7 +589,7 @@ class ValidatorMixin(object):
 
     def iter_decode(self, data, path=None, validation='lax', process_namespaces=True,
                     namespaces=None, use_defaults=True, decimal_type=None, converter=None,
-                    dict_class=None, list_class=None):
+                    dict_class=None, list_class=None, intern_values=False):
         """
         Generator method for decoding XML data using the XSD component. Returns a data
         structure after a sequence, possibly empty, of validation or decode errors.
@@ -476,6 +600,28 @@ class ValidatorMixin(object):
         """
         raise NotImplementedError
 
+    def iter_error_records(self, data, **kwargs):
+        """
+        Like :meth:`iter_validate` but yields compact :class:`ValidationErrorRecord`
+        instances, that store the XSD component, the path of the instance element and
+        the reason of the error, without keeping references to the validated data.
+        """
+        root = data if etree_iselement(data) else None
+        for record in iter_error_records(self.iter_validate(data, **kwargs), root, getattr(self, 'namespaces', None)):
+            yield record
+
+    def iter_validate(self, data, **kwargs):
+        """
+        Generator method for validating XML data using the XSD component. Yields only
+        the validation errors, in the same order of :meth:`iter_decode` with 'lax'
+        validation. This implementation filters the results of the decoding, the
+        components of the complex content override it for checking the data without
+        building the decoded data structures.
+        """
+        for result in self.iter_decode(data, 'lax', **kwargs):
+            if isinstance(result, XMLSchemaValidationError):
+                yield result
+
     def iter_encode(self, data, path=None, validation='lax', namespaces=None, indent=None,
                     element_class=None, converter=None):
         raise NotImplementedError
@@ -12,6 +12,7 @@
 This module contains an XPath parser and other XPath related classes and functions.
 """
 import re
+import threading
 from decimal import Decimal
 from collections import MutableSequence
 from abc import ABCMeta
@@ -420,6 +421,10 @@ advance = dummy_advance  # Replaced by active parser
 current_token = None
 next_token = None
 
+# The parser main cycle works on module globals, so parsing is serialized
+# between threads. Parsed selectors are immutable and can be shared.
+_parser_lock = threading.Lock()
+
 
 def expression(rbp=0):
     """
@@ -787,13 +792,14 @@ class XPathParserBase(object):
 
     def parse(self):
         global advance
-        advance = self.advance
-        self.__iter__()
-        advance()
-        root_token = expression()
-        if next_token.name != '(end)':
-            next_token.unexpected()
-        return root_token
+        with _parser_lock:
+            advance = self.advance
+            self.__iter__()
+            advance()
+            root_token = expression()
+            if next_token.name != '(end)':
+                next_token.unexpected()
+            return root_token
 
 
 def create_xpath_parser(name, version, symbols):
@@ -821,7 +827,7 @@ def xsd_iterfind(context, path, namespaces=None):
     if path[:1] == "/":
         path = "." + path
 
-    path_key = (id(context), path)
+    path_key = (path, tuple(sorted(namespaces.items())) if namespaces else None)
     try:
         return _selector_cache[path_key].iter_select(context)
     except KeyError:
@@ -831,7 +837,7 @@ def xsd_iterfind(context, path, namespaces=None):
     selector = parser.parse()
     if len(_selector_cache) > 100:
         _selector_cache.clear()
-    _selector_cache[path] = selector
+    _selector_cache[path_key] = selector
     return selector.iter_select(context)
 
 
@@ -889,6 +895,8 @@ class ElementPathMixin(object):
     """
     Mixin class that defines the ElementPath API.
     """
+    __slots__ = ()
+
     @property
     def tag(self):
         return getattr(self, 'name')